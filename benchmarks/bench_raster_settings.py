@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tamanho e tempo do modo rasterizado para cada combinação de RasterSettings.
+
+Gera um documento por combinação de resolução, cores e compressão e mostra
+os bytes por página do PDF resultante, o tamanho do fundo codificado e o
+tempo por documento, para ajudar a escolher as configurações de um perfil.
+Sem argumentos usa um formulário sintético (texto e linhas); passe o caminho
+de um template real para medir com ele.
+
+Uso: python benchmarks/bench_raster_settings.py [template.pdf] [documentos]
+"""
+import os
+import sys
+import tempfile
+import time
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+
+from models import DocumentProfile, SpreadsheetProfile, ColumnMapping, PdfFieldMapping, RasterSettings
+from core.pdf_generator import render_pdf_bytes
+from core.render_plan import compile_render_plan
+from core.template_context import TemplateContext
+from core.raster_cache import RasterCache
+
+DPIS = (100, 150, 200, 300)
+COLORS = ("rgb", "gray", "bilevel")
+CODECS = ("flate", "jpeg")
+
+def _make_form(path: str):
+    """Formulário só com texto e linhas, o caso típico dos templates"""
+    c = canvas.Canvas(path, pagesize=A4)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(60, 790, "FORMULÁRIO DE CADASTRO")
+    c.setFont("Helvetica", 10)
+    for i in range(28):
+        y = 740 - i * 24
+        c.drawString(60, y + 4, f"Campo {i + 1}:")
+        c.line(140, y, 535, y)
+    c.rect(50, 40, 495, 730)
+    c.showPage()
+    c.save()
+
+def _profiles(template_path: str, settings: RasterSettings):
+    spreadsheet_profile = SpreadsheetProfile(
+        name="Benchmark",
+        columns=[ColumnMapping("Nome", "Nome", "texto", 0)]
+    )
+    document_profile = DocumentProfile(
+        name="Benchmark",
+        pdf_path=template_path,
+        spreadsheet_profile_name="Benchmark",
+        field_mappings=[PdfFieldMapping("Nome", 50, 40, 0)],
+        render_mode="raster",
+        raster_settings=settings
+    )
+    return document_profile, spreadsheet_profile
+
+def _measure(template_path: str, settings: RasterSettings, documents: int, raster_cache: RasterCache):
+    """(bytes por página do PDF, bytes do fundo codificado por página, ms por documento)"""
+    document_profile, spreadsheet_profile = _profiles(template_path, settings)
+    plan = compile_render_plan(document_profile, spreadsheet_profile)
+    with TemplateContext(document_profile, raster_cache) as template:
+        data = render_pdf_bytes({"Nome": "Maria Souza"}, document_profile, spreadsheet_profile, "bench", template, plan)
+        background = sum(len(template.get_background_image(i)) for i in range(template.page_count))
+        start = time.perf_counter()
+        for i in range(documents):
+            render_pdf_bytes({"Nome": f"Pessoa {i}"}, document_profile, spreadsheet_profile, "bench", template, plan)
+        elapsed = time.perf_counter() - start
+        pages = template.page_count
+    return len(data) / pages, background / pages, elapsed * 1000 / documents
+
+def main():
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            template_path = sys.argv[1]
+        else:
+            template_path = os.path.join(tmp, "formulario.pdf")
+            _make_form(template_path)
+
+        # Cache próprio, para não misturar com o do aplicativo
+        raster_cache = RasterCache(os.path.join(tmp, "cache"))
+
+        print(f"Template: {template_path}, {documents} documentos por combinação")
+        print(f"{'DPI':>4}  {'cores':<8} {'codec':<6} {'bytes/página':>13} {'fundo/página':>13} {'ms/documento':>13}")
+        for dpi, color, codec in product(DPIS, COLORS, CODECS):
+            if codec == "jpeg" and color == "bilevel":
+                continue  # JPEG não tem 1 bit; cai para flate
+            per_page, background, ms = _measure(template_path, RasterSettings(dpi, color, codec), documents, raster_cache)
+            print(f"{dpi:>4}  {color:<8} {codec:<6} {per_page:>13,.0f} {background:>13,.0f} {ms:>13.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
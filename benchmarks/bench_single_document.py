@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latência da geração de um documento avulso (core.document_renderer).
+
+Mede a primeira chamada (abre o template, monta os fundos e compila o plano)
+e, depois, a distribuição das chamadas seguintes (p50/p95/p99), nos modos
+vetorial e rasterizado. Sem argumentos usa um formulário sintético; passe o
+caminho de um template real para medir com ele.
+
+Uso: python benchmarks/bench_single_document.py [template.pdf] [documentos]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DocumentProfile, SpreadsheetProfile, ColumnMapping, PdfFieldMapping, RasterSettings
+from core.document_renderer import DocumentRenderer
+from core.raster_cache import RasterCache
+from bench_raster_settings import _make_form
+
+def _profiles(template_path: str, render_mode: str):
+    spreadsheet_profile = SpreadsheetProfile(
+        name="Benchmark",
+        columns=[
+            ColumnMapping("Nome", "Nome", "texto", 0),
+            ColumnMapping("CPF", "CPF", "cpf", 1),
+            ColumnMapping("Data", "Data", "data", 2),
+        ]
+    )
+    document_profile = DocumentProfile(
+        name="Benchmark",
+        pdf_path=template_path,
+        spreadsheet_profile_name="Benchmark",
+        field_mappings=[
+            PdfFieldMapping("Nome", 50, 40, 0),
+            PdfFieldMapping("CPF", 50, 50, 0),
+            PdfFieldMapping("Data", 50, 60, 0),
+        ],
+        render_mode=render_mode,
+        raster_settings=RasterSettings()
+    )
+    return document_profile, spreadsheet_profile
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def _measure(template_path: str, render_mode: str, documents: int, raster_cache: RasterCache):
+    """(ms da primeira chamada, lista de ms das demais, bytes do documento)"""
+    document_profile, spreadsheet_profile = _profiles(template_path, render_mode)
+    start = time.perf_counter()
+    renderer = DocumentRenderer(document_profile, spreadsheet_profile, raster_cache)
+    data = renderer.render({"Nome": "Maria Souza", "CPF": "12345678901", "Data": "2024-03-01"})
+    first = (time.perf_counter() - start) * 1000
+    samples = []
+    with renderer:
+        for i in range(documents):
+            start = time.perf_counter()
+            renderer.render({"Nome": f"Pessoa {i}", "CPF": f"{i:011d}", "Data": "2024-03-01"})
+            samples.append((time.perf_counter() - start) * 1000)
+    return first, samples, len(data)
+
+def main():
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            template_path = sys.argv[1]
+        else:
+            template_path = os.path.join(tmp, "formulario.pdf")
+            _make_form(template_path)
+
+        # Cache próprio, para não misturar com o do aplicativo
+        raster_cache = RasterCache(os.path.join(tmp, "cache"))
+
+        print(f"Template: {template_path}, {documents} documentos por modo")
+        print(f"{'modo':<8} {'1ª chamada':>11} {'p50':>7} {'p95':>7} {'p99':>7} {'máx':>7} {'bytes':>9}  (ms)")
+        for render_mode in ("vector", "raster"):
+            first, samples, size = _measure(template_path, render_mode, documents, raster_cache)
+            print(f"{render_mode:<8} {first:>11.1f} {_percentile(samples, 0.50):>7.1f} "
+                  f"{_percentile(samples, 0.95):>7.1f} {_percentile(samples, 0.99):>7.1f} "
+                  f"{max(samples):>7.1f} {size:>9,}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suíte de benchmarks do motor de geração.
+
+Gera templates sintéticos (1, 5 e 50 páginas; só vetor ou com imagens de
+página inteira) e planilhas sintéticas (1 mil, 10 mil e 100 mil linhas, com
+uma coluna de cada ColumnType) e mede:
+
+    generate_pdf_with_template   documentos/s, bytes por documento
+    batch_generate_pdfs          linhas/s, bytes por documento
+    read_spreadsheet             linhas/s (leitura em blocos, com cada motor instalado)
+    format_columns/format_column linhas/s (todas as colunas / por tipo)
+
+Cada caso registra também o pico de memória (RSS) do processo durante o caso.
+Roda sem rede; os arquivos sintéticos ficam em --dados e são reaproveitados.
+Os resultados vão para um JSON (--saida) que pode ser comparado com o de outra
+versão (--comparar); o código de saída é 1 se algum caso ficar mais lento que
+o limite (--limite, em %).
+
+Uso:
+    python benchmarks/bench_suite.py [--rapido] [--saida atual.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Avisos do PyMuPDF vão para stderr: stdout fica só com a tabela
+os.environ.setdefault("PYMUPDF_MESSAGE", "fd:2")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from core.formatting import format_column, format_columns
+from core.pdf_generator import generate_pdf_with_template, batch_generate_pdfs
+from core.render_plan import compile_render_plan
+from core.spreadsheet_reader import available_engines, open_spreadsheet, select_engine
+from core.template_context import TemplateContext
+from synthetic import COLUMNS, TEMPLATE_KINDS, cached_file, make_profiles, make_spreadsheet, make_template, _row
+
+DEFAULT_ROWS = (1000, 10000, 100000)
+DEFAULT_PAGES = (1, 5, 50)
+DEFAULT_BATCH_ROWS = 1000
+
+# --- Memória ---
+
+def _reset_peak_rss() -> bool:
+    """Zera o pico de RSS do processo (Linux: /proc/self/clear_refs); False se não der"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss() -> int:
+    """Pico de RSS do processo em bytes (VmHWM; sem /proc, o máximo desde o início)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+def _children_peak_rss() -> int:
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+# --- Medição ---
+
+def _timed(fn: Callable[[], Any], min_seconds: float, min_calls: int = 3):
+    """Repete fn até min_seconds (e pelo menos min_calls vezes); retorna (chamadas, segundos)"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if calls >= min_calls and elapsed >= min_seconds:
+            return calls, elapsed
+
+def _result(case: str, params: Dict[str, Any], rows: int, seconds: float, **extra) -> Dict[str, Any]:
+    result = {
+        "case": case,
+        "params": params,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds, 2) if seconds > 0 else None,
+        "peak_rss_mb": round(_peak_rss() / 2**20, 1),
+    }
+    result.update(extra)
+    return result
+
+def _print_result(result: Dict[str, Any]):
+    params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+    per_doc = result.get("bytes_per_document")
+    print(f"{result['case']:<28} {params:<30} {result['rows_per_s']:>12,.1f} "
+          f"{(f'{per_doc:,.0f}' if per_doc is not None else '-'):>12} {result['peak_rss_mb']:>9.1f}", flush=True)
+
+# --- Casos ---
+
+def bench_generate(data_dir: str, tmp: str, pages: int, kind: str, min_seconds: float) -> Dict[str, Any]:
+    template = cached_file(data_dir, f"template_{kind}_{pages}p.pdf", lambda path: make_template(path, pages, kind))
+    document_profile, spreadsheet_profile = make_profiles(template, pages)
+    row = dict(zip([name for name, _ in COLUMNS], _row(1, datetime(2024, 1, 1))))
+    output = os.path.join(tmp, "documento.pdf")
+
+    _reset_peak_rss()
+    # Primeira chamada sem contexto: abre o template e compila o plano
+    start = time.perf_counter()
+    generate_pdf_with_template(row, document_profile, spreadsheet_profile, output)
+    first_call = time.perf_counter() - start
+
+    plan = compile_render_plan(document_profile, spreadsheet_profile)
+    with TemplateContext(document_profile) as context:
+        calls, elapsed = _timed(
+            lambda: generate_pdf_with_template(row, document_profile, spreadsheet_profile, output, context, plan),
+            min_seconds
+        )
+    return _result(
+        "generate_pdf_with_template", {"pages": pages, "template": kind}, calls, elapsed,
+        bytes_per_document=os.path.getsize(output),
+        pages_per_s=round(calls * pages / elapsed, 2),
+        first_call_ms=round(first_call * 1000, 1)
+    )
+
+def bench_batch(data_dir: str, tmp: str, rows: int, kind: str, workers: int) -> Dict[str, Any]:
+    template = cached_file(data_dir, f"template_{kind}_1p.pdf", lambda path: make_template(path, 1, kind))
+    sheet = cached_file(data_dir, f"planilha_{rows}.xlsx", lambda path: make_spreadsheet(path, rows))
+    document_profile, spreadsheet_profile = make_profiles(template, 1)
+    output_dir = tempfile.mkdtemp(dir=tmp)
+
+    _reset_peak_rss()
+    start = time.perf_counter()
+    generated = batch_generate_pdfs(
+        sheet, document_profile, spreadsheet_profile,
+        status_callback=None,
+        base_date=datetime(2024, 1, 1),
+        workers=workers,
+        incremental=False,
+        output_dir=output_dir
+    )
+    elapsed = time.perf_counter() - start
+    sizes = [entry.stat().st_size for entry in os.scandir(output_dir) if entry.name.endswith(".pdf")]
+    return _result(
+        "batch_generate_pdfs", {"rows": rows, "template": kind, "workers": workers}, generated, elapsed,
+        bytes_per_document=round(sum(sizes) / len(sizes)) if sizes else None,
+        children_peak_rss_mb=round(_children_peak_rss() / 2**20, 1)
+    )
+
+def bench_spreadsheet(data_dir: str, rows: int, min_seconds: float) -> List[Dict[str, Any]]:
+    sheet = cached_file(data_dir, f"planilha_{rows}.xlsx", lambda path: make_spreadsheet(path, rows))
+    _, spreadsheet_profile = make_profiles(sheet)
+
+    # Motor automático (o caso comparável entre versões) e depois os demais instalados
+    automatic = select_engine(sheet)
+    results = []
+    for engine in [automatic] + [e for e in available_engines(sheet) if e != automatic]:
+        _reset_peak_rss()
+        start = time.perf_counter()
+        with open_spreadsheet(sheet, engine=engine) as reader:
+            frame = pd.concat(list(reader), ignore_index=True)
+        params = {"rows": rows} if engine == automatic else {"rows": rows, "engine": engine}
+        results.append(_result("read_spreadsheet", params, len(frame), time.perf_counter() - start, engine=engine))
+        if engine == automatic:
+            df = frame
+
+    _reset_peak_rss()
+    calls, elapsed = _timed(lambda: format_columns(df, spreadsheet_profile), min_seconds)
+    results.append(_result("format_columns", {"rows": rows}, calls * len(df), elapsed))
+
+    for name, column_type in COLUMNS:
+        series = df[name]
+        _reset_peak_rss()
+        calls, elapsed = _timed(lambda: format_column(series, column_type), min_seconds / len(COLUMNS))
+        results.append(_result("format_column", {"rows": rows, "type": column_type}, calls * len(df), elapsed))
+    return results
+
+# --- Comparação ---
+
+def _key(result: Dict[str, Any]) -> str:
+    return result["case"] + " " + json.dumps(result["params"], sort_keys=True, ensure_ascii=False)
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any], limit: float) -> int:
+    """Mostra a variação de linhas/s e de memória por caso; retorna quantos ficaram mais lentos que limit %"""
+    before = {_key(result): result for result in previous["results"]}
+    regressions = 0
+    print(f"\nComparação com {previous.get('version') or '?'} ({previous.get('date', '?')})")
+    print(f"{'caso':<70} {'antes':>12} {'agora':>12} {'variação':>9} {'RSS':>8}")
+    for result in current["results"]:
+        old = before.get(_key(result))
+        if old is None or not old.get("rows_per_s") or not result.get("rows_per_s"):
+            continue
+        change = (result["rows_per_s"] / old["rows_per_s"] - 1) * 100
+        rss_change = result["peak_rss_mb"] - old["peak_rss_mb"]
+        flag = "  REGRESSÃO" if change < -limit else ""
+        regressions += bool(flag)
+        print(f"{_key(result):<70} {old['rows_per_s']:>12,.1f} {result['rows_per_s']:>12,.1f} "
+              f"{change:>+8.1f}% {rss_change:>+7.1f}M{flag}")
+    return regressions
+
+# --- Execução ---
+
+def _version() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _package_version(name: str) -> Optional[str]:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+def _environment() -> Dict[str, Any]:
+    import fitz
+    import openpyxl
+    import reportlab
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pymupdf": fitz.VersionBind,
+        "reportlab": reportlab.Version,
+        "pandas": pd.__version__,
+        "openpyxl": openpyxl.__version__,
+        "python_calamine": _package_version("python-calamine"),
+    }
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmarks do motor de geração (resultados em JSON).")
+    parser.add_argument("--rapido", action="store_true", help="só os casos pequenos (1 mil linhas, 1 e 5 páginas)")
+    parser.add_argument("--linhas", type=_int_list, default=None,
+                        help="tamanhos das planilhas, separados por vírgula (padrão: 1000,10000,100000)")
+    parser.add_argument("--paginas", type=_int_list, default=None,
+                        help="páginas dos templates, separadas por vírgula (padrão: 1,5,50)")
+    parser.add_argument("--lote-linhas", type=_int_list, default=None,
+                        help=f"linhas dos lotes de batch_generate_pdfs (padrão: {DEFAULT_BATCH_ROWS})")
+    parser.add_argument("--processos", type=int, default=1, help="processos dos lotes (padrão: 1)")
+    parser.add_argument("--tempo", type=float, default=2.0, help="segundos mínimos por caso repetido (padrão: 2)")
+    parser.add_argument("--dados", default=os.path.join(tempfile.gettempdir(), "pdf_generator_bench"),
+                        help="pasta dos arquivos sintéticos (reaproveitados entre execuções)")
+    parser.add_argument("--saida", default=None,
+                        help="arquivo JSON dos resultados (padrão: benchmarks/results/<data>_<versão>.json)")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--limite", type=float, default=10.0,
+                        help="queda de linhas/s (%%) considerada regressão na comparação (padrão: 10)")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    rows_sizes = args.linhas or ((1000,) if args.rapido else DEFAULT_ROWS)
+    page_counts = args.paginas or ((1, 5) if args.rapido else DEFAULT_PAGES)
+    batch_sizes = args.lote_linhas or ((200,) if args.rapido else (DEFAULT_BATCH_ROWS,))
+    min_seconds = args.tempo / 4 if args.rapido else args.tempo
+
+    version = _version()
+    report = {
+        "version": version,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "peak_rss_per_case": _reset_peak_rss(),
+        "results": [],
+    }
+
+    print(f"{'caso':<28} {'parâmetros':<30} {'linhas/s':>12} {'bytes/doc':>12} {'RSS (MB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        def add(result):
+            report["results"].append(result)
+            _print_result(result)
+
+        for rows in rows_sizes:
+            for result in bench_spreadsheet(args.dados, rows, min_seconds):
+                add(result)
+        for kind in TEMPLATE_KINDS:
+            for pages in page_counts:
+                add(bench_generate(args.dados, tmp, pages, kind, min_seconds))
+        for kind in TEMPLATE_KINDS:
+            for rows in batch_sizes:
+                add(bench_batch(args.dados, tmp, rows, kind, args.processos))
+
+    output = args.saida or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{datetime.now():%Y%m%d_%H%M%S}_{version or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados salvos em {output}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare(previous, report, args.limite):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Dados sintéticos para os benchmarks: templates PDF, planilhas e perfis.
+
+Tudo é gerado localmente e de forma determinística (mesma semente), para que
+os resultados de versões diferentes sejam comparáveis.
+"""
+import io
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from openpyxl import Workbook
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from models import DocumentProfile, SpreadsheetProfile, ColumnMapping, PdfFieldMapping
+
+TEMPLATE_KINDS = ("vector", "image")
+
+# Uma coluna de cada ColumnType: (nome, tipo)
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("Nome", "texto"),
+    ("Quantidade", "numero"),
+    ("Valor", "monetario"),
+    ("Data", "data"),
+    ("Registro", "data e hora"),
+    ("CPF", "cpf"),
+    ("CNPJ", "cnpj"),
+    ("Telefone", "telefone"),
+    ("Email", "email"),
+)
+
+def _scan_image(seed: int, size=(620, 877)) -> ImageReader:
+    """Página "escaneada": gradiente com ruído, em JPEG (como sai de um scanner)"""
+    rng = random.Random(seed)
+    width, height = size
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.frombytes("L", size, bytes(rng.getrandbits(8) for _ in range(width * height)))
+    image = Image.merge("RGB", (gradient, Image.blend(gradient, noise, 0.3), noise))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    buffer.seek(0)
+    return ImageReader(buffer)
+
+def make_template(path: str, pages: int, kind: str = "vector"):
+    """
+    Template de formulário com pages páginas. kind "vector" tem só texto e
+    linhas; "image" tem uma imagem de página inteira por página.
+    """
+    if kind not in TEMPLATE_KINDS:
+        raise ValueError(f"Tipo de template inválido: {kind}")
+    c = canvas.Canvas(path, pagesize=A4)
+    for page_idx in range(pages):
+        if kind == "image":
+            c.drawImage(_scan_image(page_idx), 0, 0, width=A4[0], height=A4[1])
+        c.setFont("Helvetica-Bold", 18)
+        c.drawString(60, 790, f"FORMULÁRIO - PÁGINA {page_idx + 1}")
+        c.setFont("Helvetica", 10)
+        for i in range(28):
+            y = 740 - i * 24
+            c.drawString(60, y + 4, f"Campo {i + 1}:")
+            c.line(140, y, 535, y)
+        c.rect(50, 40, 495, 730)
+        c.showPage()
+    c.save()
+
+def _row(i: int, start: datetime) -> List:
+    moment = start + timedelta(minutes=37 * i)
+    return [
+        f"Pessoa {i}",
+        i % 1000,
+        round((i * 7.31) % 10000, 2),
+        moment.date(),
+        moment,
+        f"{(i * 7919) % 10**11:011d}",
+        f"{(i * 104729) % 10**14:014d}",
+        f"11{(i * 31) % 10**9:09d}",
+        f"pessoa{i}@exemplo.com.br",
+    ]
+
+def make_spreadsheet(path: str, rows: int):
+    """Planilha .xlsx com cabeçalho na linha 1 e uma coluna de cada tipo"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Dados")
+    sheet.append([name for name, _ in COLUMNS])
+    start = datetime(2024, 1, 1, 8, 0)
+    for i in range(rows):
+        sheet.append(_row(i, start))
+    workbook.save(path)
+
+def make_profiles(template_path: str, pages: int = 1) -> Tuple[DocumentProfile, SpreadsheetProfile]:
+    """Perfis que mapeiam todas as colunas em todas as páginas do template"""
+    spreadsheet_profile = SpreadsheetProfile(
+        name="Benchmark",
+        columns=[ColumnMapping(name, name, column_type, index) for index, (name, column_type) in enumerate(COLUMNS)]
+    )
+    document_profile = DocumentProfile(
+        name="Benchmark",
+        pdf_path=template_path,
+        spreadsheet_profile_name="Benchmark",
+        title_column="Nome",
+        field_mappings=[
+            PdfFieldMapping(name, 50, 30 + 8 * index, page_idx)
+            for page_idx in range(pages)
+            for index, (name, _) in enumerate(COLUMNS)
+        ]
+    )
+    return document_profile, spreadsheet_profile
+
+def cached_file(data_dir: str, name: str, build) -> str:
+    """Caminho de um arquivo sintético em data_dir, gerado só se ainda não existir"""
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        tmp_path = path + ".tmp" + os.path.splitext(name)[1]
+        build(tmp_path)
+        os.replace(tmp_path, path)
+    return path
@@ -52,6 +52,8 @@ def build():
         "--collect-all=customtkinter",
         # Garante que o PyMuPDF (fitz) seja incluído corretamente
         "--collect-all=fitz",
+        # As telas são importadas sob demanda (frames/__init__.py), fora do alcance da análise
+        "--collect-submodules=frames",
         # Define o caminho de busca para módulos
         f"--paths={script_dir}"
     ]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geração em lote pela linha de comando, sem interface gráfica.
+
+Usa os perfis salvos pelo aplicativo (DataManager) e não importa tkinter,
+customtkinter nem a tela de licença, então pode rodar em um servidor sem
+monitor, chamado por um agendador. O progresso sai em stdout como JSON, um
+evento por linha:
+
+    {"event": "progress", "stage": "generating", "done": 120, "total": 1000, ...}
+    {"event": "finished", "generated": 1000, "output_dir": "...", "timing": {...}}
+
+Em caso de erro sai {"event": "error", ...} (código 1); interrompido com
+Ctrl+C/SIGTERM sai {"event": "cancelled", ...} (código 130), e rodar de novo
+o mesmo lote retoma de onde parou.
+
+Uso:
+    python cli.py --perfil "Certificado" --planilha dados.xlsx --mes 03/2024 --saida /srv/pdfs
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from datetime import datetime
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_CANCELLED = 130
+
+OUTPUT_MODES = ("files", "merged", "zip")
+# Motores de leitura de core.spreadsheet_reader (sem importá-lo antes da hora)
+SPREADSHEET_ENGINES = ("calamine", "openpyxl", "csv", "parquet", "pandas")
+
+# Avisos do PyMuPDF vão para stderr: stdout fica só com os eventos JSON
+os.environ.setdefault("PYMUPDF_MESSAGE", "fd:2")
+
+def _emit(event: str, **fields):
+    print(json.dumps({"event": event, **fields}, ensure_ascii=False), flush=True)
+
+def _parse_month(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%m/%Y")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mês inválido: {value} (use MM/AAAA, ex.: 03/2024)")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Gera os documentos de uma planilha com um perfil de documento salvo, sem interface gráfica."
+    )
+    parser.add_argument("--perfil", required=True, help="nome do perfil de documento")
+    parser.add_argument("--planilha", required=True, help="planilha de dados (.xlsx, .xls, .ods, .csv ou .parquet)")
+    parser.add_argument("--mes", type=_parse_month, default=None,
+                        help="mês/ano de referência MM/AAAA (padrão: mês atual)")
+    parser.add_argument("--saida", default=None,
+                        help="pasta de saída (padrão: Documentos/PDF_GENERATOR/ANO/MES do mês de referência)")
+    parser.add_argument("--modo", choices=OUTPUT_MODES, default="files",
+                        help="files: um PDF por linha; merged: PDF único; zip: arquivo .zip")
+    parser.add_argument("--zip-compactado", action="store_true", help="com --modo zip, comprime as entradas (deflate)")
+    parser.add_argument("--max-documentos", type=int, default=None,
+                        help="com --modo merged, divide o PDF único em partes com até N documentos")
+    parser.add_argument("--motor-planilha", choices=SPREADSHEET_ENGINES, default=None,
+                        help="motor de leitura da planilha (padrão: o mais rápido instalado)")
+    parser.add_argument("--processos", type=int, default=None, help="processos de geração (padrão: um por núcleo)")
+    parser.add_argument("--completo", action="store_true",
+                        help="regenera todas as linhas (ignora o diário do lote)")
+    parser.add_argument("--apagar-antigos", action="store_true",
+                        help="apaga os PDFs gerados pelo lote para linhas que saíram da planilha ou mudaram de nome")
+    parser.add_argument("--tempos", action="store_true",
+                        help="grava o relatório de tempos por etapa (Tempos_<perfil>.json) junto dos arquivos")
+    parser.add_argument("--memoria", type=int, nargs="?", const=100, default=None, metavar="LINHAS",
+                        help="mede a memória (RSS e tracemalloc) a cada LINHAS linhas (padrão: 100) e inclui no "
+                             "relatório do lote; deixa o lote mais lento e roda em um único processo")
+    parser.add_argument("--intervalo", type=float, default=1.0,
+                        help="intervalo mínimo em segundos entre eventos de progresso (padrão: 1)")
+    return parser
+
+def run(args: argparse.Namespace) -> int:
+    # Só os perfis são carregados antes de validar os argumentos; o motor de
+    # geração (pandas, PyMuPDF, ReportLab) vem depois, apenas se houver trabalho
+    from core.data_manager import data_manager
+    from models import DocumentProfile, SpreadsheetProfile
+
+    document_profile = data_manager.load_profile(DocumentProfile, args.perfil)
+    if document_profile is None:
+        _emit("error", message=f"Perfil de documento não encontrado: {args.perfil}")
+        return EXIT_ERROR
+    spreadsheet_profile = data_manager.load_profile(SpreadsheetProfile, document_profile.spreadsheet_profile_name)
+    if spreadsheet_profile is None:
+        _emit("error", message=f"Perfil de planilha não encontrado: {document_profile.spreadsheet_profile_name}")
+        return EXIT_ERROR
+    if not os.path.isfile(args.planilha):
+        _emit("error", message=f"Planilha não encontrada: {args.planilha}")
+        return EXIT_ERROR
+
+    from core.batch_job import BatchJob, BatchCancelled
+    from core.memory_profile import MemoryProfile
+    from core.pdf_generator import batch_generate_pdfs
+    from core.timing_report import TimingReport
+
+    base_date = args.mes or datetime.now()
+    output_dir = os.path.abspath(args.saida) if args.saida else data_manager.get_generated_pdfs_dir(base_date)
+
+    def on_progress(event):
+        _emit(
+            "progress",
+            stage=event.stage,
+            done=event.done,
+            total=event.total,
+            rate=round(event.rate, 2),
+            eta=round(event.eta, 1) if event.eta is not None else None,
+            message=event.message
+        )
+
+    timing = TimingReport(memory=MemoryProfile(sample_rows=args.memoria) if args.memoria else None)
+    job = BatchJob(on_progress=on_progress, interval=args.intervalo, timing=timing)
+
+    def cancel(signum, frame):
+        # O lote para entre duas linhas e o diário fica pronto para retomar
+        job.cancel()
+    signal.signal(signal.SIGINT, cancel)
+    signal.signal(signal.SIGTERM, cancel)
+
+    try:
+        generated = batch_generate_pdfs(
+            args.planilha,
+            document_profile,
+            spreadsheet_profile,
+            status_callback=None,
+            base_date=base_date,
+            workers=args.processos,
+            output_mode=args.modo,
+            merge_max_documents=args.max_documentos,
+            zip_compression="deflate" if args.zip_compactado else "store",
+            incremental=not args.completo,
+            prune_orphans=args.apagar_antigos,
+            job=job,
+            output_dir=output_dir,
+            save_timing=args.tempos,
+            spreadsheet_engine=args.motor_planilha
+        )
+    except BatchCancelled as e:
+        _emit("cancelled", generated=e.generated_count, output_dir=output_dir, message=str(e))
+        return EXIT_CANCELLED
+    except Exception as e:
+        _emit("error", message=str(e))
+        return EXIT_ERROR
+
+    _emit("finished", generated=generated, output_dir=output_dir, timing=job.timing.to_dict())
+    if job.timing.memory is not None:
+        for warning in job.timing.memory.warnings:
+            print(f"Aviso: {warning}", file=sys.stderr)
+    return EXIT_OK
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+if __name__ == "__main__":
+    # Necessário para o pool de processos da geração em lote no executável (PyInstaller)
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,5 +1,12 @@
 # -*- coding: utf-8 -*-
 from .data_manager import data_manager, DataManager
-from .pdf_generator import generate_pdf_with_template, batch_generate_pdfs
 
 __all__ = ['data_manager', 'DataManager', 'generate_pdf_with_template', 'batch_generate_pdfs']
+
+def __getattr__(name):
+    # O motor de geração (pandas, PyMuPDF, ReportLab) só é importado quando usado,
+    # para que data_manager possa ser carregado rápido (ex.: pela linha de comando)
+    if name in ('generate_pdf_with_template', 'batch_generate_pdfs'):
+        from . import pdf_generator
+        return getattr(pdf_generator, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
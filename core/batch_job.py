@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Controle de um lote em andamento: eventos de progresso e cancelamento.
+
+O progresso sai como ProgressEvent (linhas concluídas, total, linhas/s, tempo
+restante e etapa), limitado a uma taxa fixa: a interface recebe no máximo
+um evento a cada PROGRESS_INTERVAL segundos, por mais rápido que o lote seja.
+O cancelamento é cooperativo: o lote verifica o pedido entre uma linha e outra.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Literal, Optional
+
+from core.timing_report import TimingReport
+
+# Intervalo mínimo entre dois eventos de progresso (10 atualizações por segundo)
+PROGRESS_INTERVAL = 0.1
+
+BatchStage = Literal["reading", "generating", "finished"]
+
+STAGE_MESSAGES = {
+    "reading": "Lendo planilha...",
+    "generating": "Processando linha {done}...",
+    "finished": "Geração concluída. {done} PDFs criados.",
+}
+
+class BatchCancelled(Exception):
+    """O lote foi interrompido a pedido do usuário"""
+    def __init__(self, generated_count: int = 0):
+        super().__init__("Geração cancelada pelo usuário.")
+        self.generated_count = generated_count
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    stage: BatchStage
+    done: int
+    total: Optional[int]  # estimativa; None quando desconhecido
+    rate: float  # linhas por segundo desde o início da geração
+    eta: Optional[float]  # segundos restantes (estimativa)
+    message: str
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Fração concluída (0-1), ou None se o total não é conhecido"""
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+class BatchJob:
+    """
+    Um lote em andamento. Passe para batch_generate_pdfs(job=...) e chame
+    cancel() de qualquer thread para interrompê-lo entre duas linhas.
+    Ao final, timing traz o tempo de cada etapa e os contadores do lote
+    (passe TimingReport(enabled=False) para não medir).
+    """
+    def __init__(
+        self,
+        on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+        interval: float = PROGRESS_INTERVAL,
+        timing: Optional[TimingReport] = None
+    ):
+        self.on_progress = on_progress
+        self.interval = interval
+        self.timing = timing if timing is not None else TimingReport()
+        self._cancel_event = threading.Event()
+        self._started_at: Optional[float] = None
+        self._last_emit = 0.0
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self, generated_count: int = 0):
+        """Levanta BatchCancelled se o cancelamento foi pedido"""
+        if self._cancel_event.is_set():
+            raise BatchCancelled(generated_count)
+
+    def report(
+        self,
+        stage: BatchStage,
+        done: int = 0,
+        total: Optional[int] = None,
+        message: Optional[str] = None,
+        force: bool = False
+    ) -> Optional[ProgressEvent]:
+        """
+        Registra o progresso e emite um evento se o intervalo mínimo já passou
+        (mudanças de etapa e force=True são sempre emitidas).
+        Retorna o evento emitido, ou None se foi agrupado com os próximos.
+        """
+        now = time.monotonic()
+        if stage == "generating" and self._started_at is None:
+            self._started_at = now
+            force = True
+        if not force and stage == "generating" and now - self._last_emit < self.interval:
+            return None
+        self._last_emit = now
+
+        elapsed = now - self._started_at if self._started_at is not None else 0.0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if total and rate > 0:
+            eta = max(0.0, (total - done) / rate)
+        if message is None:
+            message = STAGE_MESSAGES[stage].format(done=done)
+            if stage == "generating" and total:
+                message = f"Processando linha {done} de {max(total, done)}..."
+
+        event = ProgressEvent(stage=stage, done=done, total=total, rate=rate, eta=eta, message=message)
+        if self.on_progress:
+            self.on_progress(event)
+        return event
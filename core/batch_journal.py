@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Diário (journal) de um lote de geração: retomada e regeneração incremental.
+
+Cada documento é anexado a um arquivo .jsonl em <pasta de saída>/.lotes duas
+vezes: reservado (linha, nome base e caminho) antes de ser enviado para gerar, e
+concluído (com a chave de conteúdo) quando o PDF fica pronto. Assim um lote
+derrubado no meio, mesmo no modo paralelo, reaproveita na retomada os caminhos
+dos PDFs que estavam sendo gerados, em vez de tratá-los como ocupados. A
+chave combina a impressão digital da renderização (perfil de documento e
+arquivo do template) com os valores já formatados da linha. Ao rodar o mesmo
+lote de novo, seja para retomar uma execução interrompida ou depois de
+pequenas correções na planilha, só as linhas com chave nova são renderizadas;
+as demais mantêm o PDF que já existe. Os PDFs do lote que não correspondem
+mais a nenhuma linha (linha removida ou renomeada) só são apagados a pedido
+(prune_orphans); sem ele, ficam na pasta e deixam de ser acompanhados.
+"""
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from models import DocumentProfile
+
+JOURNAL_DIR_NAME = ".lotes"
+
+# Incrementar quando a renderização mudar, para invalidar os PDFs já gerados
+RENDER_VERSION = 1
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def render_fingerprint(document_profile: DocumentProfile) -> str:
+    """Tudo o que, fora a linha de dados, muda o PDF gerado: perfil, template e versão"""
+    template_hash = _file_hash(document_profile.pdf_path) if os.path.exists(document_profile.pdf_path) else ""
+    return _sha1(json.dumps({
+        "version": RENDER_VERSION,
+        "document_profile": asdict(document_profile),
+        "template": template_hash,
+    }, sort_keys=True, ensure_ascii=False, default=str))
+
+def row_content_key(fingerprint: str, data_row: Dict[str, Any]) -> str:
+    """Chave de conteúdo de uma linha: impressão digital + valores já formatados"""
+    return _sha1(fingerprint + json.dumps(data_row, sort_keys=True, ensure_ascii=False, default=str))
+
+def batch_key(spreadsheet_path: str, document_profile: DocumentProfile) -> str:
+    """Identifica um lote: a mesma planilha gerada com o mesmo perfil de documento"""
+    return _sha1(json.dumps([os.path.abspath(spreadsheet_path), document_profile.name], ensure_ascii=False))[:16]
+
+class BatchJournal:
+    """
+    Registro append-only dos documentos de um lote.
+
+    Ao abrir, o estado da última execução (concluída ou não) é carregado; cada
+    chave aponta para os PDFs com aquele conteúdo. Entradas só reservadas não
+    têm conteúdo conhecido: o caminho volta para a mesma linha, que é gerada de
+    novo. Uma linha truncada no fim do arquivo (queda no meio da escrita) é ignorada.
+    """
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        # linha → última entrada registrada
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        # todos os caminhos já registrados pelo lote, inclusive os substituídos
+        self._known_paths = set()
+        self._load()
+        # Índices do estado carregado: chave → caminhos, nome base → caminhos, caminho → chave
+        self._by_key: Dict[str, List[str]] = {}
+        self._by_stem: Dict[str, Deque[str]] = {}
+        self._key_of: Dict[str, str] = {}
+        for row in sorted(self.entries):
+            entry = self.entries[row]
+            if not entry.get("reserved"):
+                self._by_key.setdefault(entry["key"], []).append(entry["path"])
+            self._by_stem.setdefault(entry["stem"], deque()).append(entry["path"])
+            self._key_of[entry["path"]] = entry["key"]
+        # caminhos já atribuídos a alguma linha nesta execução
+        self._claimed = set()
+        self._file = None
+        self._rows_seen = 0
+
+    @classmethod
+    def for_batch(cls, output_dir: str, spreadsheet_path: str, document_profile: DocumentProfile) -> "BatchJournal":
+        journal_dir = os.path.join(output_dir, JOURNAL_DIR_NAME)
+        os.makedirs(journal_dir, exist_ok=True)
+        return cls(os.path.join(journal_dir, f"{batch_key(spreadsheet_path, document_profile)}.jsonl"))
+
+    def _load(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[int(entry["row"])] = {
+                        "row": int(entry["row"]),
+                        "key": entry["key"],
+                        "stem": entry.get("stem", ""),
+                        "path": entry["path"],
+                    }
+                    if entry.get("reserved"):
+                        self.entries[int(entry["row"])]["reserved"] = True
+                    self._known_paths.add(entry["path"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def paths(self) -> Iterable[str]:
+        """Caminhos já registrados (reservados para que nenhum documento novo os use)"""
+        return (entry["path"] for entry in self.entries.values())
+
+    def claim_existing(self, row: int, key: str, stem: str) -> Optional[str]:
+        """
+        Caminho de um PDF já gerado com a mesma chave (o arquivo precisa existir).
+        A linha passa a apontar para ele, mesmo que antes estivesse em outra posição.
+        """
+        self._rows_seen = max(self._rows_seen, row + 1)
+        paths = self._by_key.get(key)
+        while paths:
+            path = paths.pop(0)
+            if path not in self._claimed and os.path.exists(path):
+                self._write({"row": row, "key": key, "stem": stem, "path": path})
+                return path
+        return None
+
+    def path_to_replace(self, row: int, stem: str) -> Optional[str]:
+        """
+        Caminho a sobrescrever quando a linha mudou: o de um documento anterior com o
+        mesmo nome base (de preferência na mesma posição) ainda não usado nesta
+        execução. Linhas sem correspondente, inclusive as que mudaram de nome,
+        recebem um nome novo.
+        """
+        path = None
+        entry = self.entries.get(row)
+        if entry is not None and entry["stem"] == stem and entry["path"] not in self._claimed:
+            path = entry["path"]
+        else:
+            same_stem = self._by_stem.get(stem)
+            # Os já usados são descartados do início da fila (custo amortizado constante)
+            while same_stem and same_stem[0] in self._claimed:
+                same_stem.popleft()
+            if same_stem:
+                path = same_stem.popleft()
+        if path is None:
+            return None
+        # O conteúdo antigo deixa de valer para qualquer outra linha
+        paths = self._by_key.get(self._key_of.get(path))
+        if paths and path in paths:
+            paths.remove(path)
+        self._claimed.add(path)
+        return path
+
+    def reserve(self, row: int, stem: str, output_path: str):
+        """Registra o caminho de um documento antes de enviá-lo para gerar"""
+        self._rows_seen = max(self._rows_seen, row + 1)
+        self._write({"row": row, "key": "", "stem": stem, "path": output_path, "reserved": True})
+
+    def record(self, row: int, key: str, stem: str, output_path: str):
+        """Registra um documento gerado"""
+        self._rows_seen = max(self._rows_seen, row + 1)
+        self._write({"row": row, "key": key, "stem": stem, "path": output_path})
+
+    def _write(self, entry: Dict[str, Any]):
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.entries[entry["row"]] = entry
+        self._claimed.add(entry["path"])
+        self._known_paths.add(entry["path"])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self, prune_orphans: bool = False) -> List[str]:
+        """
+        Lote concluído: reescreve o diário só com o estado final (uma entrada por
+        linha da planilha), que é a base da próxima regeneração incremental.
+        Com prune_orphans, apaga os PDFs do lote que ficaram sem linha e
+        retorna os caminhos apagados.
+        """
+        self.close()
+        final_paths = set()
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for row in sorted(self.entries):
+                if row < self._rows_seen:
+                    f.write(json.dumps(self.entries[row], ensure_ascii=False) + "\n")
+                    final_paths.add(self.entries[row]["path"])
+        os.replace(temp_path, self.journal_path)
+
+        removed = []
+        orphans = self._known_paths - final_paths if prune_orphans else set()
+        for path in sorted(orphans):
+            try:
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                pass
+        self._known_paths = final_paths
+        return removed
@@ -2,8 +2,9 @@
 from datetime import datetime
 import json
 import os
-from typing import List, TypeVar, Type, Dict, Any
+from typing import List, Optional, TypeVar, Type, Dict, Any
 from models import SpreadsheetProfile, DocumentProfile, ColumnMapping, PdfFieldMapping, TextStyle
+from core.raster_cache import RasterCache
 
 T = TypeVar('T', SpreadsheetProfile, DocumentProfile)
 
@@ -22,6 +23,8 @@ class DataManager:
         self.templates_dir = os.path.join(base_dir, "templates")
         self.license_file = os.path.join(base_dir, "license.json")
         self.logo_file = os.path.join(base_dir, "company_logo.png")
+        # Páginas de templates já rasterizadas (geração e prévia do editor)
+        self.raster_cache = RasterCache(os.path.join(base_dir, "cache", "raster"))
         
         # Garante que todos os diretórios existam
         os.makedirs(self.base_dir, exist_ok=True)
@@ -73,8 +76,20 @@ class DataManager:
             return DocumentProfile.from_dict(data)
         raise ValueError("Invalid profile type")
 
+    def get_profile_path(self, profile_type: Type[T], name: str) -> str:
+        """Arquivo .json onde o perfil é salvo"""
+        return self._get_file_path(profile_type, name).replace(" ", "_")
+
+    def load_profile(self, profile_type: Type[T], name: str) -> Optional[T]:
+        """Carrega um único perfil pelo nome (None se não existir)"""
+        file_path = self.get_profile_path(profile_type, name)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return self._from_dict(json.load(f), profile_type)
+
     def save_profile(self, profile: T):
-        file_path = self._get_file_path(type(profile), profile.name).replace(" ", "_")
+        file_path = self.get_profile_path(type(profile), profile.name)
         
         if isinstance(profile, DocumentProfile):
             # Copy PDF to local templates directory if it's not already there
@@ -83,6 +98,8 @@ class DataManager:
                 pdf_filename = os.path.basename(profile.pdf_path)
                 # Ensure unique filename to avoid collisions
                 local_pdf_path = os.path.join(self.templates_dir, f"{profile.name}_{pdf_filename}")
+                # O template anterior com o mesmo nome deixa de valer no cache
+                self.raster_cache.invalidate(local_pdf_path)
                 shutil.copy(profile.pdf_path, local_pdf_path)
                 profile.pdf_path = local_pdf_path
 
@@ -110,10 +127,11 @@ class DataManager:
         return profiles
 
     def delete_profile(self, profile: T):
-        file_path = self._get_file_path(type(profile), profile.name).replace(" ", "_")
+        file_path = self.get_profile_path(type(profile), profile.name)
         try:
             os.remove(file_path)
             if isinstance(profile, DocumentProfile):
+                self.raster_cache.invalidate(profile.pdf_path)
                 os.remove(profile.pdf_path)
         except Exception as e:
             print(f"Error deleting profile {file_path}: {e}")
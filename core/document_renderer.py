@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Geração de um documento avulso ("gerar esta linha agora"), com baixa latência.
+
+O DocumentRenderer abre o template, monta os fundos e compila o plano uma única
+vez; cada chamada só formata a linha, desenha a camada de texto e grava o PDF
+(em memória ou em um arquivo aberto pelo chamador). get_renderer mantém os
+renderizadores dos perfis usados recentemente, refeitos quando o perfil ou o
+arquivo do template muda.
+"""
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from models import DocumentProfile, SpreadsheetProfile
+from core.output_names import FilenamePattern
+from core.pdf_generator import generate_document, output_stem
+from core.raster_cache import RasterCache
+from core.render_plan import FIELD_FORMATTERS, compile_render_plan, format_text_field
+from core.template_context import TemplateContext
+
+# Perfis mantidos abertos por get_renderer (os menos usados são fechados)
+MAX_RENDERERS = 8
+
+# O PyMuPDF não pode ser usado por duas threads ao mesmo tempo
+_render_lock = threading.Lock()
+
+class DocumentRenderer:
+    """Um perfil de documento pronto para gerar: template aberto e plano compilado"""
+    def __init__(
+        self,
+        document_profile: DocumentProfile,
+        spreadsheet_profile: SpreadsheetProfile,
+        raster_cache: Optional[RasterCache] = None
+    ):
+        self.document_profile = document_profile
+        self.spreadsheet_profile = spreadsheet_profile
+        self.template = TemplateContext(document_profile, raster_cache)
+        self.plan = compile_render_plan(document_profile, spreadsheet_profile, preformatted=True)
+        self.pattern = FilenamePattern(document_profile.filename_pattern) if document_profile.filename_pattern else None
+        # Tipo de cada coluna (o primeiro nome personalizado encontrado vence, como nos lotes)
+        self.column_types: Dict[str, str] = {}
+        for column in spreadsheet_profile.columns:
+            self.column_types.setdefault(column.custom_name, column.column_type)
+        # Os fundos são montados agora, e não no primeiro documento
+        self.template.page_source()
+
+    def format_row(self, values: Dict[str, Any]) -> Dict[str, str]:
+        """Valores brutos (por nome de coluna) com a mesma formatação por tipo usada nos lotes"""
+        return {
+            name: FIELD_FORMATTERS.get(column_type, format_text_field)(values.get(name, ""))
+            for name, column_type in self.column_types.items()
+        }
+
+    def _title(self, values: Dict[str, Any]) -> str:
+        title_column = self.document_profile.title_column
+        return str(values.get(title_column, "")) if title_column else "Documento"
+
+    def output_name(self, values: Dict[str, Any]) -> str:
+        """Nome do arquivo do documento, como no lote (padrão do perfil ou "<título>_<perfil>")"""
+        return output_stem(values, self.document_profile, self.pattern) + ".pdf"
+
+    def render(self, values: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """
+        Gera o documento de uma linha. Sem output retorna os bytes do PDF; com
+        output (arquivo aberto em modo binário) grava nele e retorna None.
+        """
+        data_row = self.format_row(values)
+        target = io.BytesIO() if output is None else output
+        with _render_lock:
+            generate_document(self.template, self.plan, data_row, target, self._title(values))
+        return target.getvalue() if output is None else None
+
+    def close(self):
+        with _render_lock:
+            self.template.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _template_version(pdf_path: str) -> Tuple[int, int]:
+    try:
+        stat = os.stat(pdf_path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+_renderers: "OrderedDict[tuple, DocumentRenderer]" = OrderedDict()
+_renderers_lock = threading.Lock()
+
+def get_renderer(document_profile: DocumentProfile, spreadsheet_profile: SpreadsheetProfile) -> DocumentRenderer:
+    """
+    Renderizador já aquecido para o par de perfis. A chave inclui o conteúdo dos
+    perfis e a versão do template, então perfis editados geram um novo.
+    """
+    key = (
+        json.dumps(asdict(document_profile), sort_keys=True, default=str),
+        json.dumps(asdict(spreadsheet_profile), sort_keys=True, default=str),
+        _template_version(document_profile.pdf_path),
+    )
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is not None:
+            _renderers.move_to_end(key)
+            return renderer
+        renderer = DocumentRenderer(document_profile, spreadsheet_profile)
+        _renderers[key] = renderer
+        while len(_renderers) > MAX_RENDERERS:
+            _, oldest = _renderers.popitem(last=False)
+            oldest.close()
+        return renderer
+
+def clear_renderers():
+    """Fecha todos os renderizadores mantidos por get_renderer"""
+    with _renderers_lock:
+        while _renderers:
+            _, renderer = _renderers.popitem()
+            renderer.close()
+
+def render_document(
+    values: Dict[str, Any],
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    output: Optional[BinaryIO] = None
+) -> Optional[bytes]:
+    """Gera um documento avulso reaproveitando template e plano (ver DocumentRenderer.render)"""
+    return get_renderer(document_profile, spreadsheet_profile).render(values, output)
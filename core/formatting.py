@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Formatação vetorizada das colunas da planilha.
+
+Produz, antes do loop de renderização, o texto final de cada campo para
+todas as linhas de uma vez, com operações de string/data do pandas. O
+resultado é idêntico ao dos formatadores por célula de core.render_plan,
+que continuam sendo usados na geração de um único documento.
+"""
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from models import SpreadsheetProfile
+from core.render_plan import FIELD_FORMATTERS
+
+def resolve_column_positions(columns: Sequence[Any], spreadsheet_profile: SpreadsheetProfile) -> Dict[str, int]:
+    """
+    Posição da coluna bruta para cada nome personalizado do perfil.
+    Procura pelo cabeçalho original e, se não existir, usa o índice salvo no perfil.
+    Resolvido uma vez por planilha: os blocos de uma mesma leitura têm as mesmas colunas.
+    """
+    header_positions = {header: position for position, header in enumerate(columns)}
+    return {
+        column.custom_name: header_positions.get(column.original_header, column.index)
+        for column in spreadsheet_profile.columns
+    }
+
+def resolve_source_columns(
+    df: pd.DataFrame,
+    spreadsheet_profile: SpreadsheetProfile,
+    positions: Optional[Dict[str, int]] = None
+) -> Dict[str, pd.Series]:
+    """Coluna bruta da planilha para cada nome personalizado do perfil"""
+    if positions is None:
+        positions = resolve_column_positions(df.columns, spreadsheet_profile)
+    return {name: df.iloc[:, position] for name, position in positions.items()}
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Equivalente a str(valor) em cada célula"""
+    return series.map(str).astype(object)
+
+def _finalize(text: pd.Series) -> pd.Series:
+    empty = text.eq("") | text.str.lower().eq("nan")
+    return text.mask(empty, "")
+
+def _apply_by_unique(series: pd.Series, formatter: Callable[[object], str]) -> pd.Series:
+    """Aplica o formatador por célula uma vez por valor distinto"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    formatted = np.array([formatter(value) for value in uniques], dtype=object)
+    return pd.Series(formatted[codes], index=series.index, dtype=object)
+
+def format_cpf_column(text: pd.Series) -> pd.Series:
+    digits = text.str.replace(r'\D', '', regex=True)
+    mask = digits.str.len() == 11
+    result = text.copy()
+    if mask.any():
+        result[mask] = digits[mask].str.replace(r'^(\d{3})(\d{3})(\d{3})(\d{2})$', r'\1.\2.\3-\4', regex=True)
+    return _finalize(result)
+
+def format_cnpj_column(text: pd.Series) -> pd.Series:
+    digits = text.str.replace(r'\D', '', regex=True)
+    mask = digits.str.len() == 14
+    result = text.copy()
+    if mask.any():
+        result[mask] = digits[mask].str.replace(r'^(\d{2})(\d{3})(\d{3})(\d{4})(\d{2})$', r'\1.\2.\3/\4-\5', regex=True)
+    return _finalize(result)
+
+def format_phone_column(text: pd.Series) -> pd.Series:
+    digits = text.str.replace(r'\D', '', regex=True)
+    digit_count = digits.str.len()
+    result = text.copy()
+    # (99) 99999-9999 → 11 dígitos
+    mobile = digit_count == 11
+    if mobile.any():
+        result[mobile] = digits[mobile].str.replace(r'^(\d{2})(\d{5})(\d{4})$', r'(\1) \2-\3', regex=True)
+    # (99) 9999-9999 → 10 dígitos
+    landline = digit_count == 10
+    if landline.any():
+        result[landline] = digits[landline].str.replace(r'^(\d{2})(\d{4})(\d{4})$', r'(\1) \2-\3', regex=True)
+    return _finalize(result)
+
+def format_monetary_column(text: pd.Series) -> pd.Series:
+    stripped = text.str.replace('$', '', regex=False).str.replace('R$', '', regex=False).str.strip()
+    numbers = pd.to_numeric(stripped, errors="coerce")
+    parsed = numbers.notna()
+    result = pd.Series(np.empty(len(text), dtype=object), index=text.index)
+    if parsed.any():
+        values = numbers[parsed].to_numpy(dtype=float)
+        result[parsed] = np.char.replace(np.char.mod("R$ %.2f", values), '.', ',')
+    # Células vazias ou não numéricas seguem o formatador por célula
+    if (~parsed).any():
+        result[~parsed] = _apply_by_unique(text[~parsed], FIELD_FORMATTERS["monetario"])
+    return result
+
+def _format_date_column(series: pd.Series, column_type: str) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Coluna de datas já tipada: formata tudo de uma vez (NaT vira vazio)
+        pattern = "%d/%m/%Y" if column_type == "data" else "%d/%m/%Y às %H:%M"
+        return series.dt.strftime(pattern).astype(object).where(series.notna(), "")
+    # Datas em texto/misturadas: o parser roda uma vez por valor distinto
+    return _apply_by_unique(series, FIELD_FORMATTERS[column_type])
+
+def format_column(series: pd.Series, column_type: str) -> pd.Series:
+    """Texto final de uma coluna inteira, conforme o tipo definido no perfil"""
+    if column_type in ("data", "data e hora"):
+        return _format_date_column(series, column_type)
+
+    text = _as_text(series)
+    match column_type:
+        case "monetario":
+            return format_monetary_column(text)
+        case "cpf":
+            return format_cpf_column(text)
+        case "cnpj":
+            return format_cnpj_column(text)
+        case "telefone":
+            return format_phone_column(text)
+        case _:
+            return _finalize(text)
+
+def format_columns(
+    df: pd.DataFrame,
+    spreadsheet_profile: SpreadsheetProfile,
+    positions: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    DataFrame com uma coluna de texto já formatado por nome personalizado.
+    O tipo de cada nome é o da primeira coluna que o define (como no RenderPlan).
+    """
+    column_types: Dict[str, str] = {}
+    for column in spreadsheet_profile.columns:
+        column_types.setdefault(column.custom_name, column.column_type)
+
+    sources = resolve_source_columns(df, spreadsheet_profile, positions)
+    formatted = {
+        name: format_column(series, column_types[name]).reset_index(drop=True)
+        for name, series in sources.items()
+    }
+    return pd.DataFrame(formatted, index=pd.RangeIndex(len(df)), dtype=object)
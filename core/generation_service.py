@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço local de geração: mantém perfis, planos de renderização e templates
+carregados em memória e atende pedidos de documentos avulsos e de lotes.
+
+Os documentos avulsos são gerados por um pool de processos já aquecido (cada
+processo carrega os perfis e abre os templates uma única vez e só os recarrega
+quando o arquivo do perfil ou do template muda). O número de pedidos em
+andamento é limitado: com o pool e a fila cheios o pedido é recusado na hora
+(ServiceBusy), em vez de esperar indefinidamente; um documento que passa de
+RENDER_TIMEOUT segundos é abandonado (RenderTimeout), mas sua vaga só volta a
+ficar livre quando o processo termina. Os lotes rodam um de cada vez, em
+segundo plano, com o mesmo motor de batch_generate_pdfs: não usam os perfis
+aquecidos (que vivem nos processos do pool), e sim abrem o template e compilam
+o plano uma vez no início de cada lote.
+"""
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from models import DocumentProfile, SpreadsheetProfile
+from core.batch_job import BatchJob, BatchCancelled, ProgressEvent
+from core.document_renderer import DocumentRenderer
+from core.parallel import default_worker_count
+
+# Pedidos além dos que estão sendo gerados que podem aguardar na fila, por processo
+QUEUE_PER_WORKER = 2
+
+# Tempo máximo (s) de geração de um documento avulso
+RENDER_TIMEOUT = 60
+
+class ServiceBusy(Exception):
+    """O pool e a fila estão cheios (ou já há um lote em andamento)"""
+
+class RenderTimeout(Exception):
+    """O documento não ficou pronto dentro do tempo máximo"""
+
+class ProfileNotFound(Exception):
+    pass
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+class WarmProfile(DocumentRenderer):
+    """DocumentRenderer de um perfil salvo, com as versões dos arquivos de que foi montado"""
+    def __init__(self, document_profile: DocumentProfile, spreadsheet_profile: SpreadsheetProfile, versions: Tuple[int, ...]):
+        super().__init__(document_profile, spreadsheet_profile)
+        self.versions = versions
+
+class ProfileStore:
+    """
+    Perfis aquecidos de um processo. A cada pedido só os arquivos do perfil
+    e do template são consultados (stat); se mudaram, o perfil é recarregado.
+    """
+    def __init__(self, data_manager=None):
+        if data_manager is None:
+            from core.data_manager import data_manager
+        self.data_manager = data_manager
+        self._profiles: Dict[str, WarmProfile] = {}
+
+    def _versions(self, document_profile: DocumentProfile) -> Tuple[int, ...]:
+        return (
+            _mtime(self.data_manager.get_profile_path(DocumentProfile, document_profile.name)),
+            _mtime(self.data_manager.get_profile_path(SpreadsheetProfile, document_profile.spreadsheet_profile_name)),
+            _mtime(document_profile.pdf_path),
+        )
+
+    def get(self, name: str) -> WarmProfile:
+        warm = self._profiles.get(name)
+        if warm is not None and self._versions(warm.document_profile) == warm.versions:
+            return warm
+
+        document_profile = self.data_manager.load_profile(DocumentProfile, name)
+        if document_profile is None:
+            raise ProfileNotFound(f"Perfil de documento não encontrado: {name}")
+        spreadsheet_profile = self.data_manager.load_profile(SpreadsheetProfile, document_profile.spreadsheet_profile_name)
+        if spreadsheet_profile is None:
+            raise ProfileNotFound(f"Perfil de planilha não encontrado: {document_profile.spreadsheet_profile_name}")
+
+        if warm is not None:
+            warm.close()
+        warm = WarmProfile(document_profile, spreadsheet_profile, self._versions(document_profile))
+        self._profiles[name] = warm
+        return warm
+
+    def preload(self):
+        """Aquece todos os perfis de documento salvos (perfis com erro são ignorados)"""
+        for document_profile in self.data_manager.load_profiles(DocumentProfile):
+            try:
+                self.get(document_profile.name)
+            except Exception as e:
+                print(f"Perfil {document_profile.name} não pôde ser carregado: {e}")
+
+def render_row(warm: WarmProfile, values: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Gera um documento a partir dos valores brutos de uma linha (por nome de coluna)"""
+    return warm.output_name(values), warm.render(values)
+
+# Estado de cada processo do pool do serviço
+_store: Optional[ProfileStore] = None
+
+def _init_service_worker(preload: bool):
+    global _store
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _store = ProfileStore()
+    if preload:
+        _store.preload()
+
+def _render_in_worker(profile_name: str, values: Dict[str, Any]) -> Tuple[str, bytes]:
+    return render_row(_store.get(profile_name), values)
+
+def _ping() -> int:
+    return os.getpid()
+
+@dataclass
+class BatchStatus:
+    id: str
+    profile_name: str
+    spreadsheet_path: str
+    state: str = "running"  # running, finished, cancelled, error
+    event: Optional[ProgressEvent] = None
+    generated: int = 0
+    error: str = ""
+    job: BatchJob = field(default_factory=BatchJob, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'perfil': self.profile_name,
+            'planilha': self.spreadsheet_path,
+            'estado': self.state,
+            'gerados': self.generated,
+        }
+        if self.event is not None:
+            data.update({
+                'etapa': self.event.stage,
+                'concluidos': self.event.done,
+                'total': self.event.total,
+                'linhas_por_segundo': round(self.event.rate, 2),
+                'restante_s': round(self.event.eta, 1) if self.event.eta is not None else None,
+                'mensagem': self.event.message,
+            })
+        if self.state == "finished":
+            data['tempos'] = self.job.timing.to_dict()
+        if self.error:
+            data['erro'] = self.error
+        return data
+
+class GenerationService:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        preload: bool = True,
+        render_timeout: float = RENDER_TIMEOUT
+    ):
+        self.workers = max(1, workers or default_worker_count())
+        if queue_size is None:
+            queue_size = self.workers * QUEUE_PER_WORKER
+        self.capacity = self.workers + queue_size
+        self.preload = preload
+        self.render_timeout = render_timeout
+        # Vagas de pedidos em andamento (gerando + na fila)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._pool = self._start_pool()
+        self._batches: Dict[str, BatchStatus] = {}
+        self._batch_thread: Optional[threading.Thread] = None
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_service_worker,
+            initargs=(self.preload,)
+        )
+        # Sobe todos os processos agora (imports e perfis), e não no primeiro pedido
+        for future in [pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _release_slot(self, _future: Optional[Future] = None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def render_document(self, profile_name: str, values: Dict[str, Any]) -> Tuple[str, bytes]:
+        """
+        Gera um documento avulso; levanta ServiceBusy se não houver vaga e
+        RenderTimeout se o documento não ficar pronto em render_timeout segundos.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy("Serviço ocupado: tente novamente em instantes.")
+        with self._lock:
+            self._in_flight += 1
+        future = None
+        try:
+            try:
+                future = self._pool.submit(_render_in_worker, profile_name, values)
+                return future.result(self.render_timeout)
+            except BrokenProcessPool:
+                # Um processo do pool morreu: o pool é recriado e o pedido refeito uma vez
+                with self._lock:
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = self._start_pool()
+                future = self._pool.submit(_render_in_worker, profile_name, values)
+                return future.result(self.render_timeout)
+        except FutureTimeout:
+            raise RenderTimeout(f"O documento não ficou pronto em {self.render_timeout:g} s.")
+        finally:
+            # A vaga só é devolvida quando o processo termina o documento, mesmo
+            # que o pedido tenha desistido de esperar
+            if future is None:
+                self._release_slot()
+            else:
+                future.add_done_callback(self._release_slot)
+
+    def start_batch(
+        self,
+        profile_name: str,
+        spreadsheet_path: str,
+        base_date: Optional[datetime] = None,
+        output_dir: Optional[str] = None,
+        **batch_kwargs
+    ) -> BatchStatus:
+        """Inicia um lote em segundo plano; levanta ServiceBusy se já houver um em andamento"""
+        from core.data_manager import data_manager
+        from core.pdf_generator import batch_generate_pdfs
+
+        with self._lock:
+            if self._batch_thread is not None and self._batch_thread.is_alive():
+                raise ServiceBusy("Já há um lote em andamento.")
+            document_profile = data_manager.load_profile(DocumentProfile, profile_name)
+            if document_profile is None:
+                raise ProfileNotFound(f"Perfil de documento não encontrado: {profile_name}")
+            spreadsheet_profile = data_manager.load_profile(SpreadsheetProfile, document_profile.spreadsheet_profile_name)
+            if spreadsheet_profile is None:
+                raise ProfileNotFound(f"Perfil de planilha não encontrado: {document_profile.spreadsheet_profile_name}")
+            if not os.path.isfile(spreadsheet_path):
+                raise FileNotFoundError(f"Planilha não encontrada: {spreadsheet_path}")
+
+            status = BatchStatus(id=uuid.uuid4().hex[:12], profile_name=profile_name, spreadsheet_path=spreadsheet_path)
+
+            def on_progress(event: ProgressEvent):
+                status.event = event
+            status.job.on_progress = on_progress
+
+            def run():
+                try:
+                    status.generated = batch_generate_pdfs(
+                        spreadsheet_path, document_profile, spreadsheet_profile,
+                        status_callback=None,
+                        base_date=base_date or datetime.now(),
+                        job=status.job,
+                        output_dir=output_dir,
+                        **batch_kwargs
+                    )
+                    status.state = "finished"
+                except BatchCancelled as e:
+                    status.generated = e.generated_count
+                    status.state = "cancelled"
+                except Exception as e:
+                    status.error = str(e)
+                    status.state = "error"
+
+            self._batches[status.id] = status
+            self._batch_thread = threading.Thread(target=run, daemon=True)
+            self._batch_thread.start()
+            return status
+
+    def batch_status(self, batch_id: str) -> Optional[BatchStatus]:
+        return self._batches.get(batch_id)
+
+    def cancel_batch(self, batch_id: str) -> Optional[BatchStatus]:
+        status = self._batches.get(batch_id)
+        if status is not None:
+            status.job.cancel()
+        return status
+
+    def close(self):
+        for status in self._batches.values():
+            status.job.cancel()
+        if self._batch_thread is not None:
+            self._batch_thread.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
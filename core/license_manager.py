@@ -1,6 +1,5 @@
 from pathlib import Path
 import sys
-import requests
 import platform
 import subprocess
 import uuid
@@ -8,10 +7,11 @@ from datetime import datetime
 from typing import Optional
 from core.data_manager import data_manager
 from models import LicenseInfo
-from dotenv import load_dotenv
 import os
+from functools import lru_cache
 
 def load_env():
+    from dotenv import load_dotenv
     if getattr(sys, 'frozen', False):
         # No modo --onedir, o .env fica na raiz da pasta do executável, 
         # que é o diretório do sys.executable
@@ -27,11 +27,18 @@ def load_env():
         
     load_dotenv(env_path)
 
-load_env()
-
-ACTIVATE_API_URL = os.getenv("PDF_GENERATOR_ACTIVATE_API_URL")
-VALIDATE_API_URL = os.getenv("PDF_GENERATOR_VALIDATE_API_URL")
-API_KEY = os.getenv("PDF_GENERATOR_ACTIVATE_API_KEY")
+@lru_cache(maxsize=None)
+def api_settings():
+    """
+    (URL de ativação, URL de validação, chave da API). O .env só é lido na
+    primeira chamada à API, e não na abertura do aplicativo.
+    """
+    load_env()
+    return (
+        os.getenv("PDF_GENERATOR_ACTIVATE_API_URL"),
+        os.getenv("PDF_GENERATOR_VALIDATE_API_URL"),
+        os.getenv("PDF_GENERATOR_ACTIVATE_API_KEY")
+    )
 
 class LicenseManager:
     DEVICE_TYPE = "windows" # Fixed for this Python desktop application
@@ -90,6 +97,8 @@ class LicenseManager:
         return self._license_info
 
     def activate_license(self, code: str) -> str:
+        import requests
+        activate_url, _, api_key = api_settings()
         device_id = self._get_device_id()
         payload = {
             "code": code.strip().upper(),
@@ -100,9 +109,9 @@ class LicenseManager:
         try:
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {API_KEY}",
+                "Authorization": f"Bearer {api_key}",
             }
-            response = requests.post(ACTIVATE_API_URL, json=payload, headers=headers, timeout=10)
+            response = requests.post(activate_url, json=payload, headers=headers, timeout=10)
             response.raise_for_status()
             
             response_data = response.json()
@@ -137,6 +146,8 @@ class LicenseManager:
             return f"Erro inesperado durante a ativação: {e}"
 
     def check_internet(self) -> bool:
+        # requests é importado só aqui e nas chamadas à API: é lento de carregar
+        import requests
         try:
             requests.get("https://www.google.com", timeout=5)
             return True
@@ -165,6 +176,8 @@ class LicenseManager:
         if not self.check_internet():
             return self.is_licensed # Fallback to local check if no internet
 
+        import requests
+        _, validate_url, api_key = api_settings()
         try:
             payload = {
                 "code": self._license_info.code,
@@ -172,10 +185,10 @@ class LicenseManager:
             }
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {API_KEY}",
+                "Authorization": f"Bearer {api_key}",
             }
             
-            response = requests.post(VALIDATE_API_URL, json=payload, headers=headers, timeout=10)
+            response = requests.post(validate_url, json=payload, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 response_data = response.json()
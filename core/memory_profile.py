@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Modo de perfil de memória para lotes grandes (opcional: deixa o lote mais lento).
+
+Enquanto o lote roda, o tracemalloc rastreia as alocações do Python e, a cada
+sample_rows linhas, são guardados o RSS do processo e a memória rastreada. Cada
+etapa do relatório de tempos (core.timing_report) registra o pico de memória
+rastreada e o RSS ao terminar. No final, os locais que mais alocam e os que
+mais cresceram desde o início do lote são listados, e um aviso é emitido se a
+memória cresce a cada linha (ex.: imagens mantidas de uma linha para outra).
+
+A diferença entre o RSS e a memória rastreada é memória nativa, que o
+tracemalloc não enxerga (PyMuPDF, pixmaps do Pillow, buffers do ReportLab).
+"""
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Linhas entre duas amostras de memória
+DEFAULT_SAMPLE_ROWS = 100
+
+# Crescimento por linha a partir do qual o lote é considerado com vazamento
+LEAK_BYTES_PER_ROW = 4096
+
+# Amostras (depois da primeira) e linhas necessárias para avaliar o crescimento
+LEAK_MIN_SAMPLES = 3
+LEAK_MIN_ROWS = 200
+
+# O RSS oscila com o alocador: abaixo disso o crescimento não é considerado vazamento
+LEAK_MIN_RSS_GROWTH = 16 * 2**20
+
+# Locais de alocação listados no relatório
+TOP_SITES = 10
+
+def _windows_working_set() -> int:
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return 0
+    return counters.WorkingSetSize
+
+def current_rss() -> int:
+    """
+    RSS atual do processo em bytes (no Windows, o working set). Sem /proc nem
+    API do Windows, o pico desde o início; 0 se nada disso estiver disponível.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        try:
+            return _windows_working_set()
+        except (OSError, AttributeError):
+            return 0
+    try:
+        # Só existe em sistemas POSIX
+        import resource
+    except ImportError:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+def _mb(value: float) -> str:
+    return f"{value / 2**20:.1f} MB"
+
+@dataclass
+class MemorySample:
+    rows: int
+    rss: int
+    traced: int  # memória do Python rastreada no momento
+    traced_peak: int  # pico rastreado desde a amostra (ou etapa) anterior
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'rows': self.rows, 'rss': self.rss, 'traced': self.traced, 'traced_peak': self.traced_peak}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data.get('rows', 0), data.get('rss', 0), data.get('traced', 0), data.get('traced_peak', 0))
+
+@dataclass
+class StageMemory:
+    traced_peak: int = 0  # maior pico rastreado durante a etapa
+    traced_growth: int = 0  # maior alocação líquida de uma execução da etapa
+    rss_peak: int = 0  # maior RSS ao final da etapa
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'traced_peak': self.traced_peak, 'traced_growth': self.traced_growth, 'rss_peak': self.rss_peak}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data.get('traced_peak', 0), data.get('traced_growth', 0), data.get('rss_peak', 0))
+
+@dataclass
+class AllocationSite:
+    location: str  # arquivo:linha
+    size: int
+    count: int
+    size_diff: int = 0  # crescimento desde a primeira amostra
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'location': self.location, 'size': self.size, 'count': self.count, 'size_diff': self.size_diff}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data.get('location', ''), data.get('size', 0), data.get('count', 0), data.get('size_diff', 0))
+
+def _slope(points: List[tuple]) -> float:
+    """Inclinação (mínimos quadrados) de y em função de x"""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+def _site(stat) -> AllocationSite:
+    frame = stat.traceback[0]
+    return AllocationSite(
+        location=f"{frame.filename}:{frame.lineno}",
+        size=stat.size,
+        count=stat.count,
+        size_diff=getattr(stat, "size_diff", 0)
+    )
+
+@dataclass
+class MemoryProfile:
+    """
+    Amostras de memória de um lote. Passe em TimingReport(memory=MemoryProfile())
+    para o lote ser medido (o lote então roda no processo atual).
+    """
+    sample_rows: int = DEFAULT_SAMPLE_ROWS
+    frames: int = 1  # profundidade do rastreamento de cada alocação
+    samples: List[MemorySample] = field(default_factory=list)
+    stages: Dict[str, StageMemory] = field(default_factory=dict)
+    top_sites: List[AllocationSite] = field(default_factory=list)
+    growth_sites: List[AllocationSite] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    rss_start: int = 0
+    rss_end: int = 0
+    traced_peak: int = 0
+
+    def __post_init__(self):
+        self._owns_tracing = False
+        self._baseline = None
+        self._last_sample_rows = 0
+        self._rows = 0
+        self._stage_start = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracing = True
+        tracemalloc.reset_peak()
+        self.rss_start = current_rss()
+        self.sample(0, force=True)
+
+    def enter_stage(self, name: str):
+        self._stage_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def exit_stage(self, name: str):
+        traced, peak = tracemalloc.get_traced_memory()
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageMemory()
+        stage.traced_peak = max(stage.traced_peak, peak)
+        stage.traced_growth = max(stage.traced_growth, traced - self._stage_start)
+        stage.rss_peak = max(stage.rss_peak, current_rss())
+        self.traced_peak = max(self.traced_peak, peak)
+
+    def sample(self, rows: int, force: bool = False):
+        """Guarda uma amostra se já passaram sample_rows linhas desde a anterior"""
+        self._rows = rows
+        if not force and rows - self._last_sample_rows < self.sample_rows:
+            return
+        self._last_sample_rows = rows
+        traced, peak = tracemalloc.get_traced_memory()
+        self.traced_peak = max(self.traced_peak, peak)
+        self.samples.append(MemorySample(rows, current_rss(), traced, peak))
+        if self._baseline is None and rows > 0:
+            # Primeira amostra depois do aquecimento (template aberto, primeiro bloco lido)
+            self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        """Última amostra, locais de alocação e verificação de vazamento"""
+        if self._last_sample_rows != self._rows or len(self.samples) < 2:
+            self.sample(self._rows, force=True)
+        self.rss_end = current_rss()
+        snapshot = tracemalloc.take_snapshot()
+        self.top_sites = [_site(stat) for stat in snapshot.statistics("lineno")[:TOP_SITES]]
+        if self._baseline is not None:
+            growth = [stat for stat in snapshot.compare_to(self._baseline, "lineno") if stat.size_diff > 0]
+            self.growth_sites = [_site(stat) for stat in growth[:TOP_SITES]]
+        self._baseline = None
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        self._check_growth()
+
+    def _check_growth(self):
+        # A amostra da linha 0 fica de fora: inclui abrir o template e ler o primeiro bloco
+        samples = [sample for sample in self.samples if sample.rows > 0]
+        if len(samples) < LEAK_MIN_SAMPLES or samples[-1].rows - samples[0].rows < LEAK_MIN_ROWS:
+            return
+        traced_per_row = _slope([(sample.rows, sample.traced) for sample in samples])
+        rss_per_row = _slope([(sample.rows, sample.rss) for sample in samples])
+        if traced_per_row > LEAK_BYTES_PER_ROW:
+            site = f" Local que mais cresceu: {self.growth_sites[0].location}." if self.growth_sites else ""
+            self.warnings.append(
+                f"A memória do Python cresce ~{traced_per_row / 1024:.1f} KB por linha: "
+                f"algo está sendo mantido de uma linha para outra.{site}"
+            )
+        elif rss_per_row > LEAK_BYTES_PER_ROW and samples[-1].rss - samples[0].rss > LEAK_MIN_RSS_GROWTH:
+            self.warnings.append(
+                f"O RSS cresce ~{rss_per_row / 1024:.1f} KB por linha sem crescer a memória do Python: "
+                f"provável acúmulo de memória nativa (documentos do PyMuPDF, imagens do Pillow)."
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'sample_rows': self.sample_rows,
+            'rss_start': self.rss_start,
+            'rss_end': self.rss_end,
+            'traced_peak': self.traced_peak,
+            'stages': {name: stage.to_dict() for name, stage in self.stages.items()},
+            'samples': [sample.to_dict() for sample in self.samples],
+            'top_sites': [site.to_dict() for site in self.top_sites],
+            'growth_sites': [site.to_dict() for site in self.growth_sites],
+            'warnings': list(self.warnings),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            sample_rows=data.get('sample_rows', DEFAULT_SAMPLE_ROWS),
+            samples=[MemorySample.from_dict(sample) for sample in data.get('samples', [])],
+            stages={name: StageMemory.from_dict(stage) for name, stage in data.get('stages', {}).items()},
+            top_sites=[AllocationSite.from_dict(site) for site in data.get('top_sites', [])],
+            growth_sites=[AllocationSite.from_dict(site) for site in data.get('growth_sites', [])],
+            warnings=list(data.get('warnings', [])),
+            rss_start=data.get('rss_start', 0),
+            rss_end=data.get('rss_end', 0),
+            traced_peak=data.get('traced_peak', 0),
+        )
+
+    def summary_lines(self, stage_labels: Optional[Dict[str, str]] = None) -> List[str]:
+        lines = [
+            f"Memória: RSS {_mb(self.rss_start)} → {_mb(self.rss_end)}, "
+            f"pico do Python {_mb(self.traced_peak)}"
+        ]
+        for name, stage in sorted(self.stages.items(), key=lambda item: item[1].traced_peak, reverse=True):
+            label = (stage_labels or {}).get(name, name)
+            lines.append(f"  {label}: pico {_mb(stage.traced_peak)}, RSS {_mb(stage.rss_peak)}")
+        if self.top_sites:
+            top = self.top_sites[0]
+            lines.append(f"  Maior alocação: {top.location} ({_mb(top.size)})")
+        lines.extend(f"Aviso: {warning}" for warning in self.warnings)
+        return lines
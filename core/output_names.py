@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Nomes dos arquivos gerados em lote.
+
+Os nomes livres são alocados em memória: a pasta de saída é lida uma única vez
+no início do lote e cada nome tem um contador próprio, então nomes repetidos
+(ex.: título vazio em todas as linhas) não custam uma consulta ao disco cada.
+"""
+import os
+import string
+from datetime import datetime, time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+def safe_filename(text: str) -> str:
+    """Mantém só letras, números, espaço, _ e - (sem espaços no fim)"""
+    return "".join(c for c in text if c.isalnum() or c in (' ', '_', '-')).rstrip()
+
+def name_text(value: Any) -> str:
+    """Texto de um valor bruto da planilha no nome do arquivo (vazio, número inteiro sem ".0", data sem hora)"""
+    text = "" if value is None else str(value)
+    # Células vazias chegam como NaN/NaT/NA
+    if text.lower() in ("nan", "nat", "<na>"):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime) and value.time() == time():
+        return value.date().isoformat()
+    return text
+
+class FilenamePattern:
+    """
+    Padrão de nome de arquivo com colunas entre chaves, ex.: "{Nome}_{CPF}".
+    Compilado uma vez por lote. Os valores usados são os brutos da planilha, como
+    no título: os formatados perderiam só parte da pontuação ("123456789-01").
+    """
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        parts = []
+        try:
+            for literal, field_name, format_spec, conversion in string.Formatter().parse(pattern):
+                if field_name is not None and (not field_name or format_spec or conversion):
+                    raise ValueError(f"campo inválido: {{{field_name}}}")
+                parts.append((literal, field_name))
+        except ValueError as e:
+            raise ValueError(f"Padrão de nome de arquivo inválido: {e}")
+        self._parts: Tuple[Tuple[str, Optional[str]], ...] = tuple(parts)
+        self.fields = tuple(field_name for _, field_name in parts if field_name is not None)
+        if not self.fields:
+            raise ValueError("Padrão de nome de arquivo inválido: use ao menos uma coluna, ex.: {Nome}")
+
+    def render(self, values: Dict[str, Any]) -> str:
+        return "".join(
+            literal + (name_text(values.get(field_name)) if field_name is not None else "")
+            for literal, field_name in self._parts
+        )
+
+    def validate_columns(self, column_names: Iterable[str]):
+        """Erro se o padrão usa uma coluna que não existe no perfil de planilha"""
+        known = set(column_names)
+        for field_name in self.fields:
+            if field_name not in known:
+                raise ValueError(f"Coluna desconhecida no padrão de nome do arquivo: {field_name}")
+
+class OutputNameRegistry:
+    """
+    Registro dos nomes ocupados em uma pasta de saída (ou, sem pasta, só em memória,
+    como nas entradas de um .zip). Comparações ignoram maiúsculas/minúsculas, como
+    no sistema de arquivos do Windows.
+    """
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = output_dir
+        self._taken = set()
+        # Próximo contador a testar para cada nome base
+        self._next_counter: Dict[str, int] = {}
+        if output_dir and os.path.isdir(output_dir):
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    self._taken.add(entry.name.casefold())
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.output_dir, filename) if self.output_dir else filename
+
+    def reserve(self, path: str):
+        """Marca como ocupado um caminho já conhecido (ex.: registrado no diário do lote)"""
+        self._taken.add(os.path.basename(path).casefold())
+
+    def allocate(self, stem: str, extension: str = ".pdf") -> str:
+        """Primeiro nome livre: stem.pdf, stem_1.pdf, stem_2.pdf..."""
+        base_key = (stem + extension).casefold()
+        counter = self._next_counter.get(base_key, 0)
+        while True:
+            filename = f"{stem}{extension}" if counter == 0 else f"{stem}_{counter}{extension}"
+            if filename.casefold() not in self._taken:
+                break
+            counter += 1
+        self._taken.add(filename.casefold())
+        self._next_counter[base_key] = counter + 1
+        return self._path(filename)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Destinos de saída do lote que não são "um arquivo PDF por linha".
+"""
+import getpass
+import os
+import zipfile
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+
+import fitz
+
+from core.pdf_generator import append_document_pages
+from core.render_plan import RenderPlan, format_text_field
+from core.template_context import TemplateContext
+from core.timing_report import TimingReport, DISABLED
+
+# "files": um PDF por linha (padrão); "merged": todos os documentos em um PDF único;
+# "zip": um PDF por linha, gravado direto em um arquivo .zip
+OutputMode = Literal["files", "merged", "zip"]
+
+# Método de compressão das entradas do .zip. PDFs já são comprimidos
+# internamente, então "store" (sem compressão) costuma ser a melhor escolha.
+ZipCompression = Literal["store", "deflate"]
+
+ZIP_METHODS = {
+    "store": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+}
+
+class MergedPdfSink:
+    """
+    Reúne os documentos do lote em um único PDF, com um marcador por documento.
+
+    O fundo de cada página do template é gravado uma vez por arquivo e
+    referenciado por todas as páginas. Com max_documents, o lote é dividido
+    em partes de até max_documents documentos cada; path_for_part recebe o
+    número da parte (1, 2, ...) e devolve o caminho do arquivo.
+    """
+    def __init__(
+        self,
+        template: TemplateContext,
+        plan: RenderPlan,
+        path_for_part: Callable[[int], str],
+        max_documents: Optional[int] = None,
+        timing: TimingReport = DISABLED
+    ):
+        self.template = template
+        self.plan = plan
+        self.timing = timing
+        self.path_for_part = path_for_part
+        self.max_documents = max_documents
+        self.paths: List[str] = []
+        self.document_count = 0
+        self._out: Optional[fitz.Document] = None
+        self._toc: List[list] = []
+        self._part_documents = 0
+
+    def add(self, data_row: Dict[str, Any], title: str):
+        """Acrescenta as páginas de uma linha, com um marcador com o título do documento"""
+        if self._out is None:
+            self._out = fitz.open()
+        first_page = append_document_pages(self._out, self.template, self.plan, data_row, self.timing)
+        self._toc.append([1, format_text_field(title) or "Documento", first_page + 1])
+        self._part_documents += 1
+        self.document_count += 1
+        if self.max_documents and self._part_documents >= self.max_documents:
+            self._save_part()
+
+    def _save_part(self):
+        output_path = self.path_for_part(len(self.paths) + 1)
+        try:
+            self._out.set_toc(self._toc)
+            self._out.set_metadata({
+                "author": getpass.getuser(),
+                "title": os.path.basename(output_path),
+                "producer": "PDF Generator"
+            })
+            with self.timing.stage("saving"):
+                self._out.save(output_path, garbage=1, deflate=True)
+        finally:
+            self._out.close()
+            self._out = None
+            self._toc = []
+            self._part_documents = 0
+        self.timing.count("bytes_written", os.path.getsize(output_path))
+        self.paths.append(output_path)
+
+    def close(self) -> List[str]:
+        """Grava a parte pendente e retorna os caminhos de todos os arquivos gerados"""
+        if self._out is not None:
+            self._save_part()
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._out is not None:
+            # Em caso de erro a parte incompleta é descartada
+            self._out.close()
+            self._out = None
+
+class ZipSink:
+    """
+    Grava cada PDF gerado direto em um arquivo .zip, sem arquivos intermediários.
+    Os nomes das entradas devem chegar já únicos (reservados em memória pelo lote).
+    """
+    def __init__(self, zip_path: str, compression: ZipCompression = "store"):
+        if compression not in ZIP_METHODS:
+            raise ValueError(f"Compressão inválida: {compression}")
+        self.zip_path = zip_path
+        self.document_count = 0
+        self._archive = zipfile.ZipFile(zip_path, "w", compression=ZIP_METHODS[compression], allowZip64=True)
+
+    def add(self, name: str, data: bytes):
+        self._archive.writestr(name, data)
+        self.document_count += 1
+
+    def add_many(self, documents: List[Tuple[str, bytes]]):
+        for name, data in documents:
+            self.add(name, data)
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is not None and os.path.exists(self.zip_path):
+            # Em caso de erro o .zip incompleto é removido
+            os.remove(self.zip_path)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from models import DocumentProfile, SpreadsheetProfile
+from core.timing_report import TimingReport
+
+# Uma tarefa de geração: (linha de dados, caminho de saída já reservado)
+RowJob = Tuple[Dict[str, Any], str]  # valores já formatados (core.formatting)
+
+# Um documento gerado em memória: (nome reservado, bytes do PDF)
+RenderedDocument = Tuple[str, bytes]
+
+# Estado de cada processo do pool, carregado uma única vez no initializer
+_worker_state = None
+
+# Com cancelamento, a espera pelos lotes acorda neste intervalo (s) para checar o pedido
+PARALLEL_POLL_INTERVAL = 0.1
+
+def default_worker_count() -> int:
+    """Número padrão de processos: um por núcleo"""
+    return os.cpu_count() or 1
+
+def default_chunk_size(total_rows: Optional[int], workers: int) -> int:
+    """Lotes grandes o bastante para diluir o custo de IPC, pequenos o bastante para balancear"""
+    if total_rows is None:
+        # Total desconhecido (leitura em streaming): usa o maior lote
+        return 100
+    if total_rows <= 0:
+        return 1
+    return max(1, min(100, total_rows // (workers * 4)))
+
+def _init_worker(document_profile: DocumentProfile, spreadsheet_profile: SpreadsheetProfile, stop_event=None):
+    global _worker_state
+    # Ctrl+C chega a todo o grupo de processos; quem interrompe o lote é o processo
+    # principal (pelo stop_event), para que os lotes parem entre duas linhas
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from core.template_context import TemplateContext
+    from core.render_plan import compile_render_plan
+    _worker_state = (
+        document_profile,
+        spreadsheet_profile,
+        TemplateContext(document_profile),
+        compile_render_plan(document_profile, spreadsheet_profile, preformatted=True),
+        stop_event
+    )
+
+def _render_chunk(
+    chunk: List[RowJob],
+    as_bytes: bool = False,
+    timed: bool = False
+) -> Tuple[Union[int, List[RenderedDocument]], Optional[TimingReport]]:
+    """
+    Gera as linhas de um lote. Se o cancelamento for pedido, para entre duas
+    linhas e devolve só o que já foi gerado (as primeiras linhas do lote).
+    Com timed, devolve também os tempos das etapas do lote neste processo.
+    """
+    from core.pdf_generator import generate_pdf_with_template, render_pdf_bytes
+    document_profile, spreadsheet_profile, template, plan, stop_event = _worker_state
+    timing = TimingReport(enabled=timed)
+    documents: List[RenderedDocument] = []
+    for data_row, output_path in chunk:
+        if stop_event is not None and stop_event.is_set():
+            break
+        if as_bytes:
+            # Os bytes voltam para o processo principal, que é o único que escreve a saída
+            data = render_pdf_bytes(data_row, document_profile, spreadsheet_profile, os.path.basename(output_path), template, plan, timing)
+            documents.append((output_path, data))
+        else:
+            generate_pdf_with_template(data_row, document_profile, spreadsheet_profile, output_path, template, plan, timing)
+            documents.append((output_path, b""))
+    if timed:
+        # Os fundos são rasterizados uma vez por processo: contados no primeiro lote
+        timing.count("cache_hits", template.cache_hits)
+        timing.count("cache_misses", template.cache_misses)
+        template.cache_hits = template.cache_misses = 0
+    return (documents if as_bytes else len(documents)), (timing if timed else None)
+
+def _chunked(jobs: Iterable[RowJob], chunk_size: int) -> Iterator[List[RowJob]]:
+    iterator = iter(jobs)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def run_parallel(
+    jobs: Iterable[RowJob],
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    workers: int,
+    chunk_size: int,
+    on_progress: Optional[Callable[[int], None]] = None,
+    on_documents: Optional[Callable[[List[RenderedDocument]], None]] = None,
+    on_completed: Optional[Callable[[List[RowJob]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    timing: Optional[TimingReport] = None
+) -> int:
+    """
+    Distribui as linhas entre um pool de processos, em lotes de chunk_size.
+
+    Cada processo abre o template e compila o plano uma única vez (initializer). No
+    máximo 2 lotes por processo ficam em voo, então as tarefas podem vir de um
+    iterador preguiçoso. on_progress recebe o total de linhas concluídas.
+    Com on_documents os PDFs não são gravados pelos processos: cada lote volta
+    em memória e é entregue a on_documents no processo principal.
+    on_completed recebe as tarefas de cada lote concluído (mesmo em caso de erro
+    em outro lote), para que o diário do lote registre o que já foi gerado.
+    Quando should_stop() fica verdadeiro, nenhum lote novo é enviado e os
+    processos param entre duas linhas; o que já foi gerado é entregue
+    normalmente e a função retorna (quem chama decide como tratar a parada).
+    Com timing, os tempos das etapas medidos em cada processo são somados nele.
+    Retorna o número de PDFs gerados.
+    """
+    done = 0
+    chunks = _chunked(jobs, chunk_size)
+    max_pending = workers * 2
+    as_bytes = on_documents is not None
+    timed = timing is not None and timing.enabled
+
+    # Tarefas de cada lote em voo
+    chunk_of = {}
+
+    def collect(future) -> int:
+        chunk = chunk_of.pop(future)
+        result, chunk_timing = future.result()
+        if chunk_timing is not None:
+            timing.merge(chunk_timing)
+        if as_bytes:
+            on_documents(result)
+            result = len(result)
+        if on_completed:
+            # Um lote interrompido conclui só as primeiras linhas
+            on_completed(chunk[:result])
+        return result
+
+    # Sinal de parada compartilhado com os processos (verificado entre linhas)
+    stop_event = multiprocessing.Event() if should_stop else None
+
+    def wait_some(pending):
+        if should_stop is None:
+            return wait(pending, return_when=FIRST_COMPLETED)
+        # Acorda periodicamente para repassar um pedido de parada aos processos
+        while True:
+            if should_stop():
+                stop_event.set()
+            finished, pending = wait(pending, timeout=PARALLEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if finished:
+                return finished, pending
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(document_profile, spreadsheet_profile, stop_event)
+    ) as executor:
+        pending = set()
+        try:
+            for chunk in chunks:
+                if should_stop and should_stop():
+                    stop_event.set()
+                    break
+                future = executor.submit(_render_chunk, chunk, as_bytes, timed)
+                chunk_of[future] = chunk
+                pending.add(future)
+                if len(pending) >= max_pending:
+                    finished, pending = wait_some(pending)
+                    for future in finished:
+                        done += collect(future)
+                    if on_progress:
+                        on_progress(done)
+
+            while pending:
+                finished, pending = wait_some(pending)
+                for future in finished:
+                    done += collect(future)
+                if on_progress:
+                    on_progress(done)
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            # Arquivos de lotes que terminaram antes da interrupção continuam valendo
+            if not as_bytes:
+                for future in list(chunk_of):
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        collect(future)
+            raise
+
+    return done
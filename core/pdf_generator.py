@@ -1,240 +1,566 @@
 # -*- coding: utf-8 -*-
+import io
 import os
+import time
 import pandas as pd
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
 from datetime import datetime
 import getpass
-from typing import Dict, Any, List
+from typing import Dict, Any, BinaryIO, Callable, Iterable, List, Optional, Tuple, Union
 import fitz
 
-from models import DocumentProfile, SpreadsheetProfile, PdfFieldMapping, TextStyle
-from utils import format_date_value, format_cpf, format_cnpj, format_phone, get_page_size
+from models import DocumentProfile, SpreadsheetProfile
+from core.template_context import TemplateContext
+from core.render_plan import RenderPlan, FieldPlan, compile_render_plan
+from core.formatting import format_columns, resolve_column_positions, resolve_source_columns
+from core.spreadsheet_reader import open_spreadsheet
+from core.output_names import FilenamePattern, OutputNameRegistry, name_text, safe_filename
+from core.batch_job import BatchJob
+from core.timing_report import TimingReport, DISABLED
+from core.batch_journal import BatchJournal, render_fingerprint, row_content_key
+from core.parallel import RowJob, RenderedDocument, run_parallel, default_worker_count, default_chunk_size
 
-# PDF coordinates are typically measured from the bottom-left corner.
-# ReportLab uses points (1 point = 1/72 inch). 1mm = 2.83465 points.
-MM_TO_POINTS = 2.83465
+# Abaixo disso o custo de subir o pool de processos não compensa
+PARALLEL_MIN_ROWS = 50
 
-def hex_to_rgb(hex_color: str) -> tuple:
-    """Converte cor hexadecimal para RGB (0-1)"""
-    hex_color = hex_color.lstrip('#')
-    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    return (r/255.0, g/255.0, b/255.0)
+def _draw_page_fields(c: canvas.Canvas, fields: Tuple[FieldPlan, ...], data_row: Dict[str, Any]):
+    """Desenha no canvas os campos (já compilados) de uma página"""
+    for field in fields:
+        value = field.formatter(data_row.get(field.column_name, ""))
 
-def apply_text_style(c: canvas.Canvas, style: TextStyle):
-    """Aplica o estilo de texto ao canvas"""
-    # Determina o nome da fonte baseado nos estilos
-    font_name = style.font_family
-    
-    # ReportLab tem algumas fontes padrão que suportam bold/italic
-    # Para outras fontes, usamos as variantes disponíveis
-    if style.bold and style.italic:
-        if font_name == "Helvetica":
-            font_name = "Helvetica-BoldOblique"
-        elif font_name == "Times New Roman":
-            font_name = "Times-BoldItalic"
-        elif font_name == "Courier New":
-            font_name = "Courier-BoldOblique"
-        else:
-            font_name = "Helvetica-BoldOblique"
-    elif style.bold:
-        if font_name == "Helvetica":
-            font_name = "Helvetica-Bold"
-        elif font_name == "Times New Roman":
-            font_name = "Times-Bold"
-        elif font_name == "Courier New":
-            font_name = "Courier-Bold"
-        else:
-            font_name = "Helvetica-Bold"
-    elif style.italic:
-        if font_name == "Helvetica":
-            font_name = "Helvetica-Oblique"
-        elif font_name == "Times New Roman":
-            font_name = "Times-Italic"
-        elif font_name == "Courier New":
-            font_name = "Courier-Oblique"
-        else:
-            font_name = "Helvetica-Oblique"
-    else:
-        # Mapeia nomes de fontes comuns para nomes do ReportLab
-        font_map = {
-            "Times New Roman": "Times-Roman",
-            "Courier New": "Courier",
-            "Helvetica": "Helvetica"
-        }
-        font_name = font_map.get(font_name, "Helvetica")
-    
-    # Define a fonte e tamanho
-    c.setFont(font_name, style.font_size)
+        c.setFont(field.font, field.size)
+        c.setFillColorRGB(*field.rgb)
+        c.drawString(field.x_pt, field.y_pt, value)
+
+        if field.underline:
+            # Para sublinhado, desenhamos uma linha abaixo do texto
+            text_width = c.stringWidth(value, field.font, field.size)
+            c.line(field.x_pt, field.y_pt - 2, field.x_pt + text_width, field.y_pt - 2)
+
+def _build_overlay(
+    plan: RenderPlan,
+    page_count: int,
+    data_row: Dict[str, Any],
+    timing: TimingReport = DISABLED
+) -> fitz.Document:
+    """Camada de texto da linha, desenhada pelo ReportLab em memória (uma página por página do template)"""
+    overlay_buffer = io.BytesIO()
+    with timing.stage("drawing"):
+        c = canvas.Canvas(overlay_buffer, pagesize=plan.page_size)
+        for page_idx in range(page_count):
+            _draw_page_fields(c, plan.fields_for_page(page_idx), data_row)
+            c.showPage()
+    with timing.stage("canvas_save"):
+        c.save()
+        return fitz.open("pdf", overlay_buffer.getvalue())
+
+def append_document_pages(
+    out: fitz.Document,
+    template: TemplateContext,
+    plan: RenderPlan,
+    data_row: Dict[str, Any],
+    timing: TimingReport = DISABLED
+) -> int:
+    """
+    Acrescenta ao documento out as páginas de uma linha e retorna o índice da primeira.
+
+    O fundo de cada página (a página vetorial do template ou a imagem já
+    codificada do fundo rasterizado) é copiado como está, sem recomprimir, e
+    gravado uma única vez em out: o PyMuPDF reaproveita as páginas já copiadas.
+    """
+    width, height = plan.page_size
+    first_page = len(out)
+    with timing.stage("background"):
+        source = template.page_source()
+    overlay = _build_overlay(plan, template.page_count, data_row, timing)
+    try:
+        with timing.stage("composing"):
+            for page_idx in range(template.page_count):
+                page = out.new_page(width=width, height=height)
+                # O fundo é esticado para o formato do perfil
+                page.show_pdf_page(page.rect, source, page_idx, keep_proportion=False)
+                if plan.fields_for_page(page_idx):
+                    page.show_pdf_page(page.rect, overlay, page_idx, keep_proportion=False)
+    finally:
+        overlay.close()
+    timing.count("documents")
+    timing.count("pages", template.page_count)
+    return first_page
+
+def generate_document(
+    template: TemplateContext,
+    plan: RenderPlan,
+    data_row: Dict[str, Any],
+    output: Union[str, BinaryIO],
+    title: str,
+    timing: TimingReport = DISABLED
+):
+    """
+    Usa as páginas do template como fundo e carimba apenas o texto mapeado.
     
-    # Define a cor
-    r, g, b = hex_to_rgb(style.color)
-    c.setFillColorRGB(r, g, b)
+    O texto é desenhado pelo ReportLab em uma camada em memória, que é
+    sobreposta ao fundo (vetorial ou rasterizado) com o PyMuPDF.
+    Recebe o template aberto, o plano compilado e a linha já formatada; é o
+    passo comum aos lotes e ao documento avulso (core.document_renderer).
+    """
+    out = fitz.open()
+    try:
+        # 1. Página do template como fundo + camada de texto por cima
+        append_document_pages(out, template, plan, data_row, timing)
+
+        # 2. Add Metadata
+        out.set_metadata({
+            "author": getpass.getuser(),
+            "title": title,
+            "producer": "PDF Generator"
+        })
+
+        # 3. Save PDF
+        with timing.stage("saving"):
+            start = output.tell() if not isinstance(output, str) else 0
+            out.save(output, garbage=1, deflate=True)
+        if timing.enabled:
+            written = os.path.getsize(output) if isinstance(output, str) else output.tell() - start
+            timing.count("bytes_written", written)
+    finally:
+        out.close()
+
+def _render(
+    data_row: Dict[str, Any],
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    output: Union[str, BinaryIO],
+    title: str,
+    template: Optional[TemplateContext],
+    plan: Optional[RenderPlan],
+    timing: Optional[TimingReport] = None
+):
+    if plan is None:
+        plan = compile_render_plan(document_profile, spreadsheet_profile)
+    owns_template = template is None
+    if owns_template:
+        template = TemplateContext(document_profile)
+    try:
+        generate_document(template, plan, data_row, output, title, timing or DISABLED)
+    finally:
+        if owns_template:
+            template.close()
 
 def generate_pdf_with_template(
     data_row: Dict[str, Any],
     document_profile: DocumentProfile,
     spreadsheet_profile: SpreadsheetProfile,
-    output_path: str
+    output_path: Union[str, BinaryIO],
+    template: Optional[TemplateContext] = None,
+    plan: Optional[RenderPlan] = None,
+    timing: Optional[TimingReport] = None
 ):
     """
     Generates a multi-page PDF document based on a template and a row of data.
-    """
-    
-    # 1. Setup Canvas com o formato e orientação corretos
-    page_size = get_page_size(document_profile.page_format, document_profile.page_orientation)
-    c = canvas.Canvas(output_path, pagesize=page_size)
-    width, height = page_size
-    
-    # 2. Load Template PDF
-    doc = fitz.open(document_profile.pdf_path)
-    total_pages = len(doc)
     
-    # Usa uma pasta temporária no diretório do usuário para evitar erros de permissão
-    from core.data_manager import data_manager
-    temp_dir = os.path.join(data_manager.base_dir, ".temp")
-    os.makedirs(temp_dir, exist_ok=True)
-
-    # Group mappings by page
-    mappings_by_page: Dict[int, List[PdfFieldMapping]] = {}
-    for mapping in document_profile.field_mappings:
-        pg = getattr(mapping, 'page_index', 0)
-        if pg not in mappings_by_page:
-            mappings_by_page[pg] = []
-        mappings_by_page[pg].append(mapping)
-
-    # 3. Process each page
-    for page_idx in range(total_pages):
-        # Render template page to image for background
-        page = doc[page_idx]
-        dpi = 200
-        zoom = dpi / 72
-        matrix = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=matrix)
-        
-        bg_image_path = os.path.join(temp_dir, f"bg_p{page_idx}_temp.png")
-        pix.save(bg_image_path)
-        
-        # Draw background
-        c.drawImage(ImageReader(bg_image_path), 0, 0, width=width, height=height)
-        
-        # Add Mapped Data for this page
-        if page_idx in mappings_by_page:
-            for mapping in mappings_by_page[page_idx]:
-                column_name = mapping.column_name
-                value = str(data_row.get(column_name, ""))
-                
-                # Find the column type for formatting
-                col_mapping = next((col for col in spreadsheet_profile.columns if col.custom_name == column_name), None)
-                
-                if col_mapping:
-                    match col_mapping.column_type:
-                        case "monetario":
-                            try:
-                                value = str(value).replace('$', '').replace('R$', '').strip()
-                                value = f"R$ {float(value):.2f}".replace('.', ',')
-                            except (ValueError, TypeError): pass
-                        case "data":
-                            value = format_date_value(value, "data")
-                        case "data e hora":
-                            value = format_date_value(value, "data e hora")
-                        case "cpf":
-                            value = format_cpf(value)
-                        case "cnpj":
-                            value = format_cnpj(value)
-                        case "telefone":
-                            value = format_phone(value)
-
-                if not value or value.lower() == "nan":
-                    value = ""
-
-                # Aplica o estilo do texto
-                style = mapping.style if mapping.style else TextStyle()
-                apply_text_style(c, style)
-                
-                # Convert mm coordinates (from top-left) to ReportLab points (from bottom-left)
-                x_point = mapping.x * MM_TO_POINTS
-                y_point = (height - (mapping.y * MM_TO_POINTS)) - (style.font_size / MM_TO_POINTS)  # Ajusta pela altura da fonte
-                
-                # Desenha o texto
-                if style.underline:
-                    # Para sublinhado, precisamos desenhar uma linha abaixo do texto
-                    text_width = c.stringWidth(str(value), c._fontname, c._fontsize)
-                    c.drawString(x_point, y_point, str(value))
-                    c.line(x_point, y_point - 2, x_point + text_width, y_point - 2)
-                else:
-                    c.drawString(x_point, y_point, str(value))
-        
-        # Finish current page and start next if not last
-        c.showPage()
-        
-        # Cleanup temp image
-        if os.path.exists(bg_image_path):
-            os.remove(bg_image_path)
-
-    doc.close()
-
-    # 4. Add Metadata
-    c.setAuthor(getpass.getuser())
-    c.setTitle(os.path.basename(output_path))
-    
-    # 5. Save PDF
-    c.save()
+    Por padrão (render_mode "auto") templates PDF comuns são preservados como
+    vetor e recebem apenas o texto; os demais são rasterizados.
+    Em lotes, passe o TemplateContext e o RenderPlan já preparados para que o
+    template e os mapeamentos sejam processados uma única vez.
+    output_path também pode ser um arquivo aberto (modo binário).
+    Com timing (core.timing_report), o tempo de cada etapa é somado ao relatório.
+    """
+    title = os.path.basename(output_path) if isinstance(output_path, str) else "Documento"
+    _render(data_row, document_profile, spreadsheet_profile, output_path, title, template, plan, timing)
+
+def render_pdf_bytes(
+    data_row: Dict[str, Any],
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    title: str,
+    template: Optional[TemplateContext] = None,
+    plan: Optional[RenderPlan] = None,
+    timing: Optional[TimingReport] = None
+) -> bytes:
+    """Gera o documento em memória e retorna os bytes do PDF (title vai para os metadados)"""
+    buffer = io.BytesIO()
+    _render(data_row, document_profile, spreadsheet_profile, buffer, title, template, plan, timing)
+    return buffer.getvalue()
+
+def _iter_data_rows(formatted: pd.DataFrame):
+    """
+    Converte cada linha já formatada no dicionário usado pelos mapeamentos.
+    Percorre arrays das colunas em paralelo, sem criar uma Series por linha.
+    """
+    names = list(formatted.columns)
+    if not names:
+        for index in range(len(formatted)):
+            yield index, {}
+        return
+    columns = [formatted[name].to_numpy(dtype=object) for name in names]
+    for index, values in enumerate(zip(*columns)):
+        yield index, dict(zip(names, values))
+
+def output_stem(
+    values: Dict[str, Any],
+    document_profile: DocumentProfile,
+    pattern: Optional[FilenamePattern] = None
+) -> str:
+    """
+    Nome base do arquivo: o padrão do perfil, se houver, ou "<título>_<perfil>".
+    values são os valores brutos da linha, por nome de coluna (nunca os formatados).
+    Separadores que sobram nas pontas quando uma coluna do padrão está vazia
+    ("- 98765432100") são removidos.
+    """
+    if pattern is not None:
+        return safe_filename(pattern.render(values)).strip(" _-") or "Documento"
+    title_value = values.get(document_profile.title_column) if document_profile.title_column else None
+    return f"{safe_filename(name_text(title_value)) or 'Documento'}_{document_profile.name}"
+
+def _output_stems(
+    df: pd.DataFrame,
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    pattern: Optional[FilenamePattern] = None,
+    positions: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """Nome base do arquivo de cada linha do bloco, a partir das colunas brutas"""
+    sources = resolve_source_columns(df, spreadsheet_profile, positions)
+    fields = pattern.fields if pattern is not None else (document_profile.title_column,)
+    columns = {name: sources[name].to_numpy(dtype=object) for name in fields if name in sources}
+    return [
+        output_stem({name: values[index] for name, values in columns.items()}, document_profile, pattern)
+        for index in range(len(df))
+    ]
+
+def _title_values(
+    df: pd.DataFrame,
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    positions: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """Texto (bruto, sem formatação) usado no nome de cada arquivo"""
+    title_column = resolve_source_columns(df, spreadsheet_profile, positions).get(document_profile.title_column)
+    if title_column is None:
+        return ["Documento"] * len(df)
+    return [str(value) for value in title_column]
+
+def _run_jobs(
+    jobs: Iterable[RowJob],
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    workers: int,
+    chunk_size: Optional[int],
+    on_progress: Callable[[int], None],
+    on_documents: Optional[Callable[[List[RenderedDocument]], None]] = None,
+    on_completed: Optional[Callable[[List[RowJob]], None]] = None,
+    job: Optional[BatchJob] = None,
+    timing: TimingReport = DISABLED
+) -> int:
+    """
+    Gera os documentos das tarefas no pool de processos (chunk_size definido) ou
+    no processo atual. Com on_documents os PDFs são gerados em memória e
+    entregues a on_documents em vez de gravados no caminho da tarefa.
+    on_completed recebe as tarefas concluídas, assim que cada uma termina.
+    Se o job for cancelado, para entre duas linhas e retorna o que já foi gerado.
+    """
+    if chunk_size:
+        return run_parallel(
+            jobs, document_profile, spreadsheet_profile,
+            workers=workers,
+            chunk_size=chunk_size,
+            on_progress=on_progress,
+            on_documents=on_documents,
+            on_completed=on_completed,
+            should_stop=(lambda: job.cancelled) if job else None,
+            timing=timing
+        )
+
+    generated_count = 0
+    # O template é aberto e renderizado, e o plano compilado, uma única vez
+    template = TemplateContext(document_profile)
+    plan = compile_render_plan(document_profile, spreadsheet_profile, preformatted=True)
+    try:
+        for data_row, output_path in jobs:
+            if job and job.cancelled:
+                break
+            on_progress(generated_count + 1)
+            if on_documents is None:
+                generate_pdf_with_template(data_row, document_profile, spreadsheet_profile, output_path, template, plan, timing)
+            else:
+                data = render_pdf_bytes(data_row, document_profile, spreadsheet_profile, os.path.basename(output_path), template, plan, timing)
+                on_documents([(output_path, data)])
+            generated_count += 1
+            if on_completed:
+                on_completed([(data_row, output_path)])
+    finally:
+        timing.count("cache_hits", template.cache_hits)
+        timing.count("cache_misses", template.cache_misses)
+        template.close()
+    return generated_count
 
 def batch_generate_pdfs(
     spreadsheet_path: str,
     document_profile: DocumentProfile,
     spreadsheet_profile: SpreadsheetProfile,
     status_callback: callable,
-    base_date: datetime
+    base_date: datetime,
+    workers: Optional[int] = None,
+    streaming: bool = True,
+    output_mode: str = "files",
+    merge_max_documents: Optional[int] = None,
+    zip_compression: str = "store",
+    incremental: bool = True,
+    job: Optional[BatchJob] = None,
+    output_dir: Optional[str] = None,
+    save_timing: bool = False,
+    spreadsheet_engine: Optional[str] = None,
+    prune_orphans: bool = False
 ) -> int:
     """
     Reads a spreadsheet and generates multiple PDFs.
     Returns the number of PDFs generated.
+    
+    workers define quantos processos dividem as linhas (padrão: um por núcleo);
+    com 1 processo, ou poucas linhas, a geração roda no processo atual.
+    Com streaming a planilha é lida em blocos e a geração começa no primeiro bloco.
+    spreadsheet_engine força um motor de leitura (core.spreadsheet_reader); sem
+    ele é usado o mais rápido disponível, registrado em job.timing.info.
+    Com output_mode="merged" todos os documentos vão para um PDF único (ou partes
+    de até merge_max_documents documentos), com um marcador por documento.
+    Com output_mode="zip" os PDFs são gravados direto em Lote_<perfil>.zip, sem
+    arquivos intermediários (zip_compression: "store" ou "deflate").
+    Com incremental, rodar de novo um lote de arquivos separados (interrompido ou
+    já concluído) só renderiza as linhas novas ou alteradas (core.batch_journal);
+    as demais mantêm o PDF existente, sem refazer nem duplicar arquivos. Com
+    prune_orphans, os PDFs que o lote gerou para linhas removidas ou renomeadas
+    são apagados ao final (e contados na mensagem de conclusão).
+    O job (core.batch_job) recebe eventos de progresso com taxa limitada e
+    permite cancelar o lote entre duas linhas (levanta BatchCancelled; no
+    modo "merged" a parte pendente é gravada antes);
+    status_callback, se informado, recebe a mensagem de cada evento; sem job,
+    recebe a de cada linha, sem limite de taxa.
+    Sem output_dir, os arquivos vão para a pasta do mês de base_date
+    (data_manager.get_generated_pdfs_dir).
+    O tempo de cada etapa e os contadores do lote ficam em job.timing
+    (core.timing_report); com save_timing o relatório também é gravado em
+    JSON (Tempos_<perfil>.json) junto dos arquivos gerados. Se job.timing tiver
+    um MemoryProfile (core.memory_profile), a memória também é medida e o lote
+    roda no processo atual, onde as alocações são rastreadas.
     """
     from core.data_manager import data_manager
     
-    status_callback("Lendo planilha...")
+    # Padrão de nome do perfil, compilado (e validado) uma vez por lote
+    pattern = None
+    if document_profile.filename_pattern:
+        try:
+            pattern = FilenamePattern(document_profile.filename_pattern)
+            pattern.validate_columns(column.custom_name for column in spreadsheet_profile.columns)
+        except ValueError as e:
+            raise Exception(str(e))
+
+    if job is None:
+        # Só o status_callback acompanha o lote: uma mensagem por linha, como antes
+        job = BatchJob(interval=0)
+    timing = job.timing
+    memory = timing.memory
+    started_at = time.perf_counter()
+
+    def report(stage: str, done: int = 0, message: Optional[str] = None, force: bool = False):
+        if memory is not None and stage == "generating":
+            memory.sample(done)
+        event = job.report(stage, done, total_rows, message, force)
+        if event and status_callback:
+            status_callback(event.message)
+
+    total_rows = None
+    if memory is not None:
+        memory.start()
+    report("reading")
     
-    # 1. Read Spreadsheet Data
+    # 1. Open Spreadsheet (as linhas são lidas sob demanda, bloco a bloco)
     try:
-        header_idx = spreadsheet_profile.header_row
-        df = pd.read_excel(spreadsheet_path, header=header_idx-1)
+        with timing.stage("reading"):
+            reader = open_spreadsheet(
+                spreadsheet_path, spreadsheet_profile.header_row, streaming=streaming, engine=spreadsheet_engine
+            )
     except Exception as e:
         raise Exception(f"Erro ao ler a planilha: {e}")
+    timing.note("spreadsheet_engine", reader.engine)
 
     # 2. Prepare Output Directory
-    output_dir = data_manager.get_generated_pdfs_dir(base_date)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    else:
+        output_dir = data_manager.get_generated_pdfs_dir(base_date)
     generated_count = 0
-    
+    # Estimativa (dimensão da planilha): pode ser None ou contar linhas vazias
+    total_rows = reader.total_rows
+
+    if workers is None:
+        workers = default_worker_count()
+    if memory is not None:
+        # As alocações só são rastreadas no processo atual
+        workers = 1
+    if total_rows is not None:
+        workers = min(workers, total_rows)
+    workers = max(1, workers)
+
+    # Os nomes são sempre reservados no processo principal, na ordem da planilha,
+    # para que o resultado seja idêntico nos modos serial e paralelo. A pasta é
+    # lida uma vez e o resto é controlado em memória
+    names = OutputNameRegistry(output_dir)
+    # Posição de cada coluna do perfil, resolvida uma vez para todos os blocos
+    positions = resolve_column_positions(reader.columns, spreadsheet_profile)
+    # As demais colunas não precisam ser lidas (o motor parquet as pula)
+    reader.use_columns(positions.values())
+
+    def iter_rows():
+        row_number = 0
+        chunks = iter(reader)
+        while True:
+            with timing.stage("reading"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            timing.count("rows", len(chunk))
+            # As células de cada bloco são formatadas de uma vez, por coluna
+            with timing.stage("formatting"):
+                formatted = format_columns(chunk, spreadsheet_profile, positions)
+                titles = _title_values(chunk, document_profile, spreadsheet_profile, positions)
+                stems = _output_stems(chunk, document_profile, spreadsheet_profile, pattern, positions)
+            for index, data_row in _iter_data_rows(formatted):
+                yield row_number, data_row, titles[index], stems[index]
+                row_number += 1
+
+    # Diário do lote: só no modo de arquivos separados, onde cada linha é um arquivo
+    journal = None
+    if incremental and output_mode == "files":
+        journal = BatchJournal.for_batch(output_dir, spreadsheet_path, document_profile)
+        fingerprint = render_fingerprint(document_profile)
+        # Nomes já usados pelo lote não são dados a documentos novos
+        for path in journal.paths():
+            names.reserve(path)
+    kept_count = 0
+    # Caminho → (linha, chave, nome base) das tarefas ainda não registradas no diário
+    journal_pending: Dict[str, Tuple[int, str, str]] = {}
+
+    def iter_jobs():
+        nonlocal kept_count
+        for row_number, data_row, _, stem in iter_rows():
+            if journal is None:
+                yield data_row, names.allocate(stem)
+                continue
+            # Mesmo conteúdo de um PDF já gerado pelo lote: mantém o arquivo existente
+            key = row_content_key(fingerprint, data_row)
+            if journal.claim_existing(row_number, key, stem):
+                kept_count += 1
+                continue
+            # Linha corrigida sobrescreve o próprio arquivo se o nome não mudou;
+            # linha nova ou renomeada ganha um nome novo
+            output_path = journal.path_to_replace(row_number, stem) or names.allocate(stem)
+            # Reservado antes de ir para um processo: se o lote cair antes do fim
+            # do bloco, a retomada reaproveita o caminho em vez de duplicar o PDF
+            journal.reserve(row_number, stem, output_path)
+            journal_pending[output_path] = (row_number, key, stem)
+            yield data_row, output_path
+
+    def record_completed(jobs: List[RowJob]):
+        for _, output_path in jobs:
+            row_number, key, stem = journal_pending.pop(output_path)
+            journal.record(row_number, key, stem, output_path)
+
+    finished_message = None
+
     # 3. Iterate over data rows
-    for index, row in df.iterrows():
-        status_callback(f"Processando linha {index + 1} de {len(df)}...")
-        
-        data_row = {}
-        for column in spreadsheet_profile.columns:
-            if column.original_header in df.columns:
-                data_row[column.custom_name] = row[column.original_header]
-            else:
-                data_row[column.custom_name] = row.iloc[column.index]
-        
-        title_value = str(data_row.get(document_profile.title_column, "Documento"))
-        safe_filename = "".join(c for c in title_value if c.isalnum() or c in (' ', '_', '-')).rstrip()
-        if not safe_filename:
-            safe_filename = "Documento"
-            
-        output_filename = f"{safe_filename}_{document_profile.name}.pdf"
-        output_path = os.path.join(output_dir, output_filename)
-        
-        counter = 1
-        while os.path.exists(output_path):
-            output_filename = f"{safe_filename}_{document_profile.name}_{counter}.pdf"
-            output_path = os.path.join(output_dir, output_filename)
-            counter += 1
-        
-        generate_pdf_with_template(data_row, document_profile, spreadsheet_profile, output_path)
-        generated_count += 1
-        
-    status_callback(f"Geração concluída. {generated_count} PDFs criados.")
-    return generated_count
\ No newline at end of file
+    # Com o pool, as linhas vão em lotes; sem ele (chunk_size None) tudo roda aqui
+    chunk_size = None
+    if workers > 1 and (total_rows is None or total_rows >= PARALLEL_MIN_ROWS):
+        chunk_size = default_chunk_size(total_rows, workers)
+
+    try:
+        if output_mode == "merged":
+            # Um único arquivo de saída: a montagem é feita no processo atual
+            from core.output_sinks import MergedPdfSink
+
+            def path_for_part(part: int) -> str:
+                stem = f"Lote_{document_profile.name}"
+                if merge_max_documents:
+                    stem = f"{stem}_parte{part}"
+                return names.allocate(stem)
+
+            template = TemplateContext(document_profile)
+            plan = compile_render_plan(document_profile, spreadsheet_profile, preformatted=True)
+            try:
+                with MergedPdfSink(template, plan, path_for_part, merge_max_documents, timing) as sink:
+                    for _, data_row, title, _ in iter_rows():
+                        if job.cancelled:
+                            # Grava a parte pendente: os documentos informados no cancelamento ficam no disco
+                            sink.close()
+                            job.check_cancelled(sink.document_count)
+                        report("generating", sink.document_count + 1)
+                        sink.add(data_row, title)
+                generated_count = sink.document_count
+                finished_message = f"Geração concluída. {generated_count} documentos reunidos em {len(sink.paths)} PDF(s)."
+            finally:
+                timing.count("cache_hits", template.cache_hits)
+                timing.count("cache_misses", template.cache_misses)
+                template.close()
+        elif output_mode == "zip":
+            # Cada PDF vai direto para o .zip; os nomes das entradas são reservados em memória
+            from core.output_sinks import ZipSink
+
+            zip_path = names.allocate(f"Lote_{document_profile.name}", ".zip")
+            entry_names = OutputNameRegistry()
+            jobs = (
+                (data_row, entry_names.allocate(stem))
+                for _, data_row, _, stem in iter_rows()
+            )
+            with ZipSink(zip_path, zip_compression) as sink:
+                def add_documents(documents: List[RenderedDocument]):
+                    with timing.stage("saving"):
+                        sink.add_many(documents)
+
+                generated_count = _run_jobs(
+                    jobs, document_profile, spreadsheet_profile, workers, chunk_size,
+                    on_progress=lambda done: report("generating", done),
+                    on_documents=add_documents,
+                    job=job,
+                    timing=timing
+                )
+                # O .zip incompleto é descartado
+                job.check_cancelled(generated_count)
+            finished_message = f"Geração concluída. {generated_count} PDFs gravados em {os.path.basename(zip_path)}."
+        else:
+            generated_count = _run_jobs(
+                iter_jobs(), document_profile, spreadsheet_profile, workers, chunk_size,
+                on_progress=lambda done: report("generating", kept_count + done),
+                on_completed=record_completed if journal else None,
+                job=job,
+                timing=timing
+            )
+            # O diário fica como está: rodar o lote de novo continua de onde parou
+            job.check_cancelled(kept_count + generated_count)
+            if kept_count:
+                finished_message = (
+                    f"Geração concluída. {generated_count} PDFs criados, "
+                    f"{kept_count} sem alterações foram mantidos."
+                )
+            generated_count += kept_count
+        # Lote completo: o diário guarda o estado final para a próxima execução
+        if journal:
+            removed = journal.finish(prune_orphans)
+            timing.count("orphans_removed", len(removed))
+            if removed:
+                finished_message = (
+                    (finished_message or f"Geração concluída. {generated_count} PDFs criados.")
+                    + f" {len(removed)} PDF(s) de linhas removidas ou renomeadas foram apagados."
+                )
+    finally:
+        reader.close()
+        if journal:
+            journal.close()
+        timing.total_wall = time.perf_counter() - started_at
+        if memory is not None:
+            memory.stop()
+
+    if save_timing:
+        timing.save(names.allocate(f"Tempos_{safe_filename(document_profile.name) or 'Lote'}", ".json"))
+    report("finished", generated_count, finished_message, force=True)
+    return generated_count
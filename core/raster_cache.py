@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Cache em disco das páginas rasterizadas dos templates.
+
+Cada página renderizada é gravada como PNG em <base_dir>/cache/raster, com o
+nome derivado de (hash do conteúdo do template, página, DPI, cores). Assim um
+novo lote, uma nova execução do aplicativo e a prévia do editor reaproveitam
+a renderização já feita. O tamanho total é limitado: ao gravar uma entrada, as
+usadas há mais tempo (data de modificação, renovada a cada leitura) são removidas.
+"""
+import hashlib
+import io
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+# Limite padrão do cache (uma página A4 a 200 DPI ocupa de ~100 KB a poucos MB)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class RasterCache:
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # caminho do template → (tamanho, mtime, hash), para não reler arquivos inalterados
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def template_hash(self, pdf_path: str) -> str:
+        """Hash do conteúdo do template (recalculado só quando o arquivo muda)"""
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        template_hash = digest.hexdigest()
+        self._hashes[path] = (stat.st_size, stat.st_mtime_ns, template_hash)
+        return template_hash
+
+    def _entry_path(self, template_hash: str, page_idx: int, dpi: int, color: str) -> str:
+        return os.path.join(self.cache_dir, f"{template_hash}_{page_idx}_{dpi}_{color}.png")
+
+    def load(self, template_hash: str, page_idx: int, dpi: int, color: str) -> Optional[bytes]:
+        """PNG da página em cache, ou None"""
+        path = self._entry_path(template_hash, page_idx, dpi, color)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            # Marca a entrada como usada recentemente
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def store(self, template_hash: str, page_idx: int, dpi: int, color: str, data: bytes):
+        """Grava o PNG de uma página e remove as entradas mais antigas se passar do limite"""
+        if len(data) > self.max_bytes:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._entry_path(template_hash, page_idx, dpi, color)
+        # Arquivo temporário + os.replace: outro processo nunca lê uma entrada pela metade
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith(".png"):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                        total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def get_or_render(
+        self,
+        pdf_path: str,
+        page_idx: int,
+        dpi: int,
+        color: str,
+        render: Callable[[], Image.Image]
+    ) -> Tuple[Image.Image, bytes]:
+        """Imagem da página e o seu PNG: do cache, ou renderizada com render() e gravada"""
+        template_hash = self.template_hash(pdf_path)
+        data = self.load(template_hash, page_idx, dpi, color)
+        if data is not None:
+            try:
+                image = Image.open(io.BytesIO(data))
+                image.load()
+                return image, data
+            except OSError:
+                pass  # entrada corrompida: renderiza de novo por cima
+        image = render()
+        buffer = io.BytesIO()
+        # Compressão rápida: o PNG é recomprimido ao ser embutido no PDF
+        image.save(buffer, "PNG", compress_level=1)
+        data = buffer.getvalue()
+        self.store(template_hash, page_idx, dpi, color, data)
+        return image, data
+
+    def invalidate(self, pdf_path: str):
+        """Remove do cache todas as páginas do template que está hoje em pdf_path"""
+        if not os.path.exists(pdf_path) or not os.path.isdir(self.cache_dir):
+            return
+        prefix = self.template_hash(pdf_path) + "_"
+        self._hashes.pop(os.path.abspath(pdf_path), None)
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.startswith(prefix):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".png"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        self._hashes.clear()
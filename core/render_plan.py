@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Tuple
+
+from models import DocumentProfile, SpreadsheetProfile, TextStyle
+from utils import format_date_value, format_cpf, format_cnpj, format_phone, get_page_size
+
+# PDF coordinates are typically measured from the bottom-left corner.
+# ReportLab uses points (1 point = 1/72 inch). 1mm = 2.83465 points.
+MM_TO_POINTS = 2.83465
+
+# Variantes das fontes padrão do ReportLab: (regular, bold, italic, bold+italic)
+FONT_VARIANTS = {
+    "Helvetica": ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique"),
+    "Times New Roman": ("Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic"),
+    "Courier New": ("Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique"),
+}
+
+def hex_to_rgb(hex_color: str) -> tuple:
+    """Converte cor hexadecimal para RGB (0-1)"""
+    hex_color = hex_color.lstrip('#')
+    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    return (r/255.0, g/255.0, b/255.0)
+
+def resolve_font_name(style: TextStyle) -> str:
+    """Nome da fonte do ReportLab para o estilo (fontes desconhecidas viram Helvetica)"""
+    variants = FONT_VARIANTS.get(style.font_family, FONT_VARIANTS["Helvetica"])
+    return variants[(1 if style.bold else 0) + (2 if style.italic else 0)]
+
+# --- Formatadores por tipo de coluna ---
+# Todos recebem o valor bruto da planilha e devolvem o texto final do campo.
+
+def _finalize(value: str) -> str:
+    if not value or value.lower() == "nan":
+        return ""
+    return value
+
+def format_text_field(value: Any) -> str:
+    return _finalize(str(value))
+
+def format_monetary_field(value: Any) -> str:
+    value = str(value)
+    try:
+        value = value.replace('$', '').replace('R$', '').strip()
+        value = f"R$ {float(value):.2f}".replace('.', ',')
+    except (ValueError, TypeError): pass
+    return _finalize(value)
+
+# Datas recebem a célula bruta: datas já tipadas não passam por str() e novo parse
+def format_date_field(value: Any) -> str:
+    return _finalize(format_date_value(value, "data"))
+
+def format_datetime_field(value: Any) -> str:
+    return _finalize(format_date_value(value, "data e hora"))
+
+def format_cpf_field(value: Any) -> str:
+    return _finalize(format_cpf(str(value)))
+
+def format_cnpj_field(value: Any) -> str:
+    return _finalize(format_cnpj(str(value)))
+
+def format_phone_field(value: Any) -> str:
+    return _finalize(format_phone(str(value)))
+
+FIELD_FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "monetario": format_monetary_field,
+    "data": format_date_field,
+    "data e hora": format_datetime_field,
+    "cpf": format_cpf_field,
+    "cnpj": format_cnpj_field,
+    "telefone": format_phone_field,
+}
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """Um campo pronto para desenhar: posição em pontos, fonte resolvida e formatador"""
+    column_name: str
+    x_pt: float
+    y_pt: float
+    font: str
+    size: int
+    rgb: Tuple[float, float, float]
+    underline: bool
+    formatter: Callable[[Any], str]
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """
+    Tudo o que não depende da linha de dados, calculado uma única vez por lote.
+    Para cada linha resta apenas: buscar o valor, formatar e desenhar.
+    """
+    page_size: Tuple[float, float]
+    pages: Mapping[int, Tuple[FieldPlan, ...]]  # somente leitura (MappingProxyType)
+
+    def fields_for_page(self, page_idx: int) -> Tuple[FieldPlan, ...]:
+        return self.pages.get(page_idx, ())
+
+def compile_render_plan(
+    document_profile: DocumentProfile,
+    spreadsheet_profile: SpreadsheetProfile,
+    preformatted: bool = False
+) -> RenderPlan:
+    """
+    Compila os mapeamentos do perfil de documento em um RenderPlan imutável.
+    Com preformatted=True os valores já chegam formatados (core.formatting) e
+    nenhum formatador por tipo é aplicado na renderização.
+    """
+    page_size = get_page_size(document_profile.page_format, document_profile.page_orientation)
+    height = page_size[1]
+
+    # Tipo de cada coluna (o primeiro nome personalizado encontrado vence)
+    column_types: Dict[str, str] = {}
+    for column in spreadsheet_profile.columns:
+        column_types.setdefault(column.custom_name, column.column_type)
+
+    pages: Dict[int, list] = {}
+    for mapping in document_profile.field_mappings:
+        style = mapping.style if mapping.style else TextStyle()
+        field = FieldPlan(
+            column_name=mapping.column_name,
+            x_pt=mapping.x * MM_TO_POINTS,
+            # Convert mm (from top-left) to points (from bottom-left), ajustando pela altura da fonte
+            y_pt=(height - (mapping.y * MM_TO_POINTS)) - (style.font_size / MM_TO_POINTS),
+            font=resolve_font_name(style),
+            size=style.font_size,
+            rgb=hex_to_rgb(style.color),
+            underline=style.underline,
+            formatter=format_text_field if preformatted else FIELD_FORMATTERS.get(column_types.get(mapping.column_name), format_text_field)
+        )
+        pages.setdefault(getattr(mapping, 'page_index', 0), []).append(field)
+
+    return RenderPlan(
+        page_size=page_size,
+        pages=MappingProxyType({page_idx: tuple(fields) for page_idx, fields in pages.items()})
+    )
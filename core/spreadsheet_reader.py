@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura da planilha de dados em blocos.
+
+As linhas são lidas por um dos motores abaixo, escolhido pelo formato e pelo
+que estiver instalado (select_engine):
+
+    calamine  python-calamine (opcional, em Rust): .xlsx, .xlsm, .xlsb, .xls e
+              .ods, várias vezes mais rápido que o openpyxl
+    openpyxl  .xlsx/.xlsm em streaming (read_only): memória constante
+    csv       .csv/.tsv/.txt em streaming, com separador e codificação detectados;
+              os valores chegam como texto (CPF com zeros à esquerda é mantido)
+    parquet   .parquet via pyarrow, lendo só as colunas usadas pelo perfil
+              (use_columns); os nomes das colunas vêm do schema, sem linha de cabeçalho
+    pandas    pd.read_excel, para os demais formatos (ex.: .xls via xlrd, .ods via odfpy)
+
+Todos entregam os mesmos blocos (DataFrames de valores crus), para que o
+pipeline de geração seja um só.
+"""
+import codecs
+import csv
+import importlib.util
+import os
+import time
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Literal, Optional, Tuple
+
+import pandas as pd
+
+# Linhas por bloco entregue ao pipeline de geração
+DEFAULT_CHUNK_ROWS = 500
+
+# Textos que o pandas considera célula vazia ao ler uma planilha
+NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+STREAMING_EXTENSIONS = (".xlsx", ".xlsm")
+CALAMINE_EXTENSIONS = (".xlsx", ".xlsm", ".xlsb", ".xls", ".ods")
+CSV_EXTENSIONS = (".csv", ".tsv", ".txt")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+SpreadsheetEngine = Literal["calamine", "openpyxl", "csv", "parquet", "pandas"]
+
+# Em ordem de preferência
+ENGINES: Tuple[str, ...] = ("calamine", "openpyxl", "csv", "parquet", "pandas")
+
+# Formatos que só um motor lê
+_FORMAT_ENGINES = {extension: "csv" for extension in CSV_EXTENSIONS}
+_FORMAT_ENGINES.update({extension: "parquet" for extension in PARQUET_EXTENSIONS})
+
+def calamine_available() -> bool:
+    return importlib.util.find_spec("python_calamine") is not None
+
+def pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def select_engine(file_path: str, streaming: bool = True, engine: Optional[str] = None) -> str:
+    """
+    Motor de leitura da planilha. Sem engine, o mais rápido disponível para o
+    formato; sem streaming, planilhas Excel/ODS são lidas de uma vez pelo pandas.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"Motor de leitura inválido: {engine} (use {', '.join(ENGINES)})")
+
+    format_engine = _FORMAT_ENGINES.get(extension)
+    if format_engine is not None:
+        if engine not in (None, format_engine):
+            raise ValueError(f"Arquivos {extension} só podem ser lidos pelo motor {format_engine}.")
+        if format_engine == "parquet" and not pyarrow_available():
+            raise ValueError("Arquivos Parquet precisam do pacote pyarrow instalado.")
+        return format_engine
+
+    if engine is None:
+        if not streaming:
+            return "pandas"
+        if extension in CALAMINE_EXTENSIONS and calamine_available():
+            return "calamine"
+        if extension in STREAMING_EXTENSIONS:
+            return "openpyxl"
+        return "pandas"
+
+    if engine == "calamine" and not calamine_available():
+        raise ValueError("O motor calamine precisa do pacote python-calamine instalado.")
+    supported = {
+        "calamine": CALAMINE_EXTENSIONS,
+        "openpyxl": STREAMING_EXTENSIONS,
+        "csv": CSV_EXTENSIONS,
+        "parquet": PARQUET_EXTENSIONS,
+    }.get(engine)
+    if supported and extension not in supported:
+        raise ValueError(f"O motor {engine} não lê arquivos {extension or 'sem extensão'}.")
+    return engine
+
+def available_engines(file_path: str) -> List[str]:
+    """Motores instalados que leem o arquivo, em ordem de preferência"""
+    engines = []
+    for engine in ENGINES:
+        try:
+            select_engine(file_path, engine=engine)
+        except ValueError:
+            continue
+        engines.append(engine)
+    return engines
+
+def _header_names(values: List[Any]) -> List[Any]:
+    """Nomes de coluna como o pandas gera: vazios viram "Unnamed: i", repetidos ganham .1, .2..."""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        if value is None or (isinstance(value, str) and value.strip() == ""):
+            value = f"Unnamed: {i}"
+        if value in seen:
+            seen[value] += 1
+            value = f"{value}.{seen[value]}"
+        else:
+            seen[value] = 0
+        names.append(value)
+    return names
+
+def _clean_cell(value: Any) -> Any:
+    if value is None or (isinstance(value, str) and value.strip() in NA_STRINGS):
+        return float("nan")
+    return value
+
+# Cada motor de linhas abre a primeira aba e devolve
+# (linhas, largura, total de linhas com o cabeçalho ou None, função que fecha o arquivo)
+RowSource = Tuple[Iterator[tuple], int, Optional[int], Callable[[], None]]
+
+def _openpyxl_rows(file_path: str) -> RowSource:
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    # Mesma aba que o pandas lê por padrão: a primeira
+    sheet = workbook.worksheets[0]
+    return sheet.iter_rows(values_only=True), sheet.max_column or 0, sheet.max_row, workbook.close
+
+def _calamine_value(value: Any) -> Any:
+    """Valor do calamine como o openpyxl entregaria"""
+    if isinstance(value, str):
+        # Célula vazia
+        return value if value else None
+    if isinstance(value, float):
+        # Números do Excel chegam todos como float; o openpyxl devolve int quando não há casas decimais
+        return int(value) if value.is_integer() else value
+    if type(value) is date:
+        return datetime(value.year, value.month, value.day)
+    return value
+
+def _calamine_rows(file_path: str) -> RowSource:
+    from python_calamine import CalamineWorkbook
+    workbook = CalamineWorkbook.from_path(file_path)
+    sheet = workbook.get_sheet_by_index(0)
+    # iter_rows começa na célula A1, inclusive a área vazia antes dos dados
+    start_row, start_column = sheet.start or (0, 0)
+    rows = (tuple(_calamine_value(value) for value in row) for row in sheet.iter_rows())
+    return rows, start_column + sheet.width, start_row + sheet.height, getattr(workbook, "close", lambda: None)
+
+# Exportações de sistemas no Windows costumam vir em cp1252; latin-1 aceita qualquer byte
+CSV_ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+CSV_DELIMITERS = ",;\t|"
+CSV_SAMPLE_BYTES = 64 * 1024
+
+def detect_csv_format(file_path: str) -> Tuple[str, Any]:
+    """(codificação, dialeto do csv) detectados no início do arquivo"""
+    with open(file_path, "rb") as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = "utf-16"
+        text = sample[:len(sample) - len(sample) % 2].decode(encoding, errors="ignore")
+    else:
+        # Termina o trecho na última quebra de linha, para não cortar um caractere
+        if len(sample) == CSV_SAMPLE_BYTES and b"\n" in sample:
+            sample = sample[:sample.rindex(b"\n") + 1]
+        for encoding in CSV_ENCODINGS:
+            try:
+                text = sample.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+
+    try:
+        dialect = csv.Sniffer().sniff("\n".join(text.splitlines()[:50]), delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        # Uma coluna só (ou nada para comparar): vale a extensão
+        dialect = csv.excel_tab if file_path.lower().endswith(".tsv") else csv.excel
+    return encoding, dialect
+
+def _count_lines(file_path: str) -> int:
+    """Linhas do arquivo (estimativa de total: campos entre aspas podem ter quebras)"""
+    count = 0
+    last = b""
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+            last = block
+    return count + (1 if last and not last.endswith(b"\n") else 0)
+
+def _csv_rows(file_path: str) -> RowSource:
+    encoding, dialect = detect_csv_format(file_path)
+    f = open(file_path, newline="", encoding=encoding)
+    # Sem largura fixa: a largura é a do cabeçalho
+    return csv.reader(f, dialect), 0, _count_lines(file_path), f.close
+
+ROW_ENGINES = {
+    "calamine": _calamine_rows,
+    "openpyxl": _openpyxl_rows,
+    "csv": _csv_rows,
+}
+
+def _parquet_value(value: Any) -> Any:
+    if value is None:
+        return float("nan")
+    if type(value) is date:
+        return datetime(value.year, value.month, value.day)
+    return value
+
+def _parquet_file(file_path: str):
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(file_path)
+
+def _header_row(rows: Iterator[tuple], header_row: int) -> tuple:
+    """Pula até a linha de cabeçalho (1-indexed) e a devolve"""
+    header = next(islice(rows, header_row - 1, None), None)
+    if header is None:
+        raise Exception(f"A linha {header_row} não existe na planilha.")
+    return header
+
+class SpreadsheetReader:
+    """
+    Entrega a planilha em DataFrames de até chunk_size linhas, com os nomes de
+    coluna tirados da linha de cabeçalho do perfil (header_row, 1-indexed).
+
+    total_rows é uma estimativa (dimensão da planilha) e pode ser None.
+    engine é o motor usado (ver select_engine) e parse_time o tempo gasto, em
+    segundos, abrindo a planilha e lendo os blocos já entregues.
+    Em arquivos Parquet não há linha de cabeçalho: header_row é ignorado e os
+    nomes das colunas são os do schema.
+    """
+    def __init__(
+        self,
+        file_path: str,
+        header_row: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_ROWS,
+        streaming: bool = True,
+        engine: Optional[SpreadsheetEngine] = None
+    ):
+        self.file_path = file_path
+        self.header_row = header_row
+        self.chunk_size = chunk_size
+        self.engine = select_engine(file_path, streaming, engine)
+        self.streaming = self.engine != "pandas"
+        self.total_rows: Optional[int] = None
+        self.columns: List[Any] = []
+        self.parse_time = 0.0
+        self._close = None
+        self._rows: Optional[Iterator[tuple]] = None
+        self._df: Optional[pd.DataFrame] = None
+        self._parquet = None
+        self._parquet_names: List[str] = []
+        self._used_columns: Optional[List[int]] = None
+        started = time.perf_counter()
+        try:
+            self._open()
+        finally:
+            self.parse_time += time.perf_counter() - started
+
+    def _open(self):
+        if not self.streaming:
+            self._df = pd.read_excel(self.file_path, header=self.header_row - 1)
+            self.columns = list(self._df.columns)
+            self.total_rows = len(self._df)
+            return
+
+        if self.engine == "parquet":
+            self._parquet = _parquet_file(self.file_path)
+            self._parquet_names = list(self._parquet.schema_arrow.names)
+            self.columns = _header_names(self._parquet_names)
+            self.total_rows = self._parquet.metadata.num_rows
+            self._close = getattr(self._parquet, "close", None)
+            return
+
+        self._rows, width, total, self._close = ROW_ENGINES[self.engine](self.file_path)
+        header = _header_row(self._rows, self.header_row)
+        width = max(len(header), width)
+        self.columns = _header_names(list(header) + [None] * (width - len(header)))
+        if total:
+            self.total_rows = max(0, total - self.header_row)
+
+    def use_columns(self, positions: Iterable[int]):
+        """
+        Limita a leitura às colunas nessas posições (as usadas pelo perfil); as
+        demais chegam vazias. Só o motor parquet deixa de ler as outras colunas.
+        """
+        self._used_columns = sorted({position for position in positions if 0 <= position < len(self.columns)})
+
+    def _iter_parquet(self) -> Iterator[pd.DataFrame]:
+        positions = self._used_columns if self._used_columns is not None else range(len(self.columns))
+        names = [self._parquet_names[position] for position in positions]
+        batches = self._parquet.iter_batches(batch_size=self.chunk_size, columns=names)
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, None)
+            if batch is None:
+                self.parse_time += time.perf_counter() - started
+                return
+            # Valores Python, como os das planilhas (inteiros continuam inteiros)
+            data = {
+                self.columns[position]: pd.Series([_parquet_value(value) for value in batch.column(i).to_pylist()], dtype=object)
+                for i, position in enumerate(positions)
+            }
+            chunk = pd.DataFrame(data, index=pd.RangeIndex(batch.num_rows), columns=self.columns)
+            self.parse_time += time.perf_counter() - started
+            yield chunk
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self._df is not None:
+            for start in range(0, len(self._df), self.chunk_size):
+                yield self._df.iloc[start:start + self.chunk_size]
+            return
+        if self._parquet is not None:
+            yield from self._iter_parquet()
+            return
+
+        width = len(self.columns)
+        while True:
+            started = time.perf_counter()
+            chunk = []
+            for row in self._rows:
+                values = [_clean_cell(value) for value in row[:width]]
+                # Linhas totalmente vazias são ignoradas, como no pandas
+                if all(isinstance(value, float) and value != value for value in values):
+                    continue
+                values.extend([float("nan")] * (width - len(values)))
+                chunk.append(values)
+                if len(chunk) >= self.chunk_size:
+                    break
+            self.parse_time += time.perf_counter() - started
+            if not chunk:
+                return
+            yield pd.DataFrame(chunk, columns=self.columns, dtype=object)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+        self._rows = None
+        self._df = None
+        self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def open_spreadsheet(
+    file_path: str,
+    header_row: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+    streaming: bool = True,
+    engine: Optional[SpreadsheetEngine] = None
+) -> SpreadsheetReader:
+    """Abre a planilha para leitura em blocos (streaming quando o formato permite)"""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    return SpreadsheetReader(file_path, header_row, chunk_size, streaming, engine)
+
+def read_header_row(file_path: str, header_row: int = 1, engine: Optional[SpreadsheetEngine] = None) -> List[Any]:
+    """
+    Valores da linha header_row (1-indexed), completados com None até a
+    largura da planilha. Só o necessário é lido: as linhas até o cabeçalho.
+    Em arquivos Parquet, os nomes das colunas do schema.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    engine = select_engine(file_path, engine=engine)
+    if engine == "parquet":
+        parquet = _parquet_file(file_path)
+        try:
+            return list(parquet.schema_arrow.names)
+        finally:
+            getattr(parquet, "close", lambda: None)()
+    if engine == "pandas":
+        df = pd.read_excel(file_path, header=None)
+        if header_row > len(df):
+            raise Exception(f"A linha {header_row} não existe na planilha.")
+        return [None if pd.isna(value) else value for value in df.iloc[header_row - 1]]
+
+    rows, width, _, close = ROW_ENGINES[engine](file_path)
+    try:
+        header = list(_header_row(rows, header_row))
+    finally:
+        close()
+    return header + [None] * (width - len(header))
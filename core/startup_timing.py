@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Tempo de abertura do aplicativo: custo de cada import e tempo até a primeira janela.
+
+main.py mede seus imports (`with startup.importing("...")`) e as etapas da
+montagem da janela (`with startup.step("...")`) desde o início do script. Quando
+a janela aparece, o relatório guarda o tempo total e quais dependências pesadas
+já tinham sido carregadas (nenhuma deveria: elas são importadas só quando a
+função que as usa é aberta). O tempo anterior ao main.py (extração do
+executável --onefile, início do interpretador) não entra na conta.
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Meta de tempo até a primeira janela, em segundos
+STARTUP_BUDGET = 1.5
+
+# Dependências que não devem ser carregadas antes da primeira janela
+HEAVY_MODULES = ("pandas", "numpy", "fitz", "reportlab", "openpyxl", "requests", "dotenv")
+
+def loaded_heavy_modules() -> List[str]:
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+class StartupReport:
+    """Tempos da abertura, em segundos desde start (perf_counter)"""
+    def __init__(self, start: Optional[float] = None, budget: float = STARTUP_BUDGET):
+        self.start = time.perf_counter() if start is None else start
+        self.budget = budget
+        self.imports: Dict[str, float] = {}
+        self.steps: Dict[str, float] = {}
+        self.first_window: Optional[float] = None
+        self.heavy_modules: List[str] = []
+
+    @contextmanager
+    def importing(self, name: str):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.imports[name] = self.imports.get(name, 0.0) + time.perf_counter() - begin
+
+    @contextmanager
+    def step(self, name: str):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = self.steps.get(name, 0.0) + time.perf_counter() - begin
+
+    def window_shown(self) -> bool:
+        """Marca a primeira janela; False se ela já tinha sido marcada"""
+        if self.first_window is not None:
+            return False
+        self.first_window = time.perf_counter() - self.start
+        self.heavy_modules = loaded_heavy_modules()
+        return True
+
+    @property
+    def over_budget(self) -> bool:
+        return self.first_window is not None and self.first_window > self.budget
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'first_window': round(self.first_window, 6) if self.first_window is not None else None,
+            'budget': self.budget,
+            'over_budget': self.over_budget,
+            'imports': {name: round(value, 6) for name, value in self.imports.items()},
+            'steps': {name: round(value, 6) for name, value in self.steps.items()},
+            'heavy_modules': list(self.heavy_modules),
+        }
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def summary(self) -> str:
+        lines = []
+        if self.first_window is not None:
+            status = "acima da meta" if self.over_budget else "dentro da meta"
+            lines.append(f"Primeira janela: {self.first_window:.2f} s ({status} de {self.budget:.2f} s)")
+        for title, values in (("Import", self.imports), ("Etapa", self.steps)):
+            for name, value in sorted(values.items(), key=lambda item: item[1], reverse=True):
+                lines.append(f"{title} {name}: {value * 1000:.0f} ms")
+        if self.heavy_modules:
+            lines.append(f"Aviso: dependências pesadas carregadas na abertura: {', '.join(self.heavy_modules)}")
+        return "\n".join(lines)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import io
+from typing import Dict, Optional
+import fitz
+from PIL import Image
+
+from models import DocumentProfile, RasterSettings
+from core.raster_cache import RasterCache
+
+def resolve_render_mode(doc: fitz.Document, render_mode: str = "auto") -> str:
+    """
+    Decide entre renderização vetorial e rasterizada para um template aberto.
+
+    O modo vetorial só é possível quando o template é um PDF comum (não
+    criptografado). Nos demais casos, ou quando o perfil pede "raster",
+    a página é rasterizada como antes.
+    """
+    if render_mode == "raster":
+        return "raster"
+    if doc.is_pdf and not doc.needs_pass:
+        return "vector"
+    return "raster"
+
+class TemplateContext:
+    """
+    Template aberto uma única vez e reaproveitado por todas as linhas de um lote.
+
+    No modo vetorial guarda o documento aberto; no modo rasterizado cada página
+    é renderizada na primeira vez em que é pedida e mantida em memória (sem
+    arquivos temporários em disco), com a resolução, as cores e a compressão
+    definidas em document_profile.raster_settings. Os fundos já codificados
+    formam um PDF em memória (page_source), copiado para cada documento sem
+    recomprimir a imagem.
+    As páginas rasterizadas também ficam no cache em disco (raster_cache; por
+    padrão o de data_manager), reaproveitado entre lotes e pela prévia do editor.
+    """
+    def __init__(self, document_profile: DocumentProfile, raster_cache: Optional[RasterCache] = None):
+        self.raster_settings: RasterSettings = getattr(document_profile, 'raster_settings', None) or RasterSettings()
+        self.raster_settings.validate()
+        self.pdf_path = document_profile.pdf_path
+        self.doc = fitz.open(document_profile.pdf_path)
+        self.page_count = len(self.doc)
+        self.render_mode = resolve_render_mode(self.doc, getattr(document_profile, 'render_mode', 'auto'))
+        if raster_cache is None and self.render_mode == "raster":
+            from core.data_manager import data_manager
+            raster_cache = data_manager.raster_cache
+        self.raster_cache = raster_cache
+        self._images: Dict[int, Image.Image] = {}
+        self._encoded: Dict[int, bytes] = {}
+        self._background_doc: Optional[fitz.Document] = None
+        # Páginas rasterizadas vindas do cache em disco / renderizadas agora
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def uses_jpeg(self) -> bool:
+        # JPEG não tem preto e branco de 1 bit; nesse caso o fundo fica sem perdas
+        return self.raster_settings.codec == "jpeg" and self.raster_settings.color != "bilevel"
+
+    def _rasterize(self, page_idx: int) -> Image.Image:
+        settings = self.raster_settings
+        zoom = settings.dpi / 72
+        colorspace = fitz.csRGB if settings.color == "rgb" else fitz.csGRAY
+        pix = self.doc[page_idx].get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+        image = Image.frombytes("RGB" if pix.n == 3 else "L", (pix.width, pix.height), pix.samples)
+        if settings.color == "bilevel":
+            # Limiar simples (sem pontilhado): mantém o texto dos formulários nítido
+            image = image.convert("1", dither=Image.Dither.NONE)
+        return image
+
+    def _render_page(self, page_idx: int) -> Image.Image:
+        image = self._images.get(page_idx)
+        if image is None:
+            if self.raster_cache is None:
+                image = self._rasterize(page_idx)
+                self.cache_misses += 1
+            else:
+                settings = self.raster_settings
+                misses = self.cache_misses
+
+                def render():
+                    self.cache_misses += 1
+                    return self._rasterize(page_idx)
+                image, png = self.raster_cache.get_or_render(
+                    self.pdf_path, page_idx, settings.dpi, settings.color, render
+                )
+                if self.cache_misses == misses:
+                    self.cache_hits += 1
+                if not self.uses_jpeg:
+                    # O PNG do cache já é o fundo codificado sem perdas
+                    self._encoded[page_idx] = png
+            self._images[page_idx] = image
+        return image
+
+    def get_background_image(self, page_idx: int) -> bytes:
+        """
+        Fundo rasterizado já codificado (PNG sem perdas ou JPEG). Com preto e
+        branco o PNG tem 1 bit por pixel.
+        """
+        data = self._encoded.get(page_idx)
+        if data is None:
+            image = self._render_page(page_idx)
+            # Sem perdas, o PNG do cache em disco já serve
+            data = self._encoded.get(page_idx)
+            if data is not None:
+                return data
+            buffer = io.BytesIO()
+            if self.uses_jpeg:
+                image.save(buffer, "JPEG", quality=self.raster_settings.jpeg_quality)
+            else:
+                image.save(buffer, "PNG")
+            data = buffer.getvalue()
+            self._encoded[page_idx] = data
+        return data
+
+    def page_source(self) -> fitz.Document:
+        """
+        Documento de onde vêm as páginas de fundo: o próprio template no modo
+        vetorial; no rasterizado, um PDF montado uma vez com os fundos codificados.
+        """
+        if self.render_mode == "vector":
+            return self.doc
+        if self._background_doc is None:
+            background_doc = fitz.open()
+            for page_idx in range(self.page_count):
+                rect = self.doc[page_idx].rect
+                page = background_doc.new_page(width=rect.width, height=rect.height)
+                page.insert_image(page.rect, stream=self.get_background_image(page_idx), keep_proportion=False)
+            # Reaberto já comprimido: as cópias para os documentos levam o
+            # fluxo da imagem como está, sem comprimir de novo a cada documento
+            self._background_doc = fitz.open("pdf", background_doc.tobytes(garbage=1, deflate=True))
+            background_doc.close()
+        return self._background_doc
+
+    def close(self):
+        self._images.clear()
+        self._encoded.clear()
+        if self._background_doc is not None:
+            self._background_doc.close()
+            self._background_doc = None
+        self.doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
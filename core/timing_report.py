@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Tempo gasto em cada etapa da geração e contadores do lote.
+
+Cada etapa acumula o tempo de relógio (perf_counter) e o de CPU da thread
+(thread_time). Em lotes com vários processos, cada processo mede as suas
+etapas e os relatórios são somados no processo principal: os tempos das
+etapas são então a soma dos processos e podem passar do tempo total do lote.
+"""
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Literal, Optional
+
+from core.memory_profile import MemoryProfile
+
+StageName = Literal["reading", "formatting", "background", "drawing", "canvas_save", "composing", "saving"]
+
+STAGE_LABELS = {
+    "reading": "Leitura da planilha",
+    "formatting": "Formatação dos valores",
+    "background": "Fundo do template",
+    "drawing": "Desenho do texto",
+    "canvas_save": "Fechamento da camada de texto",
+    "composing": "Montagem das páginas",
+    "saving": "Gravação dos PDFs",
+}
+
+COUNTER_LABELS = {
+    "rows": "linhas lidas",
+    "documents": "documentos",
+    "pages": "páginas",
+    "bytes_written": "bytes gravados",
+    "cache_hits": "páginas do cache",
+    "cache_misses": "páginas rasterizadas",
+    "orphans_removed": "PDFs sem linha apagados",
+}
+
+INFO_LABELS = {
+    "spreadsheet_engine": "Motor de leitura da planilha",
+}
+
+@dataclass
+class StageTiming:
+    wall: float = 0.0  # segundos de relógio
+    cpu: float = 0.0  # segundos de CPU da thread
+    calls: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'wall': round(self.wall, 6), 'cpu': round(self.cpu, 6), 'calls': self.calls}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(wall=data.get('wall', 0.0), cpu=data.get('cpu', 0.0), calls=data.get('calls', 0))
+
+class _StageClock:
+    """Mede um trecho com `with report.stage("...")`"""
+    __slots__ = ("report", "name", "wall", "cpu")
+
+    def __init__(self, report: "TimingReport", name: str):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        if self.report.memory is not None:
+            self.report.memory.enter_stage(self.name)
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.report.add(self.name, time.perf_counter() - self.wall, time.thread_time() - self.cpu)
+        if self.report.memory is not None:
+            self.report.memory.exit_stage(self.name)
+
+class _NoClock:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+_NO_CLOCK = _NoClock()
+
+class TimingReport:
+    """
+    Tempos por etapa e contadores (linhas, páginas, bytes gravados, acertos do
+    cache de fundos). Com enabled=False nada é medido (ver DISABLED).
+    Com memory (core.memory_profile), cada etapa também registra a memória.
+    info guarda dados descritivos do lote (ex.: o motor de leitura da planilha).
+    """
+    def __init__(self, enabled: bool = True, memory: Optional[MemoryProfile] = None):
+        self.enabled = enabled
+        self.memory = memory if enabled else None
+        self.stages: Dict[str, StageTiming] = {}
+        self.counters: Dict[str, int] = {}
+        self.info: Dict[str, Any] = {}
+        self.total_wall = 0.0  # duração do lote inteiro, definida ao final
+
+    def stage(self, name: StageName):
+        return _StageClock(self, name) if self.enabled else _NO_CLOCK
+
+    def add(self, name: str, wall: float, cpu: float, calls: int = 1):
+        if not self.enabled:
+            return
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming()
+        timing.wall += wall
+        timing.cpu += cpu
+        timing.calls += calls
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled and value:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def note(self, name: str, value: Any):
+        if self.enabled:
+            self.info[name] = value
+
+    def merge(self, other: "TimingReport"):
+        """Soma os tempos e contadores de outro relatório (ex.: de um processo do pool)"""
+        for name, timing in other.stages.items():
+            self.add(name, timing.wall, timing.cpu, timing.calls)
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'total_wall': round(self.total_wall, 6),
+            'stages': {name: timing.to_dict() for name, timing in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+        if self.info:
+            data['info'] = dict(self.info)
+        if self.memory is not None:
+            data['memory'] = self.memory.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        report = cls()
+        report.total_wall = data.get('total_wall', 0.0)
+        report.stages = {name: StageTiming.from_dict(timing) for name, timing in data.get('stages', {}).items()}
+        report.counters = dict(data.get('counters', {}))
+        report.info = dict(data.get('info', {}))
+        if data.get('memory'):
+            report.memory = MemoryProfile.from_dict(data['memory'])
+        return report
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def summary(self) -> str:
+        """Resumo em texto, uma etapa por linha (da mais demorada para a mais rápida)"""
+        lines = []
+        if self.total_wall:
+            lines.append(f"Tempo total: {self.total_wall:.2f} s")
+        for name, timing in sorted(self.stages.items(), key=lambda item: item[1].wall, reverse=True):
+            share = f" ({timing.wall / self.total_wall:.0%})" if self.total_wall else ""
+            lines.append(f"{STAGE_LABELS.get(name, name)}: {timing.wall:.2f} s{share}, CPU {timing.cpu:.2f} s")
+        if self.counters:
+            lines.append(", ".join(
+                f"{value:,} {COUNTER_LABELS.get(name, name)}".replace(",", ".")
+                for name, value in self.counters.items()
+            ))
+        lines.extend(f"{INFO_LABELS.get(name, name)}: {value}" for name, value in self.info.items())
+        if self.memory is not None:
+            lines.extend(self.memory.summary_lines(STAGE_LABELS))
+        return "\n".join(lines)
+
+# Relatório que não mede nada: padrão das funções de geração chamadas sem relatório
+DISABLED = TimingReport(enabled=False)
@@ -1,16 +1,20 @@
 # -*- coding: utf-8 -*-
-from .spreadsheet_profile_frame import SpreadsheetProfileFrame
-from .spreadsheet_profile_list_frame import SpreadsheetProfileListFrame
-from .document_profile_frame import DocumentProfileFrame
-from .document_profile_list_frame import DocumentProfileListFrame
-from .batch_generation_frame import BatchGenerationFrame
-from .pdf_list_frame import PdfListFrame
+# Cada tela é importada só quando usada pela primeira vez: algumas carregam
+# dependências pesadas (PyMuPDF no editor de documentos, pandas nas planilhas)
+_FRAME_MODULES = {
+    'SpreadsheetProfileFrame': 'spreadsheet_profile_frame',
+    'SpreadsheetProfileListFrame': 'spreadsheet_profile_list_frame',
+    'DocumentProfileFrame': 'document_profile_frame',
+    'DocumentProfileListFrame': 'document_profile_list_frame',
+    'BatchGenerationFrame': 'batch_generation_frame',
+    'PdfListFrame': 'pdf_list_frame'
+}
 
-__all__ = [
-    'SpreadsheetProfileFrame',
-    'SpreadsheetProfileListFrame',
-    'DocumentProfileFrame',
-    'DocumentProfileListFrame',
-    'BatchGenerationFrame',
-    'PdfListFrame'
-]
+__all__ = list(_FRAME_MODULES)
+
+def __getattr__(name):
+    module_name = _FRAME_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    return getattr(import_module(f".{module_name}", __name__), name)
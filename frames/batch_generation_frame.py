@@ -8,11 +8,23 @@ import os
 
 from models import DocumentProfile, SpreadsheetProfile
 from core.data_manager import data_manager
-from utils import select_file
-from core.pdf_generator import batch_generate_pdfs
+from utils import select_file, SPREADSHEET_FILE_TYPES
+from core.parallel import default_worker_count
+from core.batch_job import BatchJob, BatchCancelled, ProgressEvent
+from core.memory_profile import MemoryProfile
+from core.timing_report import TimingReport
 from utils.threading_utils import WorkerThread
 
 class BatchGenerationFrame(ctk.CTkFrame):
+    WORKERS_AUTO = "Automático"
+    # Rótulo exibido → opções de saída de batch_generate_pdfs
+    OUTPUT_MODES = {
+        "Arquivos separados": {"output_mode": "files"},
+        "PDF único": {"output_mode": "merged"},
+        "ZIP": {"output_mode": "zip", "zip_compression": "store"},
+        "ZIP compactado": {"output_mode": "zip", "zip_compression": "deflate"},
+    }
+
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         self.grid_columnconfigure(0, weight=1)
@@ -23,6 +35,9 @@ class BatchGenerationFrame(ctk.CTkFrame):
         self.spreadsheet_profile: Optional[SpreadsheetProfile] = None
         self.spreadsheet_path: Optional[str] = None
         self.status_var = ctk.StringVar(value="Pronto para gerar.")
+        self.job: Optional[BatchJob] = None
+        # Mensagem do último evento "finished" do lote (ex.: PDFs mantidos ou apagados)
+        self.finished_message: Optional[str] = None
 
         # --- Widgets ---
         ctk.CTkLabel(self, text="Geração de Documentos em Lote", font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
@@ -56,9 +71,13 @@ class BatchGenerationFrame(ctk.CTkFrame):
         self.date_select_frame.grid(row=3, column=0, padx=20, pady=10, sticky="ew")
         self.date_select_frame.grid_columnconfigure(0, weight=1)
         self.date_select_frame.grid_columnconfigure(1, weight=1)
+        self.date_select_frame.grid_columnconfigure(2, weight=1)
+        self.date_select_frame.grid_columnconfigure(3, weight=1)
 
         ctk.CTkLabel(self.date_select_frame, text="Mês Base:").grid(row=0, column=0, padx=10, pady=(10, 0), sticky="w")
         ctk.CTkLabel(self.date_select_frame, text="Ano Base:").grid(row=0, column=1, padx=10, pady=(10, 0), sticky="w")
+        ctk.CTkLabel(self.date_select_frame, text="Processos:").grid(row=0, column=2, padx=10, pady=(10, 0), sticky="w")
+        ctk.CTkLabel(self.date_select_frame, text="Saída:").grid(row=0, column=3, padx=10, pady=(10, 0), sticky="w")
 
         # Month Select
         try:
@@ -82,6 +101,27 @@ class BatchGenerationFrame(ctk.CTkFrame):
         self.year_select.set(str(current_year))
         self.year_select.grid(row=1, column=1, padx=10, pady=(0, 10), sticky="ew")
 
+        # Worker Count Select (Automático = um processo por núcleo)
+        worker_options = [self.WORKERS_AUTO] + [str(n) for n in range(1, default_worker_count() + 1)]
+        self.workers_select = ctk.CTkOptionMenu(self.date_select_frame, values=worker_options)
+        self.workers_select.set(self.WORKERS_AUTO)
+        self.workers_select.grid(row=1, column=2, padx=10, pady=(0, 10), sticky="ew")
+
+        # Output Mode Select (PDF único = todos os documentos em um arquivo, com marcadores)
+        self.output_mode_select = ctk.CTkOptionMenu(self.date_select_frame, values=list(self.OUTPUT_MODES))
+        self.output_mode_select.set("Arquivos separados")
+        self.output_mode_select.grid(row=1, column=3, padx=10, pady=(0, 10), sticky="ew")
+
+        # Relatório de tempos por etapa, gravado em JSON junto dos PDFs
+        self.save_timing_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.date_select_frame, text="Salvar relatório de tempos (JSON)", variable=self.save_timing_var).grid(row=2, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="w")
+        # Perfil de memória: mais lento, para investigar lotes que esgotam a memória
+        self.profile_memory_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.date_select_frame, text="Medir memória (mais lento)", variable=self.profile_memory_var).grid(row=2, column=2, columnspan=2, padx=10, pady=(0, 10), sticky="w")
+        # Limpeza opcional (confirmada ao gerar): PDFs do lote sem linha na planilha
+        self.prune_orphans_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.date_select_frame, text="Apagar PDFs de linhas removidas ou renomeadas", variable=self.prune_orphans_var).grid(row=3, column=0, columnspan=4, padx=10, pady=(0, 10), sticky="w")
+
         # 4. Generate Button
         self.generate_button = ctk.CTkButton(self, text="GERAR DOCUMENTOS EM LOTE", command=self._generate, state="disabled")
         self.generate_button.grid(row=4, column=0, padx=20, pady=20, sticky="ew")
@@ -125,7 +165,7 @@ class BatchGenerationFrame(ctk.CTkFrame):
             self._update_generate_button_state()
 
     def _select_spreadsheet(self):
-        file_path = select_file([("Arquivos Excel", "*.xlsx *.xls")])
+        file_path = select_file(SPREADSHEET_FILE_TYPES)
         if file_path:
             self.spreadsheet_path = file_path
             self.file_path_label.configure(text=f"Arquivo Selecionado: {os.path.basename(file_path)}")
@@ -139,7 +179,31 @@ class BatchGenerationFrame(ctk.CTkFrame):
 
     def _update_status(self, message: str):
         self.status_var.set(message)
-        self.update_idletasks() # Force GUI update
+
+    def _on_progress(self, event: ProgressEvent):
+        """Eventos do lote (já limitados a poucas atualizações por segundo)"""
+        message = event.message
+        if event.stage == "generating" and event.rate > 0:
+            message += f"  ({event.rate:.0f} linhas/s"
+            if event.eta is not None:
+                minutes, seconds = divmod(int(event.eta), 60)
+                message += f", restam ~{minutes:02d}:{seconds:02d}"
+            message += ")"
+        self._update_status(message)
+        if event.stage == "finished":
+            self.finished_message = event.message
+
+        fraction = event.fraction
+        if fraction is not None and hasattr(self, 'progressbar'):
+            if self.progressbar.cget("mode") != "determinate":
+                self.progressbar.stop()
+                self.progressbar.configure(mode="determinate")
+            self.progressbar.set(fraction)
+
+    def _cancel_generation(self):
+        if self.job:
+            self.job.cancel()
+            self.generate_button.configure(state="disabled", text="CANCELANDO...")
 
     def _generate(self):
         if not self.selected_document_profile or not self.spreadsheet_profile or not self.spreadsheet_path:
@@ -179,16 +243,39 @@ class BatchGenerationFrame(ctk.CTkFrame):
                 messagebox.showerror("Erro de Data", f"Combinação de Mês/Ano inválida: {e}")
                 return
 
-        self.generate_button.configure(state="disabled", text="GERANDO...")
+        # O motor de geração (pandas, PyMuPDF, ReportLab) só é carregado no primeiro lote
+        from core.pdf_generator import batch_generate_pdfs
+
+        workers_value = self.workers_select.get()
+        workers = None if workers_value == self.WORKERS_AUTO else int(workers_value)
+
+        output_options = self.OUTPUT_MODES[self.output_mode_select.get()]
+        prune_orphans = self.prune_orphans_var.get() and output_options["output_mode"] == "files"
+        if prune_orphans and not messagebox.askyesno(
+            "Apagar PDFs antigos",
+            "Os PDFs que este lote gerou para linhas que saíram da planilha ou mudaram de nome "
+            "serão apagados da pasta de saída. Deseja continuar?"
+        ):
+            return
+        self.finished_message = None
+
+        # Durante a geração o botão passa a cancelar o lote
+        self.generate_button.configure(state="normal", text="CANCELAR GERAÇÃO", command=self._cancel_generation)
         self._update_status("Iniciando geração...")
         
+        # Indeterminada até o total de linhas ser conhecido
         self.progressbar = ctk.CTkProgressBar(self.status_frame, orientation="horizontal", mode="indeterminate")
         self.progressbar.grid(row=2, column=0, pady=0, padx=20, sticky="ew")
         self.progressbar.start()
 
+        timing = TimingReport(memory=MemoryProfile() if self.profile_memory_var.get() else None)
+        self.job = BatchJob(on_progress=lambda event: self.after(0, lambda: self._on_progress(event)), timing=timing)
+
         # Define callbacks for the worker thread
+        job = self.job
+
         def on_finish(generated_count):
-            self.after(0, lambda: self._on_generation_success(generated_count))
+            self.after(0, lambda: self._on_generation_success(generated_count, job.timing))
 
         def on_error(error):
             self.after(0, lambda: self._on_generation_error(error))
@@ -200,29 +287,51 @@ class BatchGenerationFrame(ctk.CTkFrame):
                 "spreadsheet_path": self.spreadsheet_path,
                 "document_profile": self.selected_document_profile,
                 "spreadsheet_profile": self.spreadsheet_profile,
-                "status_callback": lambda msg: self.after(0, lambda: self._update_status(msg)),
-                "base_date": base_date
+                "status_callback": None,
+                "base_date": base_date,
+                "workers": workers,
+                "job": self.job,
+                "save_timing": self.save_timing_var.get(),
+                "prune_orphans": prune_orphans,
+                **output_options
             },
             on_finish=on_finish,
             on_error=on_error
         )
         worker.start()
 
-    def _on_generation_success(self, generated_count):
+    def _reset_generate_button(self):
+        self.job = None
         self.progressbar.destroy()
-        self.generate_button.configure(state="normal", text="GERAR DOCUMENTOS EM LOTE")
+        self.generate_button.configure(state="normal", text="GERAR DOCUMENTOS EM LOTE", command=self._generate)
         self._update_generate_button_state()
+
+    def _on_generation_success(self, generated_count, timing=None):
+        self._reset_generate_button()
+        # A mensagem do lote diz também quantos PDFs foram mantidos ou apagados
+        message = self.finished_message or f"Geração concluída! {generated_count} PDFs criados."
+        if timing is not None:
+            # Onde o tempo do lote foi gasto, etapa por etapa
+            self._update_status(f"{message}\n{timing.summary()}")
         
-        messagebox.showinfo("Sucesso", f"Geração concluída! {generated_count} PDFs criados.")
+        messagebox.showinfo("Sucesso", message)
+        if timing is not None and timing.memory is not None and timing.memory.warnings:
+            messagebox.showwarning("Memória", "\n\n".join(timing.memory.warnings))
         
         # Notify main app to refresh PDF list
         if hasattr(self.master, 'refresh_data'):
             self.master.refresh_data()
 
     def _on_generation_error(self, error):
-        self.progressbar.destroy()
-        self.generate_button.configure(state="normal", text="GERAR DOCUMENTOS EM LOTE")
-        self._update_generate_button_state()
+        self._reset_generate_button()
+
+        if isinstance(error, BatchCancelled):
+            message = f"Geração cancelada. {error.generated_count} PDFs criados."
+            self._update_status(message)
+            messagebox.showinfo("Geração Cancelada", message)
+            if hasattr(self.master, 'refresh_data'):
+                self.master.refresh_data()
+            return
         
         messagebox.showerror("Erro de Geração", str(error))
         self._update_status(f"Erro: {error}")
@@ -3,8 +3,9 @@ import customtkinter as ctk
 from tkinter import messagebox
 import os
 from typing import List, Optional
-from models import DocumentProfile, SpreadsheetProfile, PdfFieldMapping, TextStyle, PageFormat, PageOrientation
+from models import DocumentProfile, SpreadsheetProfile, PdfFieldMapping, TextStyle, PageFormat, PageOrientation, RenderMode, RasterSettings
 from core.data_manager import data_manager
+from core.output_names import FilenamePattern
 from utils import select_file, render_pdf_to_image, get_pdf_page_count, get_page_size_mm, WorkerThread
 from PIL import Image, ImageTk
 import threading
@@ -21,6 +22,20 @@ class DocumentProfileFrame(ctk.CTkFrame):
         (strings.DOC_ORIENTATION_PORTRAIT, "portrait"),
         (strings.DOC_ORIENTATION_LANDSCAPE, "landscape")
     ]
+    RENDER_MODES = [
+        (strings.DOC_RENDER_MODE_AUTO, "auto"),
+        (strings.DOC_RENDER_MODE_VECTOR, "vector"),
+        (strings.DOC_RENDER_MODE_RASTER, "raster")
+    ]
+    RASTER_COLORS = [
+        (strings.DOC_RASTER_COLOR_RGB, "rgb"),
+        (strings.DOC_RASTER_COLOR_GRAY, "gray"),
+        (strings.DOC_RASTER_COLOR_BILEVEL, "bilevel")
+    ]
+    RASTER_CODECS = [
+        (strings.DOC_RASTER_CODEC_FLATE, "flate"),
+        (strings.DOC_RASTER_CODEC_JPEG, "jpeg")
+    ]
 
     def _set_text_wrap(self, text: str, max_len=30):
         if len(text) > max_len:
@@ -55,8 +70,11 @@ class DocumentProfileFrame(ctk.CTkFrame):
         self.total_pages = 0
         self.page_format: PageFormat = "A4"
         self.page_orientation: PageOrientation = "portrait"
+        self.render_mode: RenderMode = "auto"
+        self.raster_settings = RasterSettings()
         
         self.document_profile_name_var = ctk.StringVar()
+        self.filename_pattern_var = ctk.StringVar()
         self.available_spreadsheet_profiles: List[SpreadsheetProfile] = []
         self.field_mappings: List[PdfFieldMapping] = []
         
@@ -106,6 +124,12 @@ class DocumentProfileFrame(ctk.CTkFrame):
                                                    command=self._on_select_to_title)
         self.title_column_menu.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
 
+        ctk.CTkLabel(self.profile_select_frame, text=strings.DOC_FILENAME_PATTERN).grid(row=4, column=0, padx=10, pady=0, sticky="w")
+        self.filename_pattern_entry = ctk.CTkEntry(self.profile_select_frame,
+                                                   placeholder_text=strings.DOC_FILENAME_PATTERN_PLACEHOLDER,
+                                                   textvariable=self.filename_pattern_var)
+        self.filename_pattern_entry.grid(row=5, column=0, padx=10, pady=(0, 10), sticky="ew")
+
         # Page Format Frame
         self.format_frame = ctk.CTkFrame(self.wrapper)
         self.format_frame.grid(row=3, column=0, padx=20, pady=(0, 10), sticky="ew")
@@ -131,6 +155,44 @@ class DocumentProfileFrame(ctk.CTkFrame):
             command=self._on_page_orientation_change
         )
         self.page_orientation_menu.grid(row=1, column=1, padx=10, pady=(0, 10), sticky="ew")
+
+        # Modo de renderização e fundo rasterizado
+        ctk.CTkLabel(self.format_frame, text=strings.DOC_RENDER_MODE).grid(row=2, column=0, padx=10, pady=(5, 0), sticky="w")
+        self.render_mode_var = ctk.StringVar(value=strings.DOC_RENDER_MODE_AUTO)
+        self.render_mode_menu = ctk.CTkOptionMenu(
+            self.format_frame,
+            variable=self.render_mode_var,
+            values=[label for label, _ in self.RENDER_MODES]
+        )
+        self.render_mode_menu.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
+
+        ctk.CTkLabel(self.format_frame, text=strings.DOC_RASTER_DPI).grid(row=2, column=1, padx=10, pady=(5, 0), sticky="w")
+        self.raster_dpi_var = ctk.StringVar(value=str(RasterSettings.dpi))
+        self.raster_dpi_entry = ctk.CTkEntry(self.format_frame, textvariable=self.raster_dpi_var)
+        self.raster_dpi_entry.grid(row=3, column=1, padx=10, pady=(0, 10), sticky="ew")
+
+        ctk.CTkLabel(self.format_frame, text=strings.DOC_RASTER_COLOR).grid(row=4, column=0, padx=10, pady=(5, 0), sticky="w")
+        self.raster_color_var = ctk.StringVar(value=strings.DOC_RASTER_COLOR_RGB)
+        self.raster_color_menu = ctk.CTkOptionMenu(
+            self.format_frame,
+            variable=self.raster_color_var,
+            values=[label for label, _ in self.RASTER_COLORS]
+        )
+        self.raster_color_menu.grid(row=5, column=0, padx=10, pady=(0, 10), sticky="ew")
+
+        ctk.CTkLabel(self.format_frame, text=strings.DOC_RASTER_CODEC).grid(row=4, column=1, padx=10, pady=(5, 0), sticky="w")
+        self.raster_codec_var = ctk.StringVar(value=strings.DOC_RASTER_CODEC_FLATE)
+        self.raster_codec_menu = ctk.CTkOptionMenu(
+            self.format_frame,
+            variable=self.raster_codec_var,
+            values=[label for label, _ in self.RASTER_CODECS]
+        )
+        self.raster_codec_menu.grid(row=5, column=1, padx=10, pady=(0, 10), sticky="ew")
+
+        ctk.CTkLabel(self.format_frame, text=strings.DOC_RASTER_JPEG_QUALITY).grid(row=6, column=0, padx=10, pady=(5, 0), sticky="w")
+        self.raster_quality_var = ctk.StringVar(value=str(RasterSettings.jpeg_quality))
+        self.raster_quality_entry = ctk.CTkEntry(self.format_frame, textvariable=self.raster_quality_var)
+        self.raster_quality_entry.grid(row=7, column=0, padx=10, pady=(0, 10), sticky="ew")
               
         # Mapping Area Frame
         self.mapping_area_frame = ctk.CTkFrame(self.wrapper)
@@ -293,7 +355,7 @@ class DocumentProfileFrame(ctk.CTkFrame):
     def _load_profile_data_worker(self, profile: DocumentProfile):
         """Função para carregar dados pesados em background"""
         total_pages = get_pdf_page_count(profile.pdf_path)
-        pdf_image = render_pdf_to_image(profile.pdf_path, 0, dpi=150)
+        pdf_image = render_pdf_to_image(profile.pdf_path, 0, dpi=150, cache=data_manager.raster_cache)
         return total_pages, pdf_image
 
     def _on_profile_load_finished(self, result, profile: DocumentProfile, progress_dialog: Optional[ProgressDialog]):
@@ -323,6 +385,10 @@ class DocumentProfileFrame(ctk.CTkFrame):
         self.field_mappings = profile.field_mappings
         self.page_format = profile.page_format
         self.page_orientation = profile.page_orientation
+        self.render_mode = profile.render_mode
+        self.raster_settings = profile.raster_settings
+        self.filename_pattern_var.set(profile.filename_pattern)
+        self._show_render_settings()
         
         self.page_format_var.set(self.page_format)
         for label, orientation in self.PAGE_ORIENTATIONS:
@@ -427,7 +493,7 @@ class DocumentProfileFrame(ctk.CTkFrame):
 
     def _on_pdf_selected_worker(self, pdf_path):
         total_pages = get_pdf_page_count(pdf_path)
-        pdf_image = render_pdf_to_image(pdf_path, 0, dpi=150)
+        pdf_image = render_pdf_to_image(pdf_path, 0, dpi=150, cache=data_manager.raster_cache)
         return total_pages, pdf_image
 
     def _on_pdf_selected_finished(self, result, pdf_path, progress_dialog):
@@ -478,7 +544,7 @@ class DocumentProfileFrame(ctk.CTkFrame):
 
 
     def _render_pdf_image_worker(self, pdf_path, page_index):
-        return render_pdf_to_image(pdf_path, page_index, dpi=150)
+        return render_pdf_to_image(pdf_path, page_index, dpi=150, cache=data_manager.raster_cache)
 
     def _on_render_finished(self, pdf_image, progress_dialog):
         self.pdf_image = pdf_image
@@ -720,7 +786,11 @@ class DocumentProfileFrame(ctk.CTkFrame):
         self.current_page_index = 0
         self.total_pages = 0
         self.field_mappings = []
+        self.render_mode = "auto"
+        self.raster_settings = RasterSettings()
+        self._show_render_settings()
         self.document_profile_name_var.set("")
+        self.filename_pattern_var.set("")
         self.label_values["to_spreadsheed"].set(strings.DOC_SELECT_SPREADSHEET_PROFILE)
         self.label_values["to_title"].set(strings.DOC_SELECT_COLUMN)
         self.label_values["to_map"].set(strings.DOC_SELECT_COLUMN)
@@ -739,6 +809,49 @@ class DocumentProfileFrame(ctk.CTkFrame):
         self._update_mapping_display()
         self._load_profiles()
 
+    @staticmethod
+    def _label_for(options, value):
+        for label, option in options:
+            if option == value:
+                return label
+        return options[0][0]
+
+    @staticmethod
+    def _value_for(options, label):
+        for option_label, value in options:
+            if option_label == label:
+                return value
+        return options[0][1]
+
+    def _show_render_settings(self):
+        """Mostra o modo de renderização e o fundo rasterizado do perfil nos controles"""
+        self.render_mode_var.set(self._label_for(self.RENDER_MODES, self.render_mode))
+        self.raster_dpi_var.set(str(self.raster_settings.dpi))
+        self.raster_color_var.set(self._label_for(self.RASTER_COLORS, self.raster_settings.color))
+        self.raster_codec_var.set(self._label_for(self.RASTER_CODECS, self.raster_settings.codec))
+        self.raster_quality_var.set(str(self.raster_settings.jpeg_quality))
+
+    def _read_render_settings(self):
+        """Lê os controles de renderização; levanta ValueError se algum valor for inválido"""
+        dpi = self.raster_dpi_var.get().strip()
+        quality = self.raster_quality_var.get().strip()
+        try:
+            dpi = int(dpi)
+        except ValueError:
+            raise ValueError(f"Resolução inválida para o fundo rasterizado: {dpi or '(vazio)'} DPI")
+        try:
+            quality = int(quality)
+        except ValueError:
+            raise ValueError(f"Qualidade JPEG inválida: {quality or '(vazio)'} (use um valor de 1 a 95)")
+        raster_settings = RasterSettings(
+            dpi=dpi,
+            color=self._value_for(self.RASTER_COLORS, self.raster_color_var.get()),
+            codec=self._value_for(self.RASTER_CODECS, self.raster_codec_var.get()),
+            jpeg_quality=quality
+        ).validate()
+        self.render_mode = self._value_for(self.RENDER_MODES, self.render_mode_var.get())
+        self.raster_settings = raster_settings
+
     def _save_profile(self, is_editing=False):
         profile_name = self.document_profile_name_var.get().strip()
         spreadsheet_profile_name = self.real_values["to_spreadsheed"]
@@ -759,6 +872,20 @@ class DocumentProfileFrame(ctk.CTkFrame):
             messagebox.showerror(strings.ERROR_TITLE, strings.ERROR_NO_MAPPINGS)
             return
 
+        filename_pattern = self.filename_pattern_var.get().strip()
+        if filename_pattern:
+            try:
+                FilenamePattern(filename_pattern)
+            except ValueError as e:
+                messagebox.showerror(strings.ERROR_TITLE, str(e))
+                return
+
+        try:
+            self._read_render_settings()
+        except ValueError as e:
+            messagebox.showerror(strings.ERROR_TITLE, str(e))
+            return
+
         if not is_editing:
             existing_profiles = data_manager.load_profiles(DocumentProfile)
             if any(p.name == profile_name for p in existing_profiles):
@@ -772,7 +899,10 @@ class DocumentProfileFrame(ctk.CTkFrame):
             title_column=self.real_values["to_title"],
             field_mappings=self.field_mappings,
             page_format=self.page_format,
-            page_orientation=self.page_orientation
+            page_orientation=self.page_orientation,
+            render_mode=self.render_mode,
+            filename_pattern=filename_pattern,
+            raster_settings=self.raster_settings
         )
         data_manager.save_profile(profile)
         
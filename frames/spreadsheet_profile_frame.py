@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
 import customtkinter as ctk
 from tkinter import messagebox
-import pandas as pd
 import os
 from typing import List, Optional
 
 from models import SpreadsheetProfile, ColumnMapping, ColumnType
 from core.data_manager import data_manager
-from utils import select_file, read_spreadsheet_headers
+from utils import select_file, SPREADSHEET_FILE_TYPES
 from utils.scroll_helper import bind_mousewheel_to_scrollable_frame
 from resources.strings import strings
 
@@ -83,7 +82,7 @@ class SpreadsheetProfileFrame(ctk.CTkFrame):
         self._update_mapping_display()
 
     def _select_file(self):
-        file_path = select_file([(strings.FILE_FILTERS_EXCEL, "*.xlsx *.xls")])
+        file_path = select_file(SPREADSHEET_FILE_TYPES)
         if file_path:
             self.file_path = file_path
             self._load_columns_from_file()
@@ -96,6 +95,8 @@ class SpreadsheetProfileFrame(ctk.CTkFrame):
         if not self.file_path:
             return
         try:
+            # Importado aqui: carrega o pandas, só necessário ao abrir uma planilha
+            from utils import read_spreadsheet_headers
             header_row_idx = int(self.header_row_var.get()) - 1
             headers = read_spreadsheet_headers(self.file_path, header_row_idx)
             self.column_mappings = [
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import time
+_STARTUP_START = time.perf_counter()
+
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 import webbrowser
 
@@ -14,8 +18,6 @@ def update_splash_status(text):
     # Texto de carregamento removido conforme solicitado
     print(f"Loading: {text}")
 
-from dialogs.license_dialog import LicenseDialog
-
 # Ajuste para PyInstaller --onefile
 if getattr(sys, 'frozen', False):
     # Se estiver rodando como executável, o diretório base é o sys._MEIPASS
@@ -27,29 +29,45 @@ else:
 if base_path not in sys.path:
     sys.path.insert(0, base_path)
 
-import customtkinter as ctk
+from core.startup_timing import StartupReport
+
+# Tempos da abertura; com --tempos-inicio são exibidos e salvos quando a janela aparece
+startup = StartupReport(start=_STARTUP_START)
+SHOW_STARTUP_REPORT = "--tempos-inicio" in sys.argv
+
+with startup.importing("customtkinter"):
+    import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox, filedialog
 from typing import Optional
 from PIL import Image
 
-from core.data_manager import data_manager
-from core.license_manager import license_manager
-from frames import (
-    SpreadsheetProfileFrame,
-    SpreadsheetProfileListFrame,
-    DocumentProfileFrame,
-    DocumentProfileListFrame,
-    BatchGenerationFrame,
-    PdfListFrame
-)
+with startup.importing("core.data_manager"):
+    from core.data_manager import data_manager
+with startup.importing("core.license_manager"):
+    from core.license_manager import license_manager
+with startup.importing("frames"):
+    # Só o pacote: cada tela é importada ao ser criada (ver App._frame)
+    import frames
 from models import SpreadsheetProfile
-from dialogs import ProgressDialog
+with startup.importing("dialogs"):
+    from dialogs import ProgressDialog, LicenseDialog
 from resources.strings import strings
 import threading
 
 
 class App(ctk.CTk):
+    # Telas: atributo → classe em frames. Só a lista de PDFs é criada na
+    # abertura; as outras são criadas na primeira navegação até elas
+    FRAMES = {
+        "spreadsheet_list_frame": "SpreadsheetProfileListFrame",
+        "spreadsheet_create_frame": "SpreadsheetProfileFrame",
+        "document_list_frame": "DocumentProfileListFrame",
+        "document_create_frame": "DocumentProfileFrame",
+        "batch_frame": "BatchGenerationFrame",
+        "list_frame": "PdfListFrame"
+    }
+
     def __init__(self):
         super().__init__()
         # Não usamos withdraw() aqui para evitar que o Windows encerre o processo
@@ -191,21 +209,21 @@ class App(ctk.CTk):
         self.author_link.bind("<Button-1>", lambda e: webbrowser.open_new_tab(strings.OWNER_WEBSITE))
 
         # --- Frames ---
-        self.spreadsheet_list_frame = SpreadsheetProfileListFrame(self, fg_color="transparent")
-        self.spreadsheet_create_frame = SpreadsheetProfileFrame(self, fg_color="transparent")
-        self.document_list_frame = DocumentProfileListFrame(self, fg_color="transparent")
-        self.document_create_frame = DocumentProfileFrame(self, fg_color="transparent")
-        self.batch_frame = BatchGenerationFrame(self, fg_color="transparent")
-        self.list_frame = PdfListFrame(self, fg_color="transparent")
+        self._frames = {}
 
         update_splash_status("Carregando logo...")
-        self.load_logo()
+        with startup.step("logo"):
+            self.load_logo()
         
         update_splash_status("Iniciando interface...")
-        self.select_frame_by_name("list")
+        with startup.step("tela inicial"):
+            self.select_frame_by_name("list")
         
         update_splash_status("Verificando licença...")
-        self.update_license_status()
+        with startup.step("licença"):
+            self.update_license_status()
+
+        self.bind("<Map>", self._on_first_map, add="+")
         
         # Start background license validation
         threading.Thread(target=self.validate_license_startup, daemon=True).start()
@@ -219,23 +237,38 @@ class App(ctk.CTk):
             except Exception:
                 pass
 
+    # ---------- STARTUP TIMING ----------
+    def _on_first_map(self, event):
+        # <Map> também chega dos widgets filhos: só a janela principal conta
+        if event.widget is not self or not startup.window_shown():
+            return
+        if SHOW_STARTUP_REPORT:
+            print(startup.summary())
+            try:
+                startup.save(os.path.join(data_manager.base_dir, "tempos_inicio.json"))
+            except OSError as e:
+                print(f"Não foi possível salvar os tempos de abertura: {e}")
+
     # ---------- REFRESH ----------
     def refresh_data(self):
-        self.list_frame.refresh_data()
-        self.spreadsheet_list_frame.refresh_data()
-        self.document_list_frame.refresh_data()
-        self.document_create_frame._load_profiles()
+        # Telas ainda não criadas carregam os dados quando forem abertas
+        for attr in ("list_frame", "spreadsheet_list_frame", "document_list_frame"):
+            if attr in self._frames:
+                self._frames[attr].refresh_data()
+        if "document_create_frame" in self._frames:
+            self._frames["document_create_frame"]._load_profiles()
 
     # ---------- FRAME SWITCH ----------
+    def _frame(self, attr: str):
+        """Tela pelo nome do atributo (ver FRAMES), criada no primeiro uso"""
+        frame = self._frames.get(attr)
+        if frame is None:
+            frame_class = getattr(frames, self.FRAMES[attr])
+            frame = self._frames[attr] = frame_class(self, fg_color="transparent")
+        return frame
+
     def select_frame_by_name(self, name, profile_to_edit: Optional[SpreadsheetProfile] = None):
-        for frame in (
-            self.spreadsheet_list_frame,
-            self.spreadsheet_create_frame,
-            self.document_list_frame,
-            self.document_create_frame,
-            self.batch_frame,
-            self.list_frame
-        ):
+        for frame in self._frames.values():
             # Reset form values when leaving a frame
             if hasattr(frame, "clear_form") and frame.winfo_viewable():
                 frame.clear_form()
@@ -269,35 +302,40 @@ class App(ctk.CTk):
         )
 
         if name == "spreadsheet_list":
-            self.spreadsheet_list_frame.refresh_data()
-            self.spreadsheet_list_frame.grid(row=0, column=1, sticky="nsew")
+            frame = self._frame("spreadsheet_list_frame")
+            frame.refresh_data()
 
         elif name in ("spreadsheet_create", "spreadsheet_edit"):
+            frame = self._frame("spreadsheet_create_frame")
             if profile_to_edit and name == "spreadsheet_edit":
-                self.spreadsheet_create_frame.load_profile_for_editing(profile_to_edit)
+                frame.load_profile_for_editing(profile_to_edit)
             else:
-                self.spreadsheet_create_frame.clear_form()
-            self.spreadsheet_create_frame.grid(row=0, column=1, sticky="nsew")
+                frame.clear_form()
 
         elif name == "document_list":
-            self.document_list_frame.refresh_data()
-            self.document_list_frame.grid(row=0, column=1, sticky="nsew")
+            frame = self._frame("document_list_frame")
+            frame.refresh_data()
 
         elif name in ("document_create", "document_edit"):
+            frame = self._frame("document_create_frame")
             if profile_to_edit and name == "document_edit":
                 progress_dialog = ProgressDialog(self, title=strings.PROGRESS_LOADING_PDF, message=strings.PROGRESS_LOADING_PROFILE)
-                self.after(300, lambda: self.document_create_frame.load_profile_for_editing(profile_to_edit, progress_dialog))
+                self.after(300, lambda: frame.load_profile_for_editing(profile_to_edit, progress_dialog))
             else:
-                self.document_create_frame.clear_form()
-            self.document_create_frame.grid(row=0, column=1, sticky="nsew")
+                frame.clear_form()
 
         elif name == "batch":
-            self.batch_frame.load_profiles()
-            self.batch_frame.grid(row=0, column=1, sticky="nsew")
+            frame = self._frame("batch_frame")
+            frame.load_profiles()
 
         elif name == "list":
-            self.list_frame.refresh_data()
-            self.list_frame.grid(row=0, column=1, sticky="nsew")
+            frame = self._frame("list_frame")
+            frame.refresh_data()
+
+        else:
+            return
+
+        frame.grid(row=0, column=1, sticky="nsew")
 
     # ---------- LICENSE ----------
     def validate_license_startup(self):
@@ -448,5 +486,8 @@ class App(ctk.CTk):
 
 
 if __name__ == "__main__":
-    app = App()
+    # Necessário para o pool de processos da geração em lote no executável (PyInstaller)
+    multiprocessing.freeze_support()
+    with startup.step("janela principal"):
+        app = App()
     app.mainloop()
\ No newline at end of file
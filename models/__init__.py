@@ -6,9 +6,13 @@ from .document_models import (
     DocumentProfile,
     LicenseInfo,
     TextStyle,
+    RasterSettings,
     ColumnType,
     PageFormat,
-    PageOrientation
+    PageOrientation,
+    RenderMode,
+    RasterColor,
+    RasterCodec
 )
 
 __all__ = [
@@ -18,7 +22,11 @@ __all__ = [
     'DocumentProfile',
     'LicenseInfo',
     'TextStyle',
+    'RasterSettings',
     'ColumnType',
     'PageFormat',
-    'PageOrientation'
+    'PageOrientation',
+    'RenderMode',
+    'RasterColor',
+    'RasterCodec'
 ]
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 from dataclasses import dataclass, field
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, get_args
 
 ColumnType = Literal["texto", "numero", "monetario", "data", "data e hora", "cpf", "cnpj", "telefone", "email"]
 PageFormat = Literal["A1", "A2", "A3", "A4", "A5", "A6", "Letter", "Legal"]
 PageOrientation = Literal["portrait", "landscape"]
+RenderMode = Literal["auto", "vector", "raster"]
+RasterColor = Literal["rgb", "gray", "bilevel"]
+RasterCodec = Literal["flate", "jpeg"]
 
 @dataclass
 class TextStyle:
@@ -39,6 +42,45 @@ class TextStyle:
             color=data.get('color', '#000000')
         )
 
+@dataclass
+class RasterSettings:
+    """Fundo rasterizado (modo "raster"): resolução, cores e compressão da imagem"""
+    dpi: int = 200
+    color: RasterColor = "rgb"  # rgb, gray (tons de cinza) ou bilevel (preto e branco)
+    codec: RasterCodec = "flate"  # flate: sem perdas; jpeg: para templates fotográficos
+    jpeg_quality: int = 85  # 1-95, usado só com codec "jpeg"
+
+    def to_dict(self):
+        return {
+            'dpi': self.dpi,
+            'color': self.color,
+            'codec': self.codec,
+            'jpeg_quality': self.jpeg_quality
+        }
+
+    def validate(self):
+        """Levanta ValueError se algum campo estiver fora dos valores aceitos"""
+        if isinstance(self.dpi, bool) or not isinstance(self.dpi, int) or self.dpi <= 0:
+            raise ValueError(f"Resolução inválida para o fundo rasterizado: {self.dpi} DPI")
+        if self.color not in get_args(RasterColor):
+            raise ValueError(f"Cor inválida para o fundo rasterizado: {self.color!r} (use {', '.join(get_args(RasterColor))})")
+        if self.codec not in get_args(RasterCodec):
+            raise ValueError(f"Compressão inválida para o fundo rasterizado: {self.codec!r} (use {', '.join(get_args(RasterCodec))})")
+        if isinstance(self.jpeg_quality, bool) or not isinstance(self.jpeg_quality, int) or not 1 <= self.jpeg_quality <= 95:
+            raise ValueError(f"Qualidade JPEG inválida: {self.jpeg_quality} (use um valor de 1 a 95)")
+        return self
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if not data:
+            return cls()
+        return cls(
+            dpi=data.get('dpi', 200),
+            color=data.get('color', 'rgb'),
+            codec=data.get('codec', 'flate'),
+            jpeg_quality=data.get('jpeg_quality', 85)
+        ).validate()
+
 @dataclass
 class ColumnMapping:
     original_header: str
@@ -90,6 +132,9 @@ class DocumentProfile:
     field_mappings: List[PdfFieldMapping] = field(default_factory=list)
     page_format: PageFormat = "A4"  # Formato da página
     page_orientation: PageOrientation = "portrait"  # Orientação da página
+    render_mode: RenderMode = "auto"  # auto: vetorial quando o template é um PDF comum
+    filename_pattern: str = ""  # ex.: "{Nome}_{CPF}"; vazio: "<título>_<perfil>"
+    raster_settings: RasterSettings = field(default_factory=RasterSettings)
     
     def to_dict(self):
         return {
@@ -99,7 +144,10 @@ class DocumentProfile:
             'title_column': self.title_column,
             'field_mappings': [m.to_dict() for m in self.field_mappings],
             'page_format': self.page_format,
-            'page_orientation': self.page_orientation
+            'page_orientation': self.page_orientation,
+            'render_mode': self.render_mode,
+            'filename_pattern': self.filename_pattern,
+            'raster_settings': self.raster_settings.to_dict()
         }
     
     @classmethod
@@ -120,6 +168,10 @@ class DocumentProfile:
                     style=TextStyle()  # Estilo padrão
                 ))
         
+        render_mode = data.get('render_mode', 'auto')
+        if render_mode not in get_args(RenderMode):
+            raise ValueError(f"Modo de renderização inválido: {render_mode!r} (use {', '.join(get_args(RenderMode))})")
+
         return cls(
             name=data['name'],
             pdf_path=data['pdf_path'],
@@ -127,7 +179,10 @@ class DocumentProfile:
             title_column=data.get('title_column', ''),
             field_mappings=mappings,
             page_format=data.get('page_format', 'A4'),
-            page_orientation=data.get('page_orientation', 'portrait')
+            page_orientation=data.get('page_orientation', 'portrait'),
+            render_mode=render_mode,
+            filename_pattern=data.get('filename_pattern', ''),
+            raster_settings=RasterSettings.from_dict(data.get('raster_settings'))
         )
 
 @dataclass
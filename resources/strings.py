@@ -37,6 +37,8 @@ class Strings:
     DOC_PROFILE_NAME_PLACEHOLDER = "Nome do Perfil de Documento"
     DOC_SELECT_SPREADSHEET_PROFILE = "Selecione um Perfil de Planilha"
     DOC_TITLE_COLUMN = "Coluna para Título do PDF:"
+    DOC_FILENAME_PATTERN = "Padrão do Nome do Arquivo (opcional):"
+    DOC_FILENAME_PATTERN_PLACEHOLDER = "Ex.: {Nome}_{CPF}"
     DOC_SELECT_COLUMN = "Selecione a Coluna"
     DOC_STEP_1 = "Coluna em Mapeamento:"
     DOC_CURRENT_MAPPINGS = "Mapeamentos Atuais"
@@ -55,6 +57,19 @@ class Strings:
     DOC_PAGE_ORIENTATION = "Orientação:"
     DOC_ORIENTATION_PORTRAIT = "Retrato"
     DOC_ORIENTATION_LANDSCAPE = "Paisagem"
+    DOC_RENDER_MODE = "Modo de Renderização:"
+    DOC_RENDER_MODE_AUTO = "Automático"
+    DOC_RENDER_MODE_VECTOR = "Vetorial"
+    DOC_RENDER_MODE_RASTER = "Rasterizado"
+    DOC_RASTER_DPI = "Resolução (DPI):"
+    DOC_RASTER_COLOR = "Cores do Fundo:"
+    DOC_RASTER_COLOR_RGB = "Colorido"
+    DOC_RASTER_COLOR_GRAY = "Tons de cinza"
+    DOC_RASTER_COLOR_BILEVEL = "Preto e branco"
+    DOC_RASTER_CODEC = "Compressão:"
+    DOC_RASTER_CODEC_FLATE = "Sem perdas"
+    DOC_RASTER_CODEC_JPEG = "JPEG"
+    DOC_RASTER_JPEG_QUALITY = "Qualidade JPEG (1-95):"
     
     # Diálogos de estilo de texto
     STYLE_DIALOG_TITLE = "Configurar Estilo do Texto"
@@ -150,6 +165,10 @@ class Strings:
     NO_PROFILES_FOUND = "Nenhum Perfil de Planilha Encontrado"
     FILE_FILTERS_PDF = "Arquivos PDF"
     FILE_FILTERS_EXCEL = "Arquivos Excel"
+    FILE_FILTERS_SPREADSHEETS = "Planilhas e dados"
+    FILE_FILTERS_CSV = "Arquivos CSV"
+    FILE_FILTERS_PARQUET = "Arquivos Parquet"
+    FILE_FILTERS_ODS = "Planilhas OpenDocument"
     FILE_FILTERS_ZIP = "Arquivos ZIP"
 
 strings = Strings()
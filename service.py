@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço local de geração (HTTP em 127.0.0.1), para gerar documentos sob demanda
+sem pagar a inicialização do Python, pandas, PyMuPDF e ReportLab a cada pedido.
+
+Rotas (JSON, exceto o PDF gerado):
+    GET    /saude                  estado do serviço
+    POST   /documentos             {"perfil": "...", "valores": {"Nome": "...", ...}} → application/pdf
+    POST   /lotes                  {"perfil": "...", "planilha": "...", "mes": "MM/AAAA", "saida": "...", "modo": "files"}
+    GET    /lotes/<id>             progresso do lote
+    DELETE /lotes/<id>             cancela o lote (rodar de novo retoma de onde parou)
+
+Todo pedido precisa do cabeçalho X-Token com a chave gerada a cada execução
+(impressa ao iniciar e gravada em <pasta do app>/service_token.txt) e do Host
+127.0.0.1 ou localhost; os POST só aceitam Content-Type application/json. Assim
+uma página aberta no navegador não consegue acionar o serviço. A pasta "saida"
+de um lote precisa ficar dentro da pasta de PDFs do aplicativo.
+
+Com o pool de processos e a fila cheios, o pedido recebe 503 com Retry-After;
+um documento que passa do tempo máximo recebe 504. Em /lotes, "processos" é
+opcional e limitado ao número de núcleos.
+
+Uso: python service.py [--porta 8765] [--processos N] [--fila N]
+"""
+import argparse
+import hmac
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import sys
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import quote
+
+DEFAULT_PORT = 8765
+
+# Segundos sugeridos ao cliente quando o serviço está ocupado
+RETRY_AFTER = 1
+
+# Maior corpo de pedido aceito (1 MB)
+MAX_BODY_BYTES = 1024 * 1024
+
+OUTPUT_MODES = ("files", "merged", "zip")
+
+TOKEN_HEADER = "X-Token"
+TOKEN_FILE_NAME = "service_token.txt"
+
+def batch_workers(value) -> Optional[int]:
+    """Valida o campo "processos" de um lote: inteiro positivo, no máximo um por núcleo"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("\"processos\" deve ser um número inteiro positivo.")
+    return min(value, os.cpu_count() or 1)
+
+def batch_output_dir(value) -> Optional[str]:
+    """Valida o campo "saida" de um lote: uma pasta dentro da pasta de PDFs do aplicativo"""
+    if value is None:
+        return None
+    from core.data_manager import data_manager
+    root = os.path.realpath(data_manager.pdf_base_dir)
+    if not isinstance(value, str):
+        raise ValueError("\"saida\" deve ser o caminho de uma pasta.")
+    path = os.path.realpath(os.path.join(root, value))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"\"saida\" deve ficar dentro de {root}.")
+    return path
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "PDFGenerator"
+    # Conexões persistentes: o cliente pode reaproveitar a mesma conexão
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: dict, headers: dict = None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8", headers)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Pedido grande demais.")
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("O corpo do pedido deve ser um objeto JSON.")
+        return data
+
+    def _batch_id(self) -> str:
+        return self.path.rstrip("/").split("/")[-1]
+
+    def _reject(self, status: int, message: str):
+        # O corpo do pedido não foi lido: a conexão não pode ser reaproveitada
+        self.close_connection = True
+        self._send_json(status, {"erro": message}, {"Connection": "close"})
+
+    def _authorized(self) -> bool:
+        """Host local e chave do serviço; responde com o erro e retorna False se faltar algo"""
+        port = self.server.server_port
+        if self.headers.get("Host", "") not in (f"127.0.0.1:{port}", f"localhost:{port}"):
+            self._reject(403, "Host não permitido.")
+            return False
+        token = self.headers.get(TOKEN_HEADER, "")
+        if not hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+            self._reject(401, f"Informe a chave do serviço no cabeçalho {TOKEN_HEADER}.")
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == "/saude":
+            self._send_json(200, {
+                "status": "ok",
+                "processos": self.service.workers,
+                "capacidade": self.service.capacity,
+                "em_andamento": self.service.in_flight,
+            })
+        elif self.path.startswith("/lotes/"):
+            status = self.service.batch_status(self._batch_id())
+            if status is None:
+                self._send_json(404, {"erro": "Lote não encontrado."})
+            else:
+                self._send_json(200, status.to_dict())
+        else:
+            self._send_json(404, {"erro": "Rota não encontrada."})
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        if not self.path.startswith("/lotes/"):
+            self._send_json(404, {"erro": "Rota não encontrada."})
+            return
+        status = self.service.cancel_batch(self._batch_id())
+        if status is None:
+            self._send_json(404, {"erro": "Lote não encontrado."})
+        else:
+            self._send_json(202, status.to_dict())
+
+    def do_POST(self):
+        from core.generation_service import ServiceBusy, ProfileNotFound, RenderTimeout
+
+        if not self._authorized():
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reject(415, "Envie o pedido como application/json.")
+            return
+        try:
+            request = self._read_json()
+            if self.path == "/documentos":
+                values = request.get("valores") or {}
+                if not request.get("perfil") or not isinstance(values, dict):
+                    raise ValueError("Informe \"perfil\" e \"valores\" (objeto com os valores das colunas).")
+                filename, data = self.service.render_document(request["perfil"], values)
+                self._send(200, data, "application/pdf", {
+                    "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename)}"
+                })
+            elif self.path == "/lotes":
+                if not request.get("perfil") or not request.get("planilha"):
+                    raise ValueError("Informe \"perfil\" e \"planilha\".")
+                mode = request.get("modo", "files")
+                if mode not in OUTPUT_MODES:
+                    raise ValueError(f"Modo inválido: {mode}")
+                base_date = datetime.strptime(request["mes"], "%m/%Y") if request.get("mes") else None
+                status = self.service.start_batch(
+                    request["perfil"], request["planilha"], base_date, batch_output_dir(request.get("saida")),
+                    output_mode=mode, workers=batch_workers(request.get("processos"))
+                )
+                self._send_json(202, status.to_dict(), {"Location": f"/lotes/{status.id}"})
+            else:
+                self._send_json(404, {"erro": "Rota não encontrada."})
+        except ServiceBusy as e:
+            self._send_json(503, {"erro": str(e)}, {"Retry-After": str(RETRY_AFTER)})
+        except RenderTimeout as e:
+            self._send_json(504, {"erro": str(e)})
+        except (ProfileNotFound, FileNotFoundError) as e:
+            self._send_json(404, {"erro": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"erro": str(e)})
+        except Exception as e:
+            self._send_json(500, {"erro": str(e)})
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, token: str, verbose: bool = False):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.token = token
+        self.verbose = verbose
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serviço local de geração de documentos (HTTP em 127.0.0.1).")
+    parser.add_argument("--porta", type=int, default=DEFAULT_PORT, help=f"porta (padrão: {DEFAULT_PORT})")
+    parser.add_argument("--processos", type=int, default=None, help="processos de geração (padrão: um por núcleo)")
+    parser.add_argument("--fila", type=int, default=None,
+                        help="pedidos que podem aguardar além dos em geração (padrão: 2 por processo)")
+    parser.add_argument("--verboso", action="store_true", help="registra cada pedido em stderr")
+    args = parser.parse_args(argv)
+
+    # Avisos do PyMuPDF vão para stderr, junto com o registro do serviço
+    os.environ.setdefault("PYMUPDF_MESSAGE", "fd:2")
+    from core.generation_service import GenerationService
+
+    from core.data_manager import data_manager
+
+    # Chave nova a cada execução, lida pelos clientes locais no arquivo (só o usuário tem acesso)
+    token = secrets.token_urlsafe(32)
+    token_path = os.path.join(data_manager.base_dir, TOKEN_FILE_NAME)
+    with open(os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+        f.write(token)
+
+    with GenerationService(workers=args.processos, queue_size=args.fila) as service:
+        server = ServiceServer(("127.0.0.1", args.porta), service, token, verbose=args.verboso)
+
+        def stop(signum, frame):
+            # serve_forever roda nesta thread: sai pelo mesmo caminho do Ctrl+C
+            # (um segundo sinal não interrompe o encerramento)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, stop)
+        print(f"Serviço pronto em http://127.0.0.1:{server.server_port} "
+              f"({service.workers} processos, capacidade {service.capacity} pedidos)\n"
+              f"Chave ({TOKEN_HEADER}): {token_path}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    # Necessário para o pool de processos no executável (PyInstaller)
+    multiprocessing.freeze_support()
+    sys.exit(main())
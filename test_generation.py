@@ -0,0 +1,1344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do motor de geração de PDFs (modos vetorial e rasterizado)
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+
+import fitz
+import pandas as pd
+from datetime import datetime
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+
+from models import DocumentProfile, SpreadsheetProfile, ColumnMapping, PdfFieldMapping, TextStyle, RasterSettings
+from core.data_manager import data_manager, DataManager
+from core.pdf_generator import generate_pdf_with_template, batch_generate_pdfs
+from core.template_context import TemplateContext
+from core.formatting import format_columns, resolve_column_positions
+from core.spreadsheet_reader import (
+    available_engines, calamine_available, detect_csv_format, open_spreadsheet, pyarrow_available, read_header_row, select_engine
+)
+from core.output_names import FilenamePattern, OutputNameRegistry
+from core.batch_job import BatchJob, BatchCancelled
+from core.render_plan import FIELD_FORMATTERS, format_text_field
+from core.raster_cache import RasterCache
+from core.generation_service import ProfileStore, ProfileNotFound, render_row
+from core.document_renderer import get_renderer, render_document, clear_renderers
+from core.timing_report import TimingReport
+from core.memory_profile import MemoryProfile
+from utils import render_pdf_to_image, read_spreadsheet_headers
+
+def _make_template(path: str, pages: int = 2):
+    """Cria um template PDF simples com texto vetorial"""
+    c = canvas.Canvas(path, pagesize=A4)
+    for page in range(pages):
+        c.setFont("Helvetica-Bold", 20)
+        c.drawString(72, 780, f"TEMPLATE {page + 1}")
+        c.rect(60, 600, 470, 100)
+        c.showPage()
+    c.save()
+
+def _make_profiles(template_path: str, render_mode: str = "auto"):
+    spreadsheet_profile = SpreadsheetProfile(
+        name="Planilha_Teste",
+        columns=[
+            ColumnMapping("Nome", "Nome", "texto", 0),
+            ColumnMapping("CPF", "CPF", "cpf", 1),
+            ColumnMapping("Valor", "Valor", "monetario", 2),
+        ]
+    )
+    document_profile = DocumentProfile(
+        name="Teste",
+        pdf_path=template_path,
+        spreadsheet_profile_name="Planilha_Teste",
+        title_column="Nome",
+        field_mappings=[
+            PdfFieldMapping("Nome", 20, 30, 0, TextStyle(bold=True, underline=True)),
+            PdfFieldMapping("CPF", 20, 40, 0, TextStyle()),
+            PdfFieldMapping("Valor", 20, 50, 1, TextStyle(color="#FF0000")),
+        ],
+        render_mode=render_mode
+    )
+    return document_profile, spreadsheet_profile
+
+ROW = {"Nome": "Maria Souza", "CPF": "12345678901", "Valor": "1500.5"}
+
+def test_vector_mode_keeps_template_text():
+    """O modo vetorial preserva o texto do template e adiciona os campos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        output = os.path.join(tmp, "saida.pdf")
+        generate_pdf_with_template(ROW, document_profile, spreadsheet_profile, output)
+
+        with fitz.open(output) as doc:
+            assert len(doc) == 2
+            first_page = doc[0].get_text()
+            assert "TEMPLATE 1" in first_page, "Texto do template deveria continuar vetorial"
+            assert "Maria Souza" in first_page
+            assert "123.456.789-01" in first_page
+            assert "R$ 1500,50" in doc[1].get_text()
+            assert not doc[0].get_images(), "Modo vetorial não deveria embutir imagens"
+            assert doc.metadata["title"] == "saida.pdf"
+
+@contextmanager
+def _private_raster_cache(tmp: str):
+    """Troca o cache de páginas rasterizadas da aplicação por um dentro da pasta do teste"""
+    original_cache = data_manager.raster_cache
+    data_manager.raster_cache = RasterCache(os.path.join(tmp, "cache"))
+    try:
+        yield data_manager.raster_cache
+    finally:
+        data_manager.raster_cache = original_cache
+
+def test_raster_mode_still_available():
+    """O modo rasterizado continua disponível quando pedido pelo perfil"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template, render_mode="raster")
+
+        output = os.path.join(tmp, "saida.pdf")
+        with TemplateContext(document_profile, RasterCache(os.path.join(tmp, "cache"))) as context:
+            generate_pdf_with_template(ROW, document_profile, spreadsheet_profile, output, context)
+
+        with fitz.open(output) as doc:
+            page_text = doc[0].get_text()
+            assert "TEMPLATE 1" not in page_text, "Fundo rasterizado não deveria ter texto"
+            assert "Maria Souza" in page_text
+            assert len(doc[0].get_images()) == 1
+
+def test_raster_batch_leaves_no_temp_files():
+    """O lote rasterizado não grava arquivos temporários: só os PDFs, o diário e o cache de páginas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template, render_mode="raster")
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({"Nome": ["Ana", "Bia", "Caio"], "CPF": ["12345678901"] * 3, "Valor": [1.0] * 3}).to_excel(sheet, index=False)
+
+        # Temporário do sistema só deste teste: outros processos não interferem na comparação
+        system_temp = os.path.join(tmp, "sistema")
+        os.makedirs(system_temp)
+        app_temp = os.path.join(data_manager.base_dir, ".temp")
+        app_temp_before = set(os.listdir(app_temp)) if os.path.isdir(app_temp) else set()
+        original_tempdir = tempfile.tempdir
+        tempfile.tempdir = system_temp
+        try:
+            with _private_raster_cache(tmp):
+                count, files = _run_batch(os.path.join(tmp, "saida"), sheet, document_profile, spreadsheet_profile, workers=1)
+        finally:
+            tempfile.tempdir = original_tempdir
+
+        assert count == 3 and all(name.endswith(".pdf") for name in files)
+        written = sorted(
+            os.path.relpath(os.path.join(root, name), tmp)
+            for root, _, names in os.walk(tmp) for name in names
+        )
+        cache_files = [name for name in written if name.startswith("cache" + os.sep)]
+        assert len(cache_files) == 2 and all(name.endswith(".png") for name in cache_files)
+        others = [name for name in written if name not in cache_files and os.sep + ".lotes" + os.sep not in name]
+        assert others == sorted(["dados.xlsx", "template.pdf"] + [os.path.join("saida", "2024", "03", name) for name in files])
+        assert os.listdir(system_temp) == []
+        assert (set(os.listdir(app_temp)) if os.path.isdir(app_temp) else set()) - app_temp_before == set()
+
+def test_template_context_renders_once():
+    """O contexto do lote rasteriza cada página uma única vez"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template, render_mode="raster")
+
+        with TemplateContext(document_profile, RasterCache(os.path.join(tmp, "cache"))) as context:
+            first = context.page_source()
+            for i in range(3):
+                output = os.path.join(tmp, f"saida_{i}.pdf")
+                generate_pdf_with_template(ROW, document_profile, spreadsheet_profile, output, context)
+            assert context.page_source() is first
+            assert sorted(os.listdir(tmp)) == ["cache", "saida_0.pdf", "saida_1.pdf", "saida_2.pdf", "template.pdf"]
+
+def _run_batch(tmp: str, sheet_path: str, document_profile, spreadsheet_profile, **kwargs):
+    """Executa o lote gravando em uma pasta temporária e retorna (total, arquivos)"""
+    original_base_dir = data_manager.pdf_base_dir
+    data_manager.pdf_base_dir = tmp
+    try:
+        count = batch_generate_pdfs(
+            sheet_path, document_profile, spreadsheet_profile,
+            lambda msg: None, datetime(2024, 3, 1), **kwargs
+        )
+    finally:
+        data_manager.pdf_base_dir = original_base_dir
+    output_dir = os.path.join(tmp, "2024", "03")
+    return count, sorted(name for name in os.listdir(output_dir) if os.path.isfile(os.path.join(output_dir, name)))
+
+def test_parallel_batch_matches_serial():
+    """O modo paralelo gera os mesmos arquivos, com os mesmos nomes, que o serial"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        rows = 60
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": [["Ana", "Bia", ""][i % 3] for i in range(rows)],
+            "CPF": ["12345678901"] * rows,
+            "Valor": [10.5] * rows,
+        }).to_excel(sheet, index=False)
+
+        serial = _run_batch(os.path.join(tmp, "serial"), sheet, document_profile, spreadsheet_profile, workers=1)
+        parallel = _run_batch(os.path.join(tmp, "paralelo"), sheet, document_profile, spreadsheet_profile, workers=2)
+
+        assert serial[0] == parallel[0] == rows
+        assert serial[1] == parallel[1]
+        assert "Bia_Teste_19.pdf" in serial[1]
+
+def test_interrupted_batch_resumes_without_duplicates():
+    """Um lote interrompido continua de onde parou, sem refazer nem duplicar arquivos"""
+    class Interrupted(Exception):
+        pass
+
+    def stop_at_row_8(message):
+        if message.startswith("Processando linha 8 "):
+            raise Interrupted()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        rows = 12
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": [["Ana", "Bia", ""][i % 3] for i in range(rows)],
+            "CPF": ["12345678901"] * rows,
+            "Valor": [10.5] * rows,
+        }).to_excel(sheet, index=False)
+
+        _, expected = _run_batch(os.path.join(tmp, "completo"), sheet, document_profile, spreadsheet_profile, workers=1)
+
+        output = os.path.join(tmp, "retomado")
+        original_base_dir = data_manager.pdf_base_dir
+        data_manager.pdf_base_dir = output
+        try:
+            batch_generate_pdfs(sheet, document_profile, spreadsheet_profile, stop_at_row_8, datetime(2024, 3, 1), workers=1)
+            assert False, "o lote deveria ter sido interrompido"
+        except Interrupted:
+            pass
+        finally:
+            data_manager.pdf_base_dir = original_base_dir
+
+        output_dir = os.path.join(output, "2024", "03")
+        first_run = {name: os.path.getmtime(os.path.join(output_dir, name)) for name in os.listdir(output_dir) if name.endswith(".pdf")}
+        assert len(first_run) == 7
+
+        count, files = _run_batch(output, sheet, document_profile, spreadsheet_profile, workers=1)
+        assert count == rows
+        assert files == expected
+        # As linhas já geradas não foram refeitas
+        assert all(os.path.getmtime(os.path.join(output_dir, name)) == mtime for name, mtime in first_run.items())
+
+def test_killed_parallel_batch_resumes_without_duplicates():
+    """Um lote paralelo derrubado (SIGKILL) no meio de um bloco retoma sem duplicar PDFs"""
+    if not hasattr(os, "killpg"):
+        return
+    import signal
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        rows = 600
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": [f"Pessoa {i}" for i in range(rows)],
+            "CPF": ["12345678901"] * rows,
+            "Valor": [10.5] * rows,
+        }).to_excel(sheet, index=False)
+        output = os.path.join(tmp, "saida")
+        output_dir = os.path.join(output, "2024", "03")
+        script = (
+            "import sys; from datetime import datetime; "
+            "from test_generation import _make_profiles; "
+            "from core.data_manager import data_manager; from core.pdf_generator import batch_generate_pdfs; "
+            f"data_manager.pdf_base_dir = {output!r}; "
+            f"document_profile, spreadsheet_profile = _make_profiles({template!r}); "
+            f"batch_generate_pdfs({sheet!r}, document_profile, spreadsheet_profile, None, datetime(2024, 3, 1), workers=2)"
+        )
+        # Sessão própria: o SIGKILL derruba o processo principal e os do pool de uma vez
+        process = subprocess.Popen(
+            [sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "PYMUPDF_MESSAGE": "fd:2"}, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + 120
+        try:
+            while time.monotonic() < deadline and process.poll() is None:
+                if os.path.isdir(output_dir) and len(os.listdir(output_dir)) > 40:
+                    break
+                time.sleep(0.01)
+        finally:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.wait()
+
+        before = [name for name in os.listdir(output_dir) if name.endswith(".pdf")]
+        assert 0 < len(before) < rows, "o lote deveria ter sido derrubado no meio"
+        count, files = _run_batch(output, sheet, *_make_profiles(template), workers=2)
+        assert count == rows
+        assert files == sorted(f"Pessoa {i}_Teste.pdf" for i in range(rows))
+        with fitz.open(os.path.join(output_dir, "Pessoa 0_Teste.pdf")) as doc:
+            assert "Pessoa 0" in doc[0].get_text()
+
+def test_cancelled_batch_resumes_without_duplicates():
+    """Um lote cancelado para entre duas linhas e continua de onde parou"""
+    def cancel_at_row_8(event):
+        if event.stage == "generating" and event.done == 8:
+            job.cancel()
+
+    # interval=0: um evento por linha, para cancelar exatamente na linha 8
+    job = BatchJob(on_progress=cancel_at_row_8, interval=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        rows = 12
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": [["Ana", "Bia", ""][i % 3] for i in range(rows)],
+            "CPF": ["12345678901"] * rows,
+            "Valor": [10.5] * rows,
+        }).to_excel(sheet, index=False)
+
+        _, expected = _run_batch(os.path.join(tmp, "completo"), sheet, document_profile, spreadsheet_profile, workers=1)
+
+        output = os.path.join(tmp, "retomado")
+        original_base_dir = data_manager.pdf_base_dir
+        data_manager.pdf_base_dir = output
+        try:
+            batch_generate_pdfs(sheet, document_profile, spreadsheet_profile, None, datetime(2024, 3, 1), workers=1, job=job)
+            assert False, "o lote deveria ter sido cancelado"
+        except BatchCancelled as e:
+            # A linha 8 já tinha começado quando o cancelamento foi pedido
+            assert e.generated_count == 8
+        finally:
+            data_manager.pdf_base_dir = original_base_dir
+
+        output_dir = os.path.join(output, "2024", "03")
+        first_run = {name: os.path.getmtime(os.path.join(output_dir, name)) for name in os.listdir(output_dir) if name.endswith(".pdf")}
+        assert len(first_run) == 8
+
+        count, files = _run_batch(output, sheet, document_profile, spreadsheet_profile, workers=1)
+        assert count == rows
+        assert files == expected
+        assert all(os.path.getmtime(os.path.join(output_dir, name)) == mtime for name, mtime in first_run.items())
+
+def test_progress_events_are_throttled():
+    """O job emite no máximo um evento por intervalo; etapas e o fim sempre saem"""
+    clock = [0.0]
+    events = []
+    job = BatchJob(on_progress=events.append, interval=0.1)
+    original_monotonic = time.monotonic
+    time.monotonic = lambda: clock[0]
+    try:
+        job.report("reading")
+        for done in range(1, 101):
+            clock[0] += 0.01
+            job.report("generating", done, 100)
+        job.report("finished", 100, force=True)
+    finally:
+        time.monotonic = original_monotonic
+
+    generating = [event for event in events if event.stage == "generating"]
+    # 100 linhas em 1 s: o primeiro evento e, depois, um a cada 0,1 s
+    assert 5 <= len(generating) <= 11
+    assert generating[0].done == 1
+    assert [event.stage for event in events][0] == "reading"
+    assert events[-1].stage == "finished" and events[-1].done == 100
+    assert all(b.done > a.done for a, b in zip(generating, generating[1:]))
+    assert generating[-1].rate > 0 and generating[-1].message == f"Processando linha {generating[-1].done} de 100..."
+
+    # Sem job, o status_callback continua recebendo uma mensagem por linha
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({"Nome": ["Ana", "Bia", "Caio"], "CPF": ["12345678901"] * 3, "Valor": [1.0] * 3}).to_excel(sheet, index=False)
+        messages = []
+        original_base_dir = data_manager.pdf_base_dir
+        data_manager.pdf_base_dir = os.path.join(tmp, "saida")
+        try:
+            batch_generate_pdfs(sheet, document_profile, spreadsheet_profile, messages.append, datetime(2024, 3, 1), workers=1)
+        finally:
+            data_manager.pdf_base_dir = original_base_dir
+        assert [message for message in messages if message.startswith("Processando linha")] == [
+            f"Processando linha {row} de 3..." for row in (1, 2, 3)
+        ]
+
+def test_incremental_rerun_renders_only_changed_rows():
+    """Rodar de novo após corrigir a planilha só renderiza as linhas alteradas ou novas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        sheet = os.path.join(tmp, "dados.xlsx")
+        data = pd.DataFrame({
+            "Nome": ["Ana", "Bia", "Caio", "Davi"],
+            "CPF": ["12345678901"] * 4,
+            "Valor": [10.5, 20.0, 30.0, 40.0],
+        })
+        data.to_excel(sheet, index=False)
+        output = os.path.join(tmp, "saida")
+        _, files = _run_batch(output, sheet, document_profile, spreadsheet_profile, workers=1)
+        output_dir = os.path.join(output, "2024", "03")
+        before = {name: os.path.getmtime(os.path.join(output_dir, name)) for name in files}
+
+        # Corrige o valor de Bia e inclui uma linha nova no topo
+        data.loc[1, "Valor"] = 99.0
+        data = pd.concat([pd.DataFrame({"Nome": ["Eva"], "CPF": ["12345678901"], "Valor": [5.0]}), data], ignore_index=True)
+        data.to_excel(sheet, index=False)
+        time.sleep(0.05)
+
+        messages = []
+        original_base_dir = data_manager.pdf_base_dir
+        data_manager.pdf_base_dir = output
+        try:
+            count = batch_generate_pdfs(sheet, document_profile, spreadsheet_profile, messages.append, datetime(2024, 3, 1), workers=1)
+        finally:
+            data_manager.pdf_base_dir = original_base_dir
+
+        assert count == 5
+        assert messages[-1] == "Geração concluída. 2 PDFs criados, 3 sem alterações foram mantidos."
+        after = sorted(name for name in os.listdir(output_dir) if name.endswith(".pdf"))
+        assert after == sorted(files + ["Eva_Teste.pdf"])
+        changed = [name for name in files if os.path.getmtime(os.path.join(output_dir, name)) != before[name]]
+        assert changed == ["Bia_Teste.pdf"]
+        text = fitz.open(os.path.join(output_dir, "Bia_Teste.pdf"))[1].get_text()
+        assert "R$ 99,00" in text
+
+def test_incremental_rerun_never_overwrites_a_renamed_row():
+    """Com padrão de nome, a linha alterada que muda de nome não sobrescreve o arquivo antigo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        document_profile.filename_pattern = "{Nome}_{CPF}"
+
+        sheet = os.path.join(tmp, "dados.xlsx")
+        data = pd.DataFrame({"Nome": ["Ana", "Bia"], "CPF": ["11111111111", "22222222222"], "Valor": [10.5, 20.0]})
+        data.to_excel(sheet, index=False)
+        output = os.path.join(tmp, "saida")
+        _, files = _run_batch(output, sheet, document_profile, spreadsheet_profile, workers=1)
+        assert files == ["Ana_11111111111.pdf", "Bia_22222222222.pdf"]
+        output_dir = os.path.join(output, "2024", "03")
+        old_text = fitz.open(os.path.join(output_dir, "Ana_11111111111.pdf"))[0].get_text()
+
+        data.loc[0, "CPF"] = "33333333333"
+        data.to_excel(sheet, index=False)
+        _, files = _run_batch(output, sheet, document_profile, spreadsheet_profile, workers=1)
+        assert "Ana_33333333333.pdf" in files
+        assert "333.333.333-33" in fitz.open(os.path.join(output_dir, "Ana_33333333333.pdf"))[0].get_text()
+        # O arquivo com o nome antigo não recebeu o conteúdo novo (e, sem prune_orphans, continua na pasta)
+        assert files == ["Ana_11111111111.pdf", "Ana_33333333333.pdf", "Bia_22222222222.pdf"]
+        assert fitz.open(os.path.join(output_dir, "Ana_11111111111.pdf"))[0].get_text() == old_text
+
+def test_incremental_rerun_keeps_orphaned_pdfs_unless_pruned():
+    """PDFs de linhas removidas ou renomeadas ficam na pasta; só são apagados com prune_orphans"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        sheet = os.path.join(tmp, "dados.xlsx")
+        data = pd.DataFrame({"Nome": ["Ana", "Bia", "Caio"], "CPF": ["12345678901"] * 3, "Valor": [10.5, 20.0, 30.0]})
+        data.to_excel(sheet, index=False)
+        outputs = {prune: os.path.join(tmp, "apagados" if prune else "mantidos") for prune in (False, True)}
+        for output in outputs.values():
+            _run_batch(output, sheet, document_profile, spreadsheet_profile, workers=1)
+            # Arquivo que não é do lote: nunca é apagado
+            open(os.path.join(output, "2024", "03", "Outro.pdf"), "wb").close()
+
+        # Bia sai da planilha e Caio é renomeado
+        data = data.drop(index=1).reset_index(drop=True)
+        data.loc[1, "Nome"] = "Caio Lima"
+        data.to_excel(sheet, index=False)
+
+        for prune, output in outputs.items():
+            messages = []
+            original_base_dir = data_manager.pdf_base_dir
+            data_manager.pdf_base_dir = output
+            try:
+                count = batch_generate_pdfs(
+                    sheet, document_profile, spreadsheet_profile, messages.append, datetime(2024, 3, 1),
+                    workers=1, prune_orphans=prune
+                )
+            finally:
+                data_manager.pdf_base_dir = original_base_dir
+            assert count == 2
+            output_dir = os.path.join(output, "2024", "03")
+            files = sorted(name for name in os.listdir(output_dir) if name.endswith(".pdf"))
+            if prune:
+                assert messages[-1] == (
+                    "Geração concluída. 1 PDFs criados, 1 sem alterações foram mantidos. "
+                    "2 PDF(s) de linhas removidas ou renomeadas foram apagados."
+                )
+                assert files == ["Ana_Teste.pdf", "Caio Lima_Teste.pdf", "Outro.pdf"]
+            else:
+                assert messages[-1] == "Geração concluída. 1 PDFs criados, 1 sem alterações foram mantidos."
+                assert files == ["Ana_Teste.pdf", "Bia_Teste.pdf", "Caio Lima_Teste.pdf", "Caio_Teste.pdf", "Outro.pdf"]
+
+def test_output_names_and_filename_pattern():
+    """Nomes alocados em memória a partir de uma leitura da pasta, e padrão com várias colunas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, "Documento_Teste.pdf"), "wb").close()
+        names = OutputNameRegistry(tmp)
+        allocated = [os.path.basename(names.allocate("Documento_Teste")) for _ in range(3)]
+        assert allocated == ["Documento_Teste_1.pdf", "Documento_Teste_2.pdf", "Documento_Teste_3.pdf"]
+        assert os.path.basename(names.allocate("documento_teste")) == "documento_teste_4.pdf"
+
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        document_profile.filename_pattern = "{Nome} - {CPF}"
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": ["Ana", "Ana", "", ""],
+            "CPF": ["12345678901", "12345678901", "98765432100", ""],
+            "Valor": [10.5] * 4,
+        }).to_excel(sheet, index=False)
+        _, files = _run_batch(os.path.join(tmp, "saida"), sheet, document_profile, spreadsheet_profile, workers=1)
+        # Os nomes usam os valores brutos, não os formatados ("123.456.789-01");
+        # sem separadores soltos nas pontas quando uma coluna está vazia
+        assert files == ["98765432100.pdf", "Ana - 12345678901.pdf", "Ana - 12345678901_1.pdf", "Documento.pdf"]
+
+    try:
+        FilenamePattern("{Nome:>10}")
+        assert False, "padrão com formatação deveria ser recusado"
+    except ValueError:
+        pass
+
+def test_merged_output_with_bookmarks():
+    """O modo PDF único reúne as linhas em um arquivo, com marcadores e o fundo gravado uma vez"""
+    with tempfile.TemporaryDirectory() as tmp, _private_raster_cache(tmp):
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": ["Ana", "Bia", "Caio", "Davi", "Eva"],
+            "CPF": ["12345678901"] * 5,
+            "Valor": [10.5] * 5,
+        }).to_excel(sheet, index=False)
+
+        for render_mode in ("vector", "raster"):
+            document_profile, spreadsheet_profile = _make_profiles(template, render_mode)
+            output = os.path.join(tmp, render_mode)
+            count, files = _run_batch(output, sheet, document_profile, spreadsheet_profile, output_mode="merged")
+            assert count == 5
+            assert files == ["Lote_Teste.pdf"]
+
+            doc = fitz.open(os.path.join(output, "2024", "03", files[0]))
+            try:
+                assert len(doc) == 10
+                assert [entry[1:] for entry in doc.get_toc()] == [["Ana", 1], ["Bia", 3], ["Caio", 5], ["Davi", 7], ["Eva", 9]]
+                if render_mode == "raster":
+                    # Todas as primeiras páginas apontam para a mesma imagem de fundo
+                    assert len({doc[page].get_images()[0][0] for page in range(0, 10, 2)}) == 1
+                else:
+                    assert "TEMPLATE 1" in doc[8].get_text()
+            finally:
+                doc.close()
+
+        count, files = _run_batch(os.path.join(tmp, "partes"), sheet, document_profile, spreadsheet_profile,
+                                  output_mode="merged", merge_max_documents=2)
+        assert files == ["Lote_Teste_parte1.pdf", "Lote_Teste_parte2.pdf", "Lote_Teste_parte3.pdf"]
+
+        # Cancelado no 3º documento: a parte pendente é gravada e a contagem bate com o disco
+        def cancel_at_row_3(event):
+            if event.stage == "generating" and event.done == 3:
+                job.cancel()
+        job = BatchJob(on_progress=cancel_at_row_3, interval=0)
+        output = os.path.join(tmp, "cancelado")
+        try:
+            _run_batch(output, sheet, document_profile, spreadsheet_profile,
+                       output_mode="merged", merge_max_documents=2, job=job)
+            assert False, "o lote deveria ter sido cancelado"
+        except BatchCancelled as e:
+            assert e.generated_count == 3
+        output_dir = os.path.join(output, "2024", "03")
+        assert sorted(os.listdir(output_dir)) == ["Lote_Teste_parte1.pdf", "Lote_Teste_parte2.pdf"]
+        with fitz.open(os.path.join(output_dir, "Lote_Teste_parte2.pdf")) as doc:
+            assert [entry[1] for entry in doc.get_toc()] == ["Caio"]
+
+def test_zip_output_without_intermediate_files():
+    """O modo ZIP grava os PDFs direto no .zip, com os mesmos nomes nos modos serial e paralelo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+
+        rows = 60
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({
+            "Nome": [["Ana", "Bia", ""][i % 3] for i in range(rows)],
+            "CPF": ["12345678901"] * rows,
+            "Valor": [10.5] * rows,
+        }).to_excel(sheet, index=False)
+
+        entries = []
+        for workers, compression in ((1, "store"), (2, "deflate")):
+            output = os.path.join(tmp, f"zip_{workers}")
+            count, files = _run_batch(output, sheet, document_profile, spreadsheet_profile,
+                                      workers=workers, output_mode="zip", zip_compression=compression)
+            assert count == rows
+            assert files == ["Lote_Teste.zip"]
+            with zipfile.ZipFile(os.path.join(output, "2024", "03", files[0])) as archive:
+                assert archive.testzip() is None
+                assert all(info.compress_type == (zipfile.ZIP_STORED if compression == "store" else zipfile.ZIP_DEFLATED)
+                           for info in archive.infolist())
+                entries.append(sorted(archive.namelist()))
+                assert archive.read("Bia_Teste_19.pdf").startswith(b"%PDF")
+
+        assert len(entries[0]) == rows
+        assert entries[0] == entries[1]
+
+def _uncompiled_fields(data_row, document_profile, spreadsheet_profile):
+    """Referência: campos como o desenho por linha original os calculava, mapeamento a mapeamento"""
+    from utils import format_date_value, format_cpf, format_cnpj, format_phone, get_page_size
+    from core.render_plan import MM_TO_POINTS, hex_to_rgb
+
+    fonts = {"Helvetica": "Helvetica", "Times New Roman": "Times-Roman", "Courier New": "Courier"}
+    bold_italic = {
+        (True, True): {"Helvetica": "Helvetica-BoldOblique", "Times New Roman": "Times-BoldItalic", "Courier New": "Courier-BoldOblique"},
+        (True, False): {"Helvetica": "Helvetica-Bold", "Times New Roman": "Times-Bold", "Courier New": "Courier-Bold"},
+        (False, True): {"Helvetica": "Helvetica-Oblique", "Times New Roman": "Times-Italic", "Courier New": "Courier-Oblique"},
+    }
+    height = get_page_size(document_profile.page_format, document_profile.page_orientation)[1]
+    fields = []
+    for mapping in document_profile.field_mappings:
+        value = str(data_row.get(mapping.column_name, ""))
+        col_mapping = next((col for col in spreadsheet_profile.columns if col.custom_name == mapping.column_name), None)
+        if col_mapping:
+            match col_mapping.column_type:
+                case "monetario":
+                    try:
+                        value = f"R$ {float(value.replace('$', '').replace('R$', '').strip()):.2f}".replace('.', ',')
+                    except (ValueError, TypeError): pass
+                case "data":
+                    value = format_date_value(value, "data")
+                case "data e hora":
+                    value = format_date_value(value, "data e hora")
+                case "cpf":
+                    value = format_cpf(value)
+                case "cnpj":
+                    value = format_cnpj(value)
+                case "telefone":
+                    value = format_phone(value)
+        if not value or value.lower() == "nan":
+            value = ""
+        style = mapping.style if mapping.style else TextStyle()
+        if style.bold or style.italic:
+            font = bold_italic[(style.bold, style.italic)].get(style.font_family, bold_italic[(style.bold, style.italic)]["Helvetica"])
+        else:
+            font = fonts.get(style.font_family, "Helvetica")
+        fields.append((
+            mapping.page_index, mapping.x * MM_TO_POINTS,
+            (height - (mapping.y * MM_TO_POINTS)) - (style.font_size / MM_TO_POINTS),
+            font, style.font_size, hex_to_rgb(style.color), style.underline, value
+        ))
+    return fields
+
+def test_render_plan_matches_uncompiled_rows():
+    """O RenderPlan desenha o mesmo que o cálculo por linha original, inclusive com nomes de coluna repetidos"""
+    from core.render_plan import compile_render_plan
+
+    spreadsheet_profile = SpreadsheetProfile(
+        name="Planilha_Plano",
+        columns=[
+            ColumnMapping("Nome", "Nome", "texto", 0),
+            ColumnMapping("CPF", "Documento", "cpf", 1),
+            # Nome personalizado repetido: vale a primeira coluna (cpf)
+            ColumnMapping("CPF texto", "Documento", "texto", 2),
+            ColumnMapping("Valor", "Valor", "monetario", 3),
+            ColumnMapping("Data", "Data", "data", 4),
+            ColumnMapping("Quando", "Quando", "data e hora", 5),
+            ColumnMapping("CNPJ", "CNPJ", "cnpj", 6),
+            ColumnMapping("Telefone", "Telefone", "telefone", 7),
+        ]
+    )
+    document_profile = DocumentProfile(
+        name="Plano",
+        pdf_path="/path/to/template.pdf",
+        spreadsheet_profile_name="Planilha_Plano",
+        title_column="Nome",
+        field_mappings=[
+            PdfFieldMapping("Nome", 20, 30, 0, TextStyle(font_family="Times New Roman", bold=True, italic=True, underline=True)),
+            PdfFieldMapping("Documento", 20, 40, 0, TextStyle(font_family="Courier New", font_size=9)),
+            PdfFieldMapping("Documento", 120, 40, 1, TextStyle(font_family="Arial", italic=True)),
+            PdfFieldMapping("Valor", 20, 50, 1, TextStyle(color="#FF8000", bold=True)),
+            PdfFieldMapping("Data", 20, 60, 1),
+            PdfFieldMapping("Quando", 20, 70, 1, TextStyle(font_size=8)),
+            PdfFieldMapping("CNPJ", 20, 80, 2),
+            PdfFieldMapping("Telefone", 20, 90, 2),
+            PdfFieldMapping("Inexistente", 20, 100, 2),
+        ],
+        page_orientation="landscape"
+    )
+    rows = [
+        {"Nome": "Ana", "Documento": "12345678901", "Valor": "1500.5", "Data": "15/03/2024",
+         "Quando": "15/03/2024 14:30", "CNPJ": "12345678000199", "Telefone": "11987654321"},
+        {"Nome": "nan", "Documento": "123", "Valor": "abc", "Data": "", "Quando": "nan", "CNPJ": "", "Telefone": "1133334444"},
+    ]
+
+    plan = compile_render_plan(document_profile, spreadsheet_profile)
+    for row in rows:
+        compiled = [
+            (page_idx, field.x_pt, field.y_pt, field.font, field.size, field.rgb, field.underline,
+             field.formatter(row.get(field.column_name, "")))
+            for page_idx in sorted(plan.pages) for field in plan.fields_for_page(page_idx)
+        ]
+        expected = _uncompiled_fields(row, document_profile, spreadsheet_profile)
+        assert compiled == sorted(expected, key=lambda field: field[0]), (compiled, expected)
+
+    # O plano é compartilhado por todas as linhas do lote: as páginas são somente leitura
+    try:
+        plan.pages[99] = ()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("RenderPlan.pages deveria ser somente leitura")
+
+    # Plano para valores já formatados em bloco (core.formatting): mesmos textos
+    preformatted = compile_render_plan(document_profile, spreadsheet_profile, preformatted=True)
+    sheet = pd.DataFrame([
+        {column.original_header: row.get(column.custom_name, "") for column in spreadsheet_profile.columns}
+        for row in rows
+    ])
+    formatted = format_columns(sheet, spreadsheet_profile)
+    for index, row in enumerate(rows):
+        formatted_row = formatted.iloc[index].to_dict()
+        texts = [
+            field.formatter(formatted_row.get(field.column_name, ""))
+            for page_idx in sorted(preformatted.pages) for field in preformatted.fields_for_page(page_idx)
+        ]
+        expected = sorted(_uncompiled_fields(row, document_profile, spreadsheet_profile), key=lambda field: field[0])
+        assert texts == [field[-1] for field in expected]
+
+def test_vectorized_formatting_matches_cell_formatters():
+    """A formatação por coluna produz o mesmo texto que os formatadores por célula"""
+    df = pd.DataFrame({
+        "Nome": ["Ana", None, "nan", "Bia"],
+        "CPF": ["12345678901", "123.456.789-01", "abc", None],
+        "Telefone": ["11987654321", "1133334444", "123", None],
+        "Valor": [1234.5, "R$ 10", "abc", None],
+        "Data": pd.to_datetime(["2024-12-10 00:00", "2024-01-31 08:00", None, "2023-05-02 13:45"]),
+        "Texto": ["05/03/2024", "2024-03-05", "", None],
+    })
+    column_types = ["texto", "cpf", "telefone", "monetario", "data e hora", "data"]
+    spreadsheet_profile = SpreadsheetProfile(
+        name="Tipos",
+        columns=[ColumnMapping(h, h, t, i) for i, (h, t) in enumerate(zip(df.columns, column_types))]
+    )
+
+    formatted = format_columns(df, spreadsheet_profile)
+    for column in spreadsheet_profile.columns:
+        formatter = FIELD_FORMATTERS.get(column.column_type, format_text_field)
+        expected = [formatter(value) for value in df[column.original_header]]
+        assert list(formatted[column.custom_name]) == expected, column.custom_name
+
+    assert formatted["Data"][0] == "10/12/2024 às 00:00"
+    assert formatted["Data"][2] == ""
+
+def test_streaming_reader_matches_pandas():
+    """A leitura em blocos respeita header_row e formata igual à leitura completa"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sheet = os.path.join(tmp, "dados.xlsx")
+        rows = 25
+        df = pd.DataFrame({
+            "Nome": [["Ana", None, "Bia"][i % 3] for i in range(rows)],
+            "CPF": ["12345678901"] * rows,
+            "Valor": [i * 1.5 if i % 4 else None for i in range(rows)],
+            "Data": pd.to_datetime([f"2024-01-{i + 1:02d} 10:30" for i in range(rows)]),
+        })
+        with pd.ExcelWriter(sheet) as writer:
+            pd.DataFrame([["Relatório"]]).to_excel(writer, index=False, header=False)
+            df.to_excel(writer, index=False, startrow=2)
+
+        column_types = ["texto", "cpf", "monetario", "data e hora"]
+        spreadsheet_profile = SpreadsheetProfile(
+            name="Tipos", header_row=3,
+            columns=[ColumnMapping(h, h, t, i) for i, (h, t) in enumerate(zip(df.columns, column_types))]
+        )
+
+        expected = format_columns(pd.read_excel(sheet, header=2), spreadsheet_profile)
+        with open_spreadsheet(sheet, header_row=3, chunk_size=10) as reader:
+            chunks = list(reader)
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        streamed = pd.concat([format_columns(chunk, spreadsheet_profile) for chunk in chunks], ignore_index=True)
+        assert streamed.equals(expected)
+
+def test_spreadsheet_engines_read_the_same_rows():
+    """Cada motor de leitura entrega os mesmos cabeçalhos e linhas; o lote informa o motor usado"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sheet = os.path.join(tmp, "dados.xlsx")
+        rows = 12
+        df = pd.DataFrame({
+            "Nome": [f"P{i}" for i in range(rows)],
+            None: [None] * rows,
+            "Valor": [i * 1.5 if i % 3 else None for i in range(rows)],
+            "Data": pd.to_datetime([f"2024-02-{i + 1:02d}" for i in range(rows)]),
+        })
+        with pd.ExcelWriter(sheet) as writer:
+            pd.DataFrame([["Relatório"]]).to_excel(writer, index=False, header=False)
+            df.to_excel(writer, index=False, startrow=2)
+
+        automatic = "calamine" if calamine_available() else "openpyxl"
+        assert select_engine(sheet) == automatic
+        assert select_engine(sheet, streaming=False) == "pandas"
+        for engine, path in (("xlrd", sheet), ("openpyxl", "dados.xls")):
+            try:
+                select_engine(path, engine=engine)
+                assert False, engine
+            except ValueError:
+                pass
+
+        assert read_spreadsheet_headers(sheet, 2) == ["Nome", "Coluna 2", "Valor", "Data"]
+        column_types = ["texto", "texto", "monetario", "data"]
+        spreadsheet_profile = SpreadsheetProfile(
+            name="Motores", header_row=3,
+            columns=[ColumnMapping(h, h, t, i) for i, (h, t) in enumerate(zip(["Nome", "Unnamed: 1", "Valor", "Data"], column_types))]
+        )
+        engines = available_engines(sheet)
+        assert engines == [engine for engine in ("calamine", "openpyxl", "pandas") if engine != "calamine" or calamine_available()]
+        results = {}
+        for engine in engines:
+            assert read_header_row(sheet, 3, engine=engine)[2] == "Valor"
+            with open_spreadsheet(sheet, header_row=3, chunk_size=5, engine=engine) as reader:
+                assert reader.engine == engine
+                formatted = pd.concat([format_columns(chunk, spreadsheet_profile) for chunk in reader], ignore_index=True)
+                assert reader.parse_time > 0
+            results[engine] = formatted
+        for engine in engines[1:]:
+            assert results[engine].equals(results[engines[0]]), engine
+
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, batch_profile = _make_profiles(template)
+        batch_sheet = os.path.join(tmp, "lote.xlsx")
+        pd.DataFrame({"Nome": ["Ana", "Bia"], "CPF": ["12345678901"] * 2, "Valor": [1, 2]}).to_excel(batch_sheet, index=False)
+        job = BatchJob()
+        count, _ = _run_batch(tmp, batch_sheet, document_profile, batch_profile, workers=1, job=job)
+        assert count == 2 and job.timing.info["spreadsheet_engine"] == automatic
+        assert f"Motor de leitura da planilha: {automatic}" in job.timing.summary()
+
+def test_csv_and_parquet_input_match_excel():
+    """CSV (separador e codificação detectados) e Parquet formatam igual à planilha Excel"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = 30
+        df = pd.DataFrame({
+            "Nome": [f"José {i}" if i % 5 else None for i in range(rows)],
+            "CPF": [f"{i:011d}" for i in range(rows)],
+            "Valor": [f"{i * 2.5}" if i % 4 else None for i in range(rows)],
+            "Data": [f"{i % 28 + 1:02d}/03/2024" for i in range(rows)],
+        })
+        spreadsheet_profile = SpreadsheetProfile(
+            name="Formatos", header_row=2,
+            columns=[ColumnMapping(h, h, t, i) for i, (h, t) in enumerate(zip(df.columns, ["texto", "cpf", "monetario", "data"]))]
+        )
+        excel = os.path.join(tmp, "dados.xlsx")
+        with pd.ExcelWriter(excel) as writer:
+            pd.DataFrame([["Exportação"]]).to_excel(writer, index=False, header=False)
+            df.to_excel(writer, index=False, startrow=1)
+        with open_spreadsheet(excel, header_row=2) as reader:
+            expected = pd.concat([format_columns(chunk, spreadsheet_profile) for chunk in reader], ignore_index=True)
+
+        csv_path = os.path.join(tmp, "dados.csv")
+        with open(csv_path, "w", encoding="cp1252", newline="") as f:
+            f.write("Exportação;;;\n")
+            df.to_csv(f, sep=";", index=False)
+        encoding, dialect = detect_csv_format(csv_path)
+        assert encoding == "cp1252" and dialect.delimiter == ";"
+        assert read_spreadsheet_headers(csv_path, 1) == list(df.columns)
+        with open_spreadsheet(csv_path, header_row=2, chunk_size=7) as reader:
+            assert reader.engine == "csv" and reader.columns == list(df.columns)
+            chunks = list(reader)
+        assert [len(chunk) for chunk in chunks] == [7, 7, 7, 7, 2]
+        streamed = pd.concat([format_columns(chunk, spreadsheet_profile) for chunk in chunks], ignore_index=True)
+        assert streamed.equals(expected)
+        assert streamed["CPF"][1] == "000.000.000-01"
+
+        if pyarrow_available():
+            parquet_path = os.path.join(tmp, "dados.parquet")
+            df.assign(Extra=range(rows)).to_parquet(parquet_path, index=False)
+            with open_spreadsheet(parquet_path, chunk_size=7) as reader:
+                reader.use_columns(resolve_column_positions(reader.columns, spreadsheet_profile).values())
+                chunks = list(reader)
+            assert chunks[0]["Extra"].isna().all()
+            parquet = pd.concat([format_columns(chunk, spreadsheet_profile) for chunk in chunks], ignore_index=True)
+            assert parquet.equals(expected)
+
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, _ = _make_profiles(template)
+        document_profile.field_mappings = [PdfFieldMapping("Nome", 20, 30, 0), PdfFieldMapping("CPF", 20, 40, 0)]
+        count, files = _run_batch(tmp, csv_path, document_profile, spreadsheet_profile, workers=1)
+        assert count == rows and "José 1_Teste.pdf" in files
+
+        # Cabeçalho vazio ou só com espaços vira "Coluna N" em qualquer motor
+        blank_header = os.path.join(tmp, "sem_cabecalho.csv")
+        with open(blank_header, "w", encoding="utf-8", newline="") as f:
+            f.write("Nome,, ,CPF\nAna,1,2,12345678901\n")
+        assert read_spreadsheet_headers(blank_header) == ["Nome", "Coluna 2", "Coluna 3", "CPF"]
+
+def test_render_mode_roundtrip():
+    """O modo de renderização é salvo e recarregado com o perfil"""
+    document_profile, _ = _make_profiles("/path/to/template.pdf", render_mode="raster")
+    reloaded = DocumentProfile.from_dict(document_profile.to_dict())
+    assert reloaded.render_mode == "raster"
+
+    legacy = document_profile.to_dict()
+    legacy.pop("render_mode")
+    assert DocumentProfile.from_dict(legacy).render_mode == "auto"
+
+def test_raster_settings_change_background_encoding():
+    """Resolução, cores e compressão do fundo vêm do perfil e são salvas com ele"""
+    with tempfile.TemporaryDirectory() as tmp, _private_raster_cache(tmp):
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template, render_mode="raster")
+        sizes = {}
+        for settings in (RasterSettings(), RasterSettings(150, "gray"), RasterSettings(150, "bilevel"), RasterSettings(150, "rgb", "jpeg", 70)):
+            document_profile.raster_settings = settings
+            output = os.path.join(tmp, f"{settings.color}_{settings.codec}.pdf")
+            generate_pdf_with_template(ROW, document_profile, spreadsheet_profile, output)
+            with fitz.open(output) as doc:
+                xref, _, width, _, bpc = doc[0].get_images()[0][:5]
+                assert abs(width - A4[0] * settings.dpi / 72) <= 1
+                assert fitz.Pixmap(doc, xref).n == (3 if settings.color == "rgb" else 1)
+                assert bpc == (1 if settings.color == "bilevel" else 8)
+                assert ("DCTDecode" in doc.xref_get_key(xref, "Filter")[1]) == (settings.codec == "jpeg")
+                assert "Maria Souza" in doc[0].get_text()
+            sizes[(settings.color, settings.codec)] = os.path.getsize(output)
+        assert sizes[("bilevel", "flate")] < sizes[("gray", "flate")] < sizes[("rgb", "flate")]
+
+        reloaded = DocumentProfile.from_dict(document_profile.to_dict())
+        assert reloaded.raster_settings == RasterSettings(150, "rgb", "jpeg", 70)
+        legacy = document_profile.to_dict()
+        legacy.pop("raster_settings")
+        assert DocumentProfile.from_dict(legacy).raster_settings == RasterSettings()
+
+def test_invalid_raster_settings_rejected():
+    """Cores, compressão, qualidade, resolução e modo desconhecidos são recusados com ValueError"""
+    document_profile, _ = _make_profiles("/path/to/template.pdf", render_mode="raster")
+    for field, value in (("color", "cmyk"), ("codec", "png"), ("jpeg_quality", 0), ("jpeg_quality", 96), ("dpi", 0), ("dpi", "200")):
+        data = document_profile.to_dict()
+        data["raster_settings"][field] = value
+        try:
+            DocumentProfile.from_dict(data)
+        except ValueError as e:
+            assert repr(value) in str(e) or str(value) in str(e)
+        else:
+            raise AssertionError(f"{field}={value!r} deveria ser recusado")
+
+    data = document_profile.to_dict()
+    data["render_mode"] = "rastr"
+    try:
+        DocumentProfile.from_dict(data)
+    except ValueError as e:
+        assert "rastr" in str(e)
+    else:
+        raise AssertionError("modo de renderização desconhecido deveria ser recusado")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile.pdf_path = template
+        document_profile.raster_settings = RasterSettings(codec="webp")
+        try:
+            TemplateContext(document_profile, RasterCache(os.path.join(tmp, "cache"))).close()
+        except ValueError as e:
+            assert "webp" in str(e)
+        else:
+            raise AssertionError("compressão desconhecida deveria ser recusada")
+
+def test_raster_cache_reuse_eviction_and_invalidation():
+    """Páginas rasterizadas são reaproveitadas entre lotes e pela prévia, com limite de tamanho"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=2)
+        document_profile, _ = _make_profiles(template, render_mode="raster")
+        document_profile.raster_settings = RasterSettings(dpi=150)
+        cache = RasterCache(os.path.join(tmp, "cache"))
+
+        with TemplateContext(document_profile, cache) as context:
+            first = context.get_background_image(0)
+        assert len(os.listdir(cache.cache_dir)) == 1
+
+        def fail(page_idx):
+            raise AssertionError("página deveria vir do cache")
+        with TemplateContext(document_profile, cache) as context:
+            context._rasterize = fail
+            assert context.get_background_image(0) == first
+        # A prévia do editor (150 DPI, RGB) usa a mesma entrada
+        preview = render_pdf_to_image(template, 0, dpi=150, cache=cache)
+        assert preview.size == (1241, 1754) and len(os.listdir(cache.cache_dir)) == 1
+
+        # LRU: com espaço para uma página só, a menos usada sai
+        cache.max_bytes = len(first) * 3 // 2
+        entry = os.path.join(cache.cache_dir, os.listdir(cache.cache_dir)[0])
+        os.utime(entry, (1, 1))
+        render_pdf_to_image(template, 1, dpi=150, cache=cache)
+        assert os.listdir(cache.cache_dir) == [os.path.basename(entry).replace("_0_", "_1_")]
+
+        # Salvar um perfil com um template novo no mesmo nome invalida o anterior
+        manager = DataManager(os.path.join(tmp, "app"))
+        manager.save_profile(document_profile)
+        with TemplateContext(document_profile, manager.raster_cache) as context:
+            context.get_background_image(0)
+        assert len(os.listdir(manager.raster_cache.cache_dir)) == 1
+        _make_template(template, pages=1)
+        document_profile.pdf_path = template
+        manager.save_profile(document_profile)
+        assert os.listdir(manager.raster_cache.cache_dir) == []
+
+def test_cli_generates_without_gui_imports():
+    """A linha de comando gera o lote com os perfis salvos, sem importar tkinter"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        # No Linux o DataManager também respeita APPDATA
+        manager = DataManager(os.path.join(tmp, "PDF_Generator"))
+        manager.save_profile(spreadsheet_profile)
+        manager.save_profile(document_profile)
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({"Nome": ["Ana", "Bia", "Caio"], "CPF": ["12345678901"] * 3, "Valor": [1.5, 2, 3]}).to_excel(sheet, index=False)
+
+        output = os.path.join(tmp, "saida")
+        script = (
+            "import sys, cli; rc = cli.main(sys.argv[1:]); "
+            "assert not [m for m in sys.modules if 'tkinter' in m], 'tkinter importado'; sys.exit(rc)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script, "--perfil", "Teste", "--planilha", sheet, "--mes", "03/2024", "--saida", output],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env={**os.environ, "APPDATA": tmp},
+            capture_output=True, text=True, timeout=120
+        )
+        assert result.returncode == 0, result.stderr
+        events = [json.loads(line) for line in result.stdout.splitlines()]
+        assert events[-1]["event"] == "finished" and events[-1]["generated"] == 3
+        assert any(event["event"] == "progress" for event in events)
+        assert sorted(name for name in os.listdir(output) if name.endswith(".pdf")) == ["Ana_Teste.pdf", "Bia_Teste.pdf", "Caio_Teste.pdf"]
+
+def test_explorer_utils_show_error_for_missing_paths():
+    """Caminhos inexistentes mostram uma mensagem de erro em vez de falhar"""
+    from unittest import mock
+    from tkinter import messagebox
+    from utils.explorer_utils import open_file, open_file_directory, open_folder
+    with tempfile.TemporaryDirectory() as tmp:
+        missing = os.path.join(tmp, "nao_existe.pdf")
+        with mock.patch.object(messagebox, "showerror") as showerror:
+            open_file(missing)
+            open_folder(missing)
+            open_file_directory(missing)
+    assert [call.args for call in showerror.call_args_list] == [
+        ("Erro", "Arquivo não encontrado."),
+        ("Erro", "Caminho não encontrado."),
+        ("Erro", "Diretório não encontrado."),
+    ]
+
+def test_service_profile_store_keeps_profiles_warm():
+    """O serviço reaproveita o perfil carregado e o recarrega quando o arquivo muda"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        manager = DataManager(os.path.join(tmp, "app"))
+        manager.save_profile(spreadsheet_profile)
+        manager.save_profile(document_profile)
+
+        store = ProfileStore(manager)
+        warm = store.get("Teste")
+        assert store.get("Teste") is warm
+        filename, data = render_row(warm, {"Nome": "Ana", "CPF": "12345678901", "Valor": "10"})
+        assert filename == "Ana_Teste.pdf"
+        with fitz.open("pdf", data) as doc:
+            assert "123.456.789-01" in doc[0].get_text()
+
+        document_profile.filename_pattern = "{Nome}_{CPF}"
+        manager.save_profile(document_profile)
+        profile_path = manager.get_profile_path(DocumentProfile, "Teste")
+        os.utime(profile_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        reloaded = store.get("Teste")
+        assert reloaded is not warm
+        assert render_row(reloaded, {"Nome": "Ana", "CPF": "12345678901"})[0] == "Ana_12345678901.pdf"
+        try:
+            store.get("Inexistente")
+            raise AssertionError("perfil inexistente deveria falhar")
+        except ProfileNotFound:
+            pass
+        reloaded.close()
+
+def test_service_http_routes_backpressure_and_timeout():
+    """Rotas HTTP do serviço: chave e Host, documento gerado, 503 com a fila cheia, 504 no tempo esgotado e validação"""
+    import http.client
+    import threading
+    from core.generation_service import GenerationService
+    from service import ServiceServer, batch_workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        original_dirs = (data_manager.profiles_dir, data_manager.templates_dir)
+        data_manager.profiles_dir = os.path.join(tmp, "profiles")
+        data_manager.templates_dir = os.path.join(tmp, "templates")
+        os.makedirs(data_manager.profiles_dir)
+        os.makedirs(data_manager.templates_dir)
+        try:
+            data_manager.save_profile(spreadsheet_profile)
+            data_manager.save_profile(document_profile)
+            # Um processo e nenhuma vaga na fila: capacidade de um pedido
+            with GenerationService(workers=1, queue_size=0, preload=False) as service:
+                server = ServiceServer(("127.0.0.1", 0), service, "chave-teste")
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+
+                def post(path, body, **headers):
+                    headers = {"Content-Type": "application/json", "X-Token": "chave-teste", **headers}
+                    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+                    try:
+                        connection.request("POST", path, json.dumps(body), {k: v for k, v in headers.items() if v is not None})
+                        response = connection.getresponse()
+                        return response.status, dict(response.getheaders()), response.read()
+                    finally:
+                        connection.close()
+
+                request = {"perfil": "Teste", "valores": {"Nome": "Ana", "CPF": "12345678901", "Valor": "10"}}
+                try:
+                    # Sem a chave, com outro Host (DNS rebinding) ou como text/plain (formulário de uma página): recusado
+                    assert post("/documentos", request, **{"X-Token": None})[0] == 401
+                    assert post("/documentos", request, **{"X-Token": "errada"})[0] == 401
+                    assert post("/documentos", request, Host=f"exemplo.com:{server.server_port}")[0] == 403
+                    assert post("/documentos", request, **{"Content-Type": "text/plain"})[0] == 415
+                    for output in ("/", os.path.join("..", "fora")):
+                        status, _, body = post("/lotes", {"perfil": "Teste", "planilha": template, "saida": output})
+                        assert status == 400 and "saida" in json.loads(body)["erro"]
+
+                    status, headers, body = post("/documentos", request)
+                    assert status == 200 and headers["Content-Type"] == "application/pdf"
+                    assert "Ana_Teste.pdf" in headers["Content-Disposition"]
+                    with fitz.open("pdf", body) as doc:
+                        assert "123.456.789-01" in doc[0].get_text()
+
+                    # Fila cheia: recusado na hora, sem esperar
+                    assert service._slots.acquire(blocking=False)
+                    try:
+                        status, headers, body = post("/documentos", request)
+                    finally:
+                        service._slots.release()
+                    assert status == 503 and headers["Retry-After"] == "1"
+
+                    # Tempo esgotado: 504, e a vaga só volta quando o processo termina
+                    service.render_timeout = 1e-6
+                    status, _, body = post("/documentos", request)
+                    assert status == 504 and "erro" in json.loads(body)
+                    service.render_timeout = 30
+                    deadline = time.monotonic() + 30
+                    while service.in_flight and time.monotonic() < deadline:
+                        time.sleep(0.01)
+                    assert service.in_flight == 0
+                    assert post("/documentos", request)[0] == 200
+
+                    for workers in (0, -1, "2", 1.5, True):
+                        status, _, body = post("/lotes", {"perfil": "Teste", "planilha": template, "processos": workers})
+                        assert status == 400 and "processos" in json.loads(body)["erro"]
+                    assert post("/documentos", {"perfil": "Inexistente", "valores": {}})[0] == 404
+                    assert batch_workers(None) is None and batch_workers(10**6) == (os.cpu_count() or 1)
+                finally:
+                    server.shutdown()
+                    server.server_close()
+        finally:
+            data_manager.profiles_dir, data_manager.templates_dir = original_dirs
+
+def test_single_document_to_bytes_and_file_object():
+    """Documento avulso em bytes ou em arquivo aberto, reaproveitando template e plano"""
+    with tempfile.TemporaryDirectory() as tmp, _private_raster_cache(tmp):
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=2)
+        document_profile, spreadsheet_profile = _make_profiles(template, render_mode="raster")
+        values = {"Nome": "Ana", "CPF": "12345678901"}
+        try:
+            data = render_document(values, document_profile, spreadsheet_profile)
+            renderer = get_renderer(document_profile, spreadsheet_profile)
+            with open(os.path.join(tmp, "avulso.pdf"), "wb") as output:
+                assert render_document(values, document_profile, spreadsheet_profile, output) is None
+            assert get_renderer(document_profile, spreadsheet_profile) is renderer
+            with fitz.open(os.path.join(tmp, "avulso.pdf")) as doc:
+                assert len(doc) == 2 and "123.456.789-01" in doc[0].get_text()
+            with fitz.open("pdf", data) as doc:
+                assert doc.metadata["title"] == "Ana" and len(doc[0].get_images()) == 1
+
+            # Perfil editado: novo renderizador
+            document_profile.field_mappings[0].x += 10
+            assert get_renderer(document_profile, spreadsheet_profile) is not renderer
+
+            # Nome personalizado repetido: vale o tipo da primeira coluna, como nos lotes
+            spreadsheet_profile.columns.append(ColumnMapping("CPF (texto)", "CPF", "texto", 3))
+            assert get_renderer(document_profile, spreadsheet_profile).format_row(values)["CPF"] == "123.456.789-01"
+        finally:
+            clear_renderers()
+
+def test_batch_timing_report_aggregates_workers():
+    """Tempos por etapa e contadores do lote, somados entre os processos e gravados em JSON"""
+    with tempfile.TemporaryDirectory() as tmp, _private_raster_cache(tmp):
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=2)
+        document_profile, spreadsheet_profile = _make_profiles(template, render_mode="raster")
+        document_profile.raster_settings = RasterSettings(dpi=72)
+
+        rows = 60
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({"Nome": [f"P{i}" for i in range(rows)], "CPF": ["12345678901"] * rows, "Valor": [1] * rows}).to_excel(sheet, index=False)
+        job = BatchJob()
+        count, files = _run_batch(tmp, sheet, document_profile, spreadsheet_profile, workers=2, job=job, save_timing=True)
+
+        timing = job.timing
+        assert count == rows and timing.counters["rows"] == timing.counters["documents"] == rows
+        assert timing.counters["pages"] == rows * 2
+        assert timing.counters.get("cache_hits", 0) + timing.counters.get("cache_misses", 0) == 2 * 2  # uma vez por processo
+        output_dir = os.path.join(tmp, "2024", "03")
+        pdf_bytes = sum(os.path.getsize(os.path.join(output_dir, name)) for name in files if name.endswith(".pdf"))
+        assert timing.counters["bytes_written"] == pdf_bytes
+        assert {"reading", "formatting", "drawing", "composing", "saving"} <= set(timing.stages)
+        assert timing.total_wall > 0 and "Gravação dos PDFs" in timing.summary()
+
+        with open(os.path.join(output_dir, "Tempos_Teste.json"), encoding="utf-8") as f:
+            saved = TimingReport.from_dict(json.load(f))
+        assert saved.counters == timing.counters and saved.stages["saving"].calls == rows
+
+def test_memory_profile_samples_batch_and_flags_growth():
+    """O modo de memória amostra o lote, entra no relatório e avisa quando a memória cresce por linha"""
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.pdf")
+        _make_template(template, pages=1)
+        document_profile, spreadsheet_profile = _make_profiles(template)
+        rows = 30
+        sheet = os.path.join(tmp, "dados.xlsx")
+        pd.DataFrame({"Nome": [f"P{i}" for i in range(rows)], "CPF": ["1"] * rows, "Valor": [1] * rows}).to_excel(sheet, index=False)
+
+        job = BatchJob(timing=TimingReport(memory=MemoryProfile(sample_rows=5)))
+        _run_batch(tmp, sheet, document_profile, spreadsheet_profile, workers=4, job=job, save_timing=True)
+        memory = job.timing.memory
+        assert [sample.rows for sample in memory.samples] == [0, 5, 10, 15, 20, 25, 30]
+        assert {"reading", "drawing", "saving"} <= set(memory.stages) and memory.top_sites
+        assert not memory.warnings
+        with open(os.path.join(tmp, "2024", "03", "Tempos_Teste.json"), encoding="utf-8") as f:
+            assert TimingReport.from_dict(json.load(f)).memory.samples == memory.samples
+
+    # Objetos mantidos de uma linha para outra
+    retained = []
+    memory = MemoryProfile(sample_rows=50)
+    memory.start()
+    for row in range(1, 301):
+        retained.append(bytearray(20_000))
+        memory.sample(row)
+    memory.stop()
+    assert memory.warnings and "por linha" in memory.warnings[0]
+    assert memory.growth_sites[0].size_diff >= 200 * 20_000
+
+def test_generation_imports_without_posix_resource_module():
+    """O motor de geração importa sem o módulo resource (ausente no Windows)"""
+    script = (
+        "import sys; sys.modules['resource'] = None; "
+        "import core.pdf_generator; from core.memory_profile import current_rss; "
+        "assert isinstance(current_rss(), int)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+
+def test_startup_imports_skip_heavy_dependencies():
+    """Os módulos da abertura não carregam pandas, PyMuPDF, ReportLab nem requests"""
+    with tempfile.TemporaryDirectory() as tmp:
+        script = (
+            "import json, utils, frames; "
+            "from core.license_manager import license_manager; "
+            "from core.startup_timing import StartupReport; "
+            "report = StartupReport(budget=60); report.window_shown(); "
+            "print(json.dumps(report.to_dict()))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "APPDATA": tmp}, capture_output=True, text=True, timeout=60
+        )
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["heavy_modules"] == [] and report["over_budget"] is False
+    # As funções de pdf_utils continuam acessíveis pelo pacote
+    import utils
+    assert utils.format_cpf("12345678901") == "123.456.789-01" and "format_cpf" in utils.__all__
+
+def main():
+    tests = [
+        test_vector_mode_keeps_template_text,
+        test_raster_mode_still_available,
+        test_raster_batch_leaves_no_temp_files,
+        test_template_context_renders_once,
+        test_parallel_batch_matches_serial,
+        test_interrupted_batch_resumes_without_duplicates,
+        test_killed_parallel_batch_resumes_without_duplicates,
+        test_cancelled_batch_resumes_without_duplicates,
+        test_progress_events_are_throttled,
+        test_incremental_rerun_renders_only_changed_rows,
+        test_incremental_rerun_never_overwrites_a_renamed_row,
+        test_incremental_rerun_keeps_orphaned_pdfs_unless_pruned,
+        test_output_names_and_filename_pattern,
+        test_merged_output_with_bookmarks,
+        test_zip_output_without_intermediate_files,
+        test_render_plan_matches_uncompiled_rows,
+        test_vectorized_formatting_matches_cell_formatters,
+        test_streaming_reader_matches_pandas,
+        test_spreadsheet_engines_read_the_same_rows,
+        test_csv_and_parquet_input_match_excel,
+        test_render_mode_roundtrip,
+        test_raster_settings_change_background_encoding,
+        test_invalid_raster_settings_rejected,
+        test_raster_cache_reuse_eviction_and_invalidation,
+        test_cli_generates_without_gui_imports,
+        test_explorer_utils_show_error_for_missing_paths,
+        test_service_profile_store_keeps_profiles_warm,
+        test_service_http_routes_backpressure_and_timeout,
+        test_single_document_to_bytes_and_file_object,
+        test_batch_timing_report_aggregates_workers,
+        test_memory_profile_samples_batch_and_flags_growth,
+        test_generation_imports_without_posix_resource_module,
+        test_startup_imports_skip_heavy_dependencies,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✓ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,12 @@
 # -*- coding: utf-8 -*-
-from .pdf_utils import (
-    select_file,
-    read_spreadsheet_headers,
-    format_date_value,
-    get_pdf_page_count,
-    render_pdf_to_image,
-    format_cpf,
-    format_cnpj,
-    format_phone,
-    get_page_size,
-    get_page_size_mm,
-    A4_WIDTH_MM,
-    A4_HEIGHT_MM,
-    PAGE_SIZES
-)
-
+from .dialog_utils import select_file, SPREADSHEET_FILE_TYPES
 from .explorer_utils import open_file, open_file_directory, open_folder
 from .scroll_helper import bind_mousewheel, bind_mousewheel_to_scrollable_frame
 from .threading_utils import WorkerThread
 
-
-__all__ = [
-    'select_file',
+# Funções de pdf_utils: importadas só no primeiro uso, porque o módulo carrega
+# pandas, PyMuPDF e ReportLab (caros na abertura do aplicativo)
+_PDF_UTILS = (
     'read_spreadsheet_headers',
     'format_date_value',
     'get_pdf_page_count',
@@ -33,7 +18,13 @@ __all__ = [
     'get_page_size_mm',
     'A4_WIDTH_MM',
     'A4_HEIGHT_MM',
-    'PAGE_SIZES',
+    'PAGE_SIZES'
+)
+
+__all__ = [
+    'select_file',
+    'SPREADSHEET_FILE_TYPES',
+    *_PDF_UTILS,
     'open_file',
     'open_file_directory',
     'open_folder',
@@ -41,3 +32,9 @@ __all__ = [
     'bind_mousewheel_to_scrollable_frame',
     'WorkerThread'
 ]
+
+def __getattr__(name):
+    if name in _PDF_UTILS:
+        from . import pdf_utils
+        return getattr(pdf_utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional, Tuple
+
+from resources.strings import strings
+
+# Formatos lidos por core.spreadsheet_reader (não importado aqui: carrega o pandas)
+SPREADSHEET_FILE_TYPES: List[Tuple[str, str]] = [
+    (strings.FILE_FILTERS_SPREADSHEETS, "*.xlsx *.xlsm *.xlsb *.xls *.ods *.csv *.tsv *.txt *.parquet *.pq"),
+    (strings.FILE_FILTERS_EXCEL, "*.xlsx *.xlsm *.xlsb *.xls"),
+    (strings.FILE_FILTERS_CSV, "*.csv *.tsv *.txt"),
+    (strings.FILE_FILTERS_PARQUET, "*.parquet *.pq"),
+    (strings.FILE_FILTERS_ODS, "*.ods"),
+]
+
+def select_file(file_types: List[Tuple[str, str]]) -> Optional[str]:
+    """Opens a file dialog and returns the selected file path."""
+    # Importado aqui para que o resto do módulo funcione sem interface gráfica
+    from tkinter import filedialog
+    file_path = filedialog.askopenfilename(
+        title="Selecione o arquivo",
+        filetypes=file_types
+    )
+    return file_path if file_path else None
@@ -1,15 +1,20 @@
 import subprocess
 import os
-from tkinter import messagebox
+
+def _show_error(message: str):
+    # tkinter só é carregado quando há um erro a mostrar (o pacote utils
+    # também é usado pelo motor de geração, que roda sem interface)
+    from tkinter import messagebox
+    messagebox.showerror("Erro", message)
 
 def open_file(file_path: str):
     try:
         if os.path.exists(file_path):
             os.startfile(os.path.abspath(file_path))
         else:
-            messagebox.showerror("Erro", "Arquivo não encontrado.")
+            _show_error("Arquivo não encontrado.")
     except Exception as e:
-        messagebox.showerror("Erro", f"Não foi possível abrir o arquivo: {e}")
+        _show_error(f"Não foi possível abrir o arquivo: {e}")
     
 def open_folder(path: str):
     try:
@@ -21,9 +26,9 @@ def open_folder(path: str):
             else:
                 os.startfile(path)
         else:
-            messagebox.showerror("Erro", "Caminho não encontrado.")
+            _show_error("Caminho não encontrado.")
     except Exception as e:
-        messagebox.showerror("Erro", f"Não foi possível abrir a pasta: {e}")
+        _show_error(f"Não foi possível abrir a pasta: {e}")
 
 def open_file_directory(path: str):
     try:
@@ -33,6 +38,6 @@ def open_file_directory(path: str):
             elif os.name == 'posix':
                 subprocess.call(['xdg-open', path])
         else:
-            messagebox.showerror("Erro", "Diretório não encontrado.")
+            _show_error("Diretório não encontrado.")
     except Exception as e:
-        messagebox.showerror("Erro", f"Não foi possível abrir o diretório: {e}")
\ No newline at end of file
+        _show_error(f"Não foi possível abrir o diretório: {e}")
\ No newline at end of file
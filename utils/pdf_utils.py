@@ -2,37 +2,25 @@
 from datetime import datetime
 import pandas as pd
 import os
-from tkinter import filedialog
 from typing import Any, List, Optional, Tuple, Dict
 from PIL import Image
 import re
 import fitz 
 from reportlab.lib.pagesizes import A1, A2, A3, A4, A5, A6, LETTER, LEGAL, landscape
-
-def select_file(file_types: List[Tuple[str, str]]) -> Optional[str]:
-    """Opens a file dialog and returns the selected file path."""
-    file_path = filedialog.askopenfilename(
-        title="Selecione o arquivo",
-        filetypes=file_types
-    )
-    return file_path if file_path else None
+from core.spreadsheet_reader import read_header_row
 
 def read_spreadsheet_headers(file_path: str, header_row_index: int = 0) -> List[str]:
     """
     Lê os cabeçalhos de uma planilha Excel baseando-se no índice da linha fornecido (0-indexed).
+    Usa o mesmo motor de leitura da geração (core.spreadsheet_reader).
     """
     try:
-        # Lê a planilha sem cabeçalho para pegar a linha específica
-        df = pd.read_excel(file_path, header=None)
-        
-        if header_row_index >= len(df):
-            raise Exception(f"A linha {header_row_index + 1} não existe na planilha.")
-            
-        row = df.iloc[header_row_index]
+        row = read_header_row(file_path, header_row_index + 1)
 
-        # Converte para strings e substitui NaN
+        # Converte para strings e substitui células vazias (None, "" ou só espaços,
+        # conforme o motor de leitura)
         headers = [
-            str(col) if pd.notna(col) else f"Coluna {i+1}"
+            str(col) if col is not None and str(col).strip() else f"Coluna {i+1}"
             for i, col in enumerate(row)
         ]
 
@@ -103,25 +91,34 @@ def get_pdf_page_count(pdf_path: str) -> int:
     except:
         return 0
 
-def render_pdf_to_image(pdf_path: str, page_index: int = 0, dpi: int = 150) -> Optional[Image.Image]:
+def _render_page_image(doc: fitz.Document, page_index: int, dpi: int) -> Image.Image:
+    page = doc[page_index]
+    zoom = dpi / 72
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat)
+    mode = "RGB"
+    
+    if pix.alpha:   # se tiver alpha, converte corretamente
+        mode = "RGBA"
+
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+def render_pdf_to_image(pdf_path: str, page_index: int = 0, dpi: int = 150, cache=None) -> Optional[Image.Image]:
+    """
+    Renderiza uma página do PDF. Com cache (um RasterCache), a página é lida
+    do cache em disco quando já foi renderizada antes com a mesma resolução.
+    """
     try:
         doc = fitz.open(pdf_path)
-        if page_index >= len(doc):
+        try:
+            if page_index >= len(doc):
+                return None
+            if cache is None:
+                return _render_page_image(doc, page_index, dpi)
+            img, _ = cache.get_or_render(pdf_path, page_index, dpi, "rgb", lambda: _render_page_image(doc, page_index, dpi))
+            return img
+        finally:
             doc.close()
-            return None
-            
-        page = doc[page_index]
-        zoom = dpi / 72
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        mode = "RGB"
-        
-        if pix.alpha:   # se tiver alpha, converte corretamente
-            mode = "RGBA"
-
-        img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
-        doc.close()
-        return img
     except Exception as e:
         print(f"Erro ao renderizar PDF: {e}")
         return None